@@ -8,6 +8,13 @@ window.MathJax = {
   options: {
     ignoreHtmlClass: ".*|",
     processHtmlClass: "arithmatex"
+  },
+  chtml: {
+    // The vendored MathJax bundle cannot resolve its fonts relative to itself.
+    // hooks/asset_optimizer.py replaces the CDN URL by the vendored fonts,
+    // relative to this script.
+    fontURL: new URL("https://cdn.jsdelivr.net/npm/mathjax@3/es5/output/chtml/fonts/woff-v2",
+                     document.currentScript.src).href
   }
 };
 
@@ -17,27 +24,3 @@ document$.subscribe(() => {
   MathJax.texReset()
   MathJax.typesetPromise()
 })
-
-// Enhanced functionality for multi-cluster documentation
-document.addEventListener('DOMContentLoaded', function() {
-  // Enhanced copy code functionality
-  const enhanceCopyCode = () => {
-    const codeBlocks = document.querySelectorAll('pre code');
-    codeBlocks.forEach(block => {
-      // Add cluster context to YAML blocks
-      if (block.classList.contains('language-yaml')) {
-        const content = block.textContent;
-        if (content.includes('kind: VirtualMachine')) {
-          block.setAttribute('data-context', 'vm-config');
-        } else if (content.includes('kind: Application')) {
-          block.setAttribute('data-context', 'argocd-config');
-        } else if (content.includes('kind: ManagedCluster')) {
-          block.setAttribute('data-context', 'rhacm-config');
-        }
-      }
-    });
-  };
-  
-  // Initialize enhancements
-  enhanceCopyCode();
-});
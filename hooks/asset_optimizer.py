@@ -0,0 +1,264 @@
+"""
+Build-time page asset optimizer (MkDocs hook, registered in ``mkdocs.yml``).
+
+Every page used to load MathJax and the polyfill.io bundle, although only pages
+with ``arithmatex`` markup need them, and mermaid's runtime came from unpkg on
+each page with a diagram. For every rendered page this hook:
+
+- keeps the MathJax scripts only on pages that contain math and the mermaid
+  runtime only on pages that contain diagrams;
+- vendors external scripts and stylesheets into ``assets/vendor/`` under
+  content-hashed names (``tex-mml-chtml.3f9a1c2e44.js``) so they are served
+  from the site and can be cached forever;
+- vendors the CHTML web fonts the MathJax bundle loads (listed in the bundle
+  itself) and points ``fontURL`` in ``javascripts/mathjax.js`` at them, so
+  math pages make no third-party requests either;
+- preloads the vendored mermaid runtime on diagram pages, which makes
+  Material's diagram loader skip its CDN download;
+- strips comments and indentation from the HTML (``pre``, ``textarea``,
+  ``script`` and ``style`` are left untouched).
+
+After the build the site's own ``extra_css`` and ``extra_javascript`` files are
+minified. Downloads are cached in ``.cache/vendor/``; with
+``ASSET_OPTIMIZER_OFFLINE=1`` only that cache is used and scripts missing from
+it keep their CDN URL.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import urllib.request
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from mkdocs.plugins import get_plugin_logger
+
+log = get_plugin_logger(__name__)
+
+MERMAID_RUNTIME = 'https://unpkg.com/mermaid@10.4.0/dist/mermaid.min.js'
+# fontURL of javascripts/mathjax.js, replaced by the vendored font directory
+MATHJAX_FONT_URL = 'https://cdn.jsdelivr.net/npm/mathjax@3/es5/output/chtml/fonts/woff-v2'
+MATHJAX_FONT_PATH = 'output/chtml/fonts/woff-v2/'  # relative to the es5 bundle
+VENDOR_DIR = 'assets/vendor'
+CACHE_DIR = Path('.cache') / 'vendor'
+OFFLINE_ENV = 'ASSET_OPTIMIZER_OFFLINE'
+DOWNLOAD_TIMEOUT = 30
+# Stylesheets that pull further files relative to the CDN (web fonts)
+KEEP_REMOTE = ('fonts.googleapis.com', 'fonts.gstatic.com')
+
+_MATH_MARKER = re.compile(r'class="[^"]*\barithmatex\b')
+_MERMAID_MARKER = re.compile(r'class="[^"]*\bmermaid\b')
+_MATH_SCRIPT = re.compile(r'mathjax', re.I)
+_MATHJAX_FONT = re.compile(rb'MathJax_[\w-]+\.woff')
+_SCRIPT_TAG = re.compile(r'<script\b[^>]*\bsrc="([^"]+)"[^>]*>\s*</script>\s*', re.I)
+_STYLESHEET_TAG = re.compile(r'<link\b[^>]*\brel="stylesheet"[^>]*>', re.I)
+_HREF = re.compile(r'\bhref="(https?://[^"]+)"')
+# Inline setup emitted by the mermaid2 plugin
+_MERMAID_INLINE = re.compile(r'<script\b[^>]*>\s*(?:import mermaid from|mermaid\.initialize\()'
+                             r'.*?</script>\s*', re.I | re.S)
+_BUNDLE_TAG = re.compile(r'<script\b[^>]*\bsrc="[^"]*assets/javascripts/bundle\.[^"]*"', re.I)
+
+_PROTECTED = re.compile(r'<(pre|textarea|script|style)\b.*?</\1>', re.I | re.S)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s*([{};,>])\s*')
+
+
+class _State:
+    """What one build has vendored and saved so far."""
+
+    def __init__(self, site_dir: str = '', cache_dir: Path = CACHE_DIR):
+        self.site_dir = Path(site_dir)
+        self.cache_dir = cache_dir
+        self.offline = os.environ.get(OFFLINE_ENV, '').lower() in ('1', 'true', 'yes')
+        self.vendored = {}  # url -> site-relative path, None if unavailable
+        self.mathjax_fonts = None  # site-relative font directory once vendored
+        self.pages = 0
+        self.math_pages = 0
+        self.mermaid_pages = 0
+        self.dropped_scripts = 0
+        self.saved_bytes = 0
+
+
+_state = _State()
+
+
+def on_config(config, **kwargs):
+    global _state
+    project_dir = Path(config['config_file_path']).parent
+    _state = _State(config['site_dir'], project_dir / CACHE_DIR)
+    return config
+
+
+def on_post_page(output, page, config, **kwargs):
+    _state.pages += 1
+    has_math = bool(_MATH_MARKER.search(output))
+    has_mermaid = bool(_MERMAID_MARKER.search(output))
+    _state.math_pages += has_math
+    _state.mermaid_pages += has_mermaid
+    page_path = page.file.dest_uri
+
+    def script(match):
+        src = match.group(1)
+        if (_MATH_SCRIPT.search(src) and not has_math) or ('mermaid' in src and not has_mermaid):
+            _state.dropped_scripts += 1
+            return ''
+        if src.startswith(('http://', 'https://')):
+            vendored = vendor(src, page_path)
+            if _MATH_SCRIPT.search(src) and vendored != src:
+                vendor_mathjax_fonts(src)
+            return match.group(0).replace(src, vendored)
+        return match.group(0)
+
+    def stylesheet(match):
+        tag = match.group(0)
+        href = _HREF.search(tag)
+        if not href or urlsplit(href.group(1)).hostname in KEEP_REMOTE:
+            return tag
+        return tag.replace(href.group(1), vendor(href.group(1), page_path))
+
+    optimized = _SCRIPT_TAG.sub(script, output)
+    optimized = _STYLESHEET_TAG.sub(stylesheet, optimized)
+    if not has_mermaid:
+        optimized = _MERMAID_INLINE.sub('', optimized)
+    elif 'mermaid' not in ''.join(_SCRIPT_TAG.findall(optimized)):
+        # Material only fetches mermaid from its CDN when no runtime is defined yet
+        bundle = _BUNDLE_TAG.search(optimized)
+        if bundle:
+            preload = f'<script src="{vendor(MERMAID_RUNTIME, page_path)}"></script>'
+            optimized = optimized[:bundle.start()] + preload + optimized[bundle.start():]
+    optimized = minify_html(optimized)
+    _state.saved_bytes += len(output.encode('utf-8')) - len(optimized.encode('utf-8'))
+    return optimized
+
+
+def on_post_build(config, **kwargs):
+    site_dir = Path(config['site_dir'])
+    if _state.mathjax_fonts:
+        for name in config['extra_javascript']:
+            _point_at_fonts(site_dir, str(name))
+    for name in config['extra_css']:
+        _minify_file(site_dir, str(name), minify_css)
+    for name in config['extra_javascript']:
+        _minify_file(site_dir, str(name), minify_js)
+    vendored = [path for path in _state.vendored.values() if path]
+    log.info(f"{_state.pages} pages: MathJax on {_state.math_pages}, mermaid on {_state.mermaid_pages}, "
+             f"{_state.dropped_scripts} script tags dropped, {len(vendored)} assets vendored, "
+             f"{_state.saved_bytes / 1024:.0f} KiB saved by minification")
+
+
+def vendor(url: str, page_path: str) -> str:
+    """The page-relative URL of the vendored copy of ``url`` (``url`` itself if unavailable)."""
+    if url not in _state.vendored:
+        data = _download(url)
+        target = None
+        if data is not None:
+            name = posixpath.basename(urlsplit(url).path) or 'asset'
+            stem, ext = posixpath.splitext(name)
+            target = f"{VENDOR_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+            path = _state.site_dir / target
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        _state.vendored[url] = target
+    target = _state.vendored[url]
+    if target is None:
+        return url
+    return posixpath.relpath(target, posixpath.dirname(page_path) or '.')
+
+
+def vendor_mathjax_fonts(bundle_url: str) -> None:
+    """Vendor the woff fonts named in a MathJax bundle into one content-hashed directory."""
+    if _state.mathjax_fonts is not None:
+        return
+    _state.mathjax_fonts = ''  # tried once per build
+    bundle = _download(bundle_url)
+    names = sorted({name.decode('ascii') for name in _MATHJAX_FONT.findall(bundle or b'')})
+    fonts = {}
+    for name in names:
+        data = _download(urljoin(bundle_url, MATHJAX_FONT_PATH + name))
+        if data is None:
+            return  # fontURL keeps the CDN
+        fonts[name] = data
+    if not fonts:
+        return
+    digest = hashlib.sha256(b''.join(fonts[name] for name in names)).hexdigest()[:10]
+    target = f"{VENDOR_DIR}/mathjax-woff-v2.{digest}"
+    for name, data in fonts.items():
+        path = _state.site_dir / target / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    _state.mathjax_fonts = target
+
+
+def _point_at_fonts(site_dir: Path, name: str) -> None:
+    """Replace the CDN fontURL in a site script by the vendored fonts, relative to the script."""
+    if '://' in name:
+        return
+    path = site_dir / name
+    if not path.is_file():
+        return
+    script = path.read_text(encoding='utf-8')
+    if MATHJAX_FONT_URL in script:
+        fonts = posixpath.relpath(_state.mathjax_fonts, posixpath.dirname(name) or '.')
+        path.write_text(script.replace(MATHJAX_FONT_URL, fonts), encoding='utf-8')
+
+
+def _download(url: str):
+    cached = _state.cache_dir / hashlib.sha256(url.encode('utf-8')).hexdigest()
+    if cached.exists():
+        return cached.read_bytes()
+    if _state.offline:
+        log.warning(f"{url} is not in {_state.cache_dir} (offline build), keeping the CDN URL")
+        return None
+    try:
+        with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            data = response.read()
+    except OSError as e:
+        log.warning(f"Could not vendor {url} ({e}), keeping the CDN URL")
+        return None
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    cached.write_bytes(data)
+    return data
+
+
+def minify_html(html: str) -> str:
+    """Drop comments and collapse whitespace outside pre/textarea/script/style."""
+    parts = []
+    position = 0
+    for match in _PROTECTED.finditer(html):
+        parts.append(_collapse_html(html[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_collapse_html(html[position:]))
+    return ''.join(parts)
+
+
+def _collapse_html(text: str) -> str:
+    text = _HTML_COMMENT.sub('', text)
+    text = re.sub(r'[ \t]*\n\s*', '\n', text)
+    return re.sub(r'[ \t]{2,}', ' ', text)
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub('', css)
+    css = _CSS_SPACE.sub(r'\1', css)
+    return re.sub(r'\s+', ' ', css).replace(';}', '}').strip()
+
+
+def minify_js(js: str) -> str:
+    """Drop indentation, blank lines and whole-line ``//`` comments."""
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+def _minify_file(site_dir: Path, name: str, minify) -> None:
+    if '://' in name or '.min.' in name:
+        return
+    path = site_dir / name
+    if not path.is_file():
+        return
+    original = path.read_text(encoding='utf-8')
+    minified = minify(original)
+    path.write_text(minified, encoding='utf-8')
+    _state.saved_bytes += len(original.encode('utf-8')) - len(minified.encode('utf-8'))
@@ -0,0 +1,158 @@
+"""
+Per-page rendered-HTML cache (MkDocs hook, registered in ``mkdocs.yml``).
+
+Markdown conversion with highlight, superfences, tabbed and the other
+extensions is the bulk of ``mkdocs build``, and every build re-renders all
+pages. This hook stores the rendered HTML, table of contents and title of each
+page in ``.cache/render/``. A page whose key is unchanged is restored from
+there instead of being converted again, so rebuilds in CI and ``mkdocs serve``
+reloads cost roughly the pages that changed.
+
+The key hashes:
+- the page's Markdown as handed to the renderer;
+- its path;
+- the ``markdown_extensions`` configuration;
+- the URL style;
+- the list of documentation files, which determines how links resolve;
+- the versions of mkdocs, Markdown and pymdown-extensions.
+
+Pages that include snippets (``--8<--``) depend on other files and are always
+rendered. ``MKDOCS_RENDER_CACHE=0`` disables the cache. It is also bypassed
+with ``--strict``, where link warnings must be reported on every build.
+
+Restoring a page replaces ``Page.render`` on the page and sets the private
+``Page._title_from_render``, as checked against the mkdocs 1.5 pinned in
+``requirements.txt``. A page without them is rendered normally.
+"""
+
+import hashlib
+import json
+import os
+from importlib import metadata
+from pathlib import Path
+
+from mkdocs.plugins import get_plugin_logger
+from mkdocs.structure.toc import get_toc
+
+log = get_plugin_logger(__name__)
+
+CACHE_DIR = Path('.cache') / 'render'
+CACHE_VERSION = 1
+DISABLE_ENV = 'MKDOCS_RENDER_CACHE'
+SNIPPET_MARKER = '--8<--'
+_VERSIONED_PACKAGES = ('mkdocs', 'markdown', 'pymdown-extensions')
+
+
+class _State:
+    """Cache location, shared key material and counters of one build."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, enabled: bool = False, config_key: str = ''):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.config_key = config_key
+        self.hits = 0
+        self.misses = 0
+
+
+_state = _State()
+
+
+def _stable(value):
+    """JSON fallback for config values such as ``!!python/name`` fence formatters."""
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return repr(value)
+
+
+def _package_versions() -> dict:
+    versions = {}
+    for package in _VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def on_config(config, **kwargs):
+    global _state
+    enabled = os.environ.get(DISABLE_ENV, '1').lower() not in ('0', 'false', 'no') and not config['strict']
+    config_key = json.dumps({
+        'version': CACHE_VERSION,
+        'extensions': [str(extension) for extension in config['markdown_extensions']],
+        'extension_configs': config['mdx_configs'],
+        'use_directory_urls': config['use_directory_urls'],
+        'packages': _package_versions(),
+    }, sort_keys=True, default=_stable)
+    project_dir = Path(config['config_file_path']).parent
+    _state = _State(project_dir / CACHE_DIR, enabled, config_key)
+    return config
+
+
+def on_files(files, config, **kwargs):
+    # Links are resolved against the file set, so adding or removing a page invalidates the cache
+    documents = sorted(file.src_uri for file in files.documentation_pages())
+    _state.config_key += '\n' + json.dumps(documents)
+    return files
+
+
+def on_page_markdown(markdown, page, config, files, **kwargs):
+    if not _state.enabled or SNIPPET_MARKER in markdown or not _supports_restore(page):
+        return markdown
+    key = hashlib.sha256('\0'.join((_state.config_key, page.file.src_uri, markdown)).encode('utf-8')).hexdigest()
+    path = _state.cache_dir / f"{hashlib.sha256(page.file.src_uri.encode('utf-8')).hexdigest()[:16]}.json"
+    entry = _load(path)
+    if entry is not None and entry.get('key') == key:
+        _state.hits += 1
+        page.render = lambda config, files: _restore(page, entry)
+        return markdown
+    _state.misses += 1
+    render = page.render
+
+    def render_and_store(config, files):
+        render(config, files)
+        _store(path, {
+            'key': key,
+            'content': page.content,
+            'toc': [_toc_token(item) for item in page.toc],
+            'title': page._title_from_render,
+        })
+
+    page.render = render_and_store
+    return markdown
+
+
+def on_post_build(config, **kwargs):
+    if _state.enabled:
+        log.info(f"Render cache: {_state.hits} page(s) reused, {_state.misses} rendered")
+
+
+def _supports_restore(page) -> bool:
+    """Whether the page has the mkdocs internals a cached render is restored through."""
+    return callable(getattr(page, 'render', None)) and hasattr(page, '_title_from_render')
+
+
+def _restore(page, entry: dict) -> None:
+    page.content = entry['content']
+    page.toc = get_toc(entry['toc'])
+    page._title_from_render = entry['title']
+
+
+def _toc_token(item) -> dict:
+    """The toc token of an ``AnchorLink`` (the structure ``get_toc`` rebuilds from)."""
+    return {'level': item.level, 'id': item.id, 'name': item.title,
+            'children': [_toc_token(child) for child in item.children]}
+
+
+def _load(path: Path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _store(path: Path, entry: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix('.tmp')
+    temporary.write_text(json.dumps(entry), encoding='utf-8')
+    temporary.replace(path)
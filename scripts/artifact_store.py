@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Content-addressed artifact store shared by concurrent export jobs.
+
+Pipelines running at the same time on one runner (the Pages workflow,
+``task ci``, per-branch exports) used to render the same diagrams and run
+pandoc on the same chapters into private temp directories. The exporters now
+look up rendered diagrams, chapter and complete DOCX files and the workload
+XLSX in a store outside the checkout, keyed by a hash of everything the
+artifact is built from:
+
+    <store>/objects/<ab>/<sha256>        artifact contents, named by their hash
+    <store>/refs/<kind>/<key>.json       key -> object (mtime = last use)
+    <store>/locks/<kind>/<key>.lock      held while a job produces the artifact
+    <store>/gc.lock                      shared by readers/writers, exclusive for gc
+
+Objects and refs are written to a temporary file and renamed into place, so
+readers never see partial files. A job that is about to produce an artifact
+takes the key's lock first. A concurrent job asking for the same key waits
+for the lock, then finds the finished artifact instead of building it again.
+
+``gc`` drops refs unused for ``--max-age`` days and deletes every object no
+remaining ref points to (reference counts are recomputed from the refs).
+
+The store lives in ``$EXPORT_CACHE_DIR`` (default ``~/.cache/rh-ove-export``);
+``EXPORT_CACHE=0`` disables it. The store is only a cache: if its directory
+cannot be created or written (read-only home on CI), the exporters log a
+warning and continue without it.
+
+    python artifact_store.py stats
+    python artifact_store.py gc --max-age 14
+    python artifact_store.py verify --fix
+"""
+
+import argparse
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STORE_ENV = 'EXPORT_CACHE_DIR'
+DISABLE_ENV = 'EXPORT_CACHE'
+DEFAULT_MAX_AGE_DAYS = 30
+_CHUNK = 1024 * 1024
+
+
+def default_store_dir() -> Path:
+    if os.environ.get(STORE_ENV):
+        return Path(os.environ[STORE_ENV])
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'rh-ove-export'
+
+
+def artifact_key(*parts: Any) -> str:
+    """Store key of an artifact built from the given inputs (str, bytes or paths)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            part = part.read_bytes() if part.exists() else b''
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed artifacts with atomic writes and per-key producer locks."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root is not None else None
+        self.hits = 0
+        self.stores = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / digest
+
+    def _ref_path(self, kind: str, key: str) -> Path:
+        return self.root / 'refs' / kind / f"{key}.json"
+
+    def _disable(self, error: OSError) -> None:
+        """Continue without the store after it failed (the export itself must not)."""
+        logger.warning(f"⚠️ Artifact store {self.root} is not usable ({error}); continuing without it")
+        self.root = None
+
+    def check_writable(self) -> bool:
+        """Create the store's directories and take its gc lock once; disables the store on failure."""
+        if not self.enabled:
+            return False
+        try:
+            (self.root / 'tmp').mkdir(parents=True, exist_ok=True)
+            with self._shared():
+                pass
+        except OSError as e:
+            self._disable(e)
+        return self.enabled
+
+    @contextmanager
+    def _flock(self, path: Path, mode: int) -> Iterator[None]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a') as handle:
+            fcntl.flock(handle, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _shared(self):
+        """Readers and writers exclude gc, not each other."""
+        return self._flock(self.root / 'gc.lock', fcntl.LOCK_SH)
+
+    def _read_ref(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._ref_path(kind, key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def fetch(self, kind: str, key: str, destination: Path) -> bool:
+        """Copy the stored artifact to ``destination``; False if it is not stored."""
+        if not self.enabled:
+            return False
+        try:
+            with self._shared():
+                ref = self._read_ref(kind, key)
+                if ref is None or not self._object_path(ref['object']).exists():
+                    return False
+                destination = Path(destination)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                # A copy, not a link: exporters post-process their outputs in place
+                tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+                shutil.copyfile(self._object_path(ref['object']), tmp_path)
+                tmp_path.replace(destination)
+                os.utime(self._ref_path(kind, key))
+        except OSError as e:
+            self._disable(e)
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, kind: str, key: str, source: Path, **meta: Any) -> Optional[str]:
+        """Store a copy of ``source`` under the key; returns the object digest."""
+        if not self.enabled:
+            return None
+        try:
+            with self._shared():
+                tmp_dir = self.root / 'tmp'
+                tmp_dir.mkdir(parents=True, exist_ok=True)
+                digest = hashlib.sha256()
+                size = 0
+                fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+                try:
+                    with os.fdopen(fd, 'wb') as output, open(source, 'rb') as data:
+                        for chunk in iter(lambda: data.read(_CHUNK), b''):
+                            digest.update(chunk)
+                            output.write(chunk)
+                            size += len(chunk)
+                    object_path = self._object_path(digest.hexdigest())
+                    object_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp_name, object_path)
+                finally:
+                    if os.path.exists(tmp_name):
+                        os.unlink(tmp_name)
+                ref_path = self._ref_path(kind, key)
+                ref_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_ref = ref_path.with_name(f".{ref_path.name}.{os.getpid()}.tmp")
+                tmp_ref.write_text(json.dumps({'object': digest.hexdigest(), 'size': size,
+                                               'created': round(time.time(), 3), 'meta': meta}), encoding='utf-8')
+                tmp_ref.replace(ref_path)
+        except OSError as e:
+            self._disable(e)
+            return None
+        self.stores += 1
+        return digest.hexdigest()
+
+    @contextmanager
+    def producing(self, kind: str, key: str) -> Iterator[None]:
+        """Hold the key's producer lock (blocks while another job builds the same artifact)."""
+        if not self.enabled:
+            yield
+            return
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(self._flock(self.root / 'locks' / kind / f"{key}.lock", fcntl.LOCK_EX))
+            except OSError as e:
+                self._disable(e)
+            yield
+
+    @asynccontextmanager
+    async def producing_async(self, kind: str, key: str):
+        """``producing`` for coroutines: the lock is awaited in a thread."""
+        if not self.enabled:
+            yield
+            return
+        lock_path = self.root / 'locks' / kind / f"{key}.lock"
+        handle = None
+        try:
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(lock_path, 'a')
+            await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_EX)
+        except OSError as e:
+            if handle is not None:
+                handle.close()
+                handle = None
+            self._disable(e)
+        try:
+            yield
+        finally:
+            if handle is not None:
+                handle.close()  # releases the lock
+
+    def _refs(self) -> Iterator[tuple]:
+        for kind_dir in sorted((self.root / 'refs').glob('*')):
+            for ref_path in kind_dir.glob('*.json'):
+                try:
+                    ref = json.loads(ref_path.read_text(encoding='utf-8'))
+                except (OSError, ValueError):
+                    ref = None
+                yield kind_dir.name, ref_path, ref
+
+    def _objects(self) -> Iterator[Path]:
+        return (path for path in (self.root / 'objects').glob('*/*') if path.is_file())
+
+    def stats(self) -> Dict[str, Any]:
+        """Refs per kind, object count and sizes, unreferenced objects."""
+        kinds: Dict[str, Dict[str, Any]] = {}
+        referenced = set()
+        oldest = None
+        for kind, ref_path, ref in self._refs():
+            entry = kinds.setdefault(kind, {'refs': 0, 'bytes': 0})
+            entry['refs'] += 1
+            if ref:
+                entry['bytes'] += ref.get('size', 0)
+                referenced.add(ref['object'])
+            used = ref_path.stat().st_mtime
+            oldest = used if oldest is None else min(oldest, used)
+        objects = list(self._objects())
+        unreferenced = [path for path in objects if path.name not in referenced]
+        return {
+            'root': str(self.root),
+            'kinds': kinds,
+            'objects': len(objects),
+            'bytes': sum(path.stat().st_size for path in objects),
+            'unreferenced_objects': len(unreferenced),
+            'unreferenced_bytes': sum(path.stat().st_size for path in unreferenced),
+            'oldest_use_days': round((time.time() - oldest) / 86400, 1) if oldest else None,
+        }
+
+    def gc(self, max_age_days: float = DEFAULT_MAX_AGE_DAYS, dry_run: bool = False) -> Dict[str, int]:
+        """Expire refs unused for ``max_age_days``, then delete objects without refs."""
+        removed = {'refs': 0, 'objects': 0, 'bytes': 0}
+        cutoff = time.time() - max_age_days * 86400
+        with self._flock(self.root / 'gc.lock', fcntl.LOCK_EX):
+            refcounts: Counter = Counter()
+            for _, ref_path, ref in self._refs():
+                if ref is None or ref_path.stat().st_mtime < cutoff:
+                    removed['refs'] += 1
+                    if not dry_run:
+                        ref_path.unlink(missing_ok=True)
+                else:
+                    refcounts[ref['object']] += 1
+            for path in self._objects():
+                if refcounts[path.name] == 0:
+                    removed['objects'] += 1
+                    removed['bytes'] += path.stat().st_size
+                    if not dry_run:
+                        path.unlink(missing_ok=True)
+            if not dry_run:
+                # Leftovers of writers that were killed mid-write
+                shutil.rmtree(self.root / 'tmp', ignore_errors=True)
+        return removed
+
+    def verify(self, fix: bool = False) -> List[str]:
+        """Objects whose content does not match their name and refs to missing objects."""
+        problems = []
+        with self._flock(self.root / 'gc.lock', fcntl.LOCK_EX):
+            for path in self._objects():
+                digest = hashlib.sha256()
+                with open(path, 'rb') as data:
+                    for chunk in iter(lambda: data.read(_CHUNK), b''):
+                        digest.update(chunk)
+                if digest.hexdigest() != path.name:
+                    problems.append(f"corrupt object {path.relative_to(self.root)}")
+                    if fix:
+                        path.unlink()
+            for kind, ref_path, ref in self._refs():
+                if ref is None or not self._object_path(ref['object']).exists():
+                    problems.append(f"dangling ref {kind}/{ref_path.name}")
+                    if fix:
+                        ref_path.unlink(missing_ok=True)
+        return problems
+
+
+_store = ArtifactStore()
+
+
+def get_artifact_store() -> ArtifactStore:
+    return _store
+
+
+def open_artifact_store(root: Optional[Path] = None) -> ArtifactStore:
+    """Enable the shared store for this process.
+
+    It stays disabled with EXPORT_CACHE=0 or when its directory is not writable.
+    """
+    global _store
+    if os.environ.get(DISABLE_ENV, '1').lower() in ('0', 'false', 'no', 'off'):
+        _store = ArtifactStore()
+    else:
+        _store = ArtifactStore(root or default_store_dir())
+        _store.check_writable()
+    return _store
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Inspect and maintain the shared export artifact store")
+    parser.add_argument('--store', type=Path, default=None,
+                        help=f"Store directory (default: ${STORE_ENV} or ~/.cache/rh-ove-export)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    stats = subparsers.add_parser('stats', help="Show stored artifacts per kind and their size")
+    stats.add_argument('--json', action='store_true', help="Print the statistics as JSON")
+    gc = subparsers.add_parser('gc', help="Expire unused refs and delete unreferenced objects")
+    gc.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE_DAYS,
+                    help=f"Drop refs not used for this many days (default: {DEFAULT_MAX_AGE_DAYS})")
+    gc.add_argument('--dry-run', action='store_true', help="Only report what would be removed")
+    verify = subparsers.add_parser('verify', help="Check object hashes and refs")
+    verify.add_argument('--fix', action='store_true', help="Remove corrupt objects and dangling refs")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    store = ArtifactStore(args.store or default_store_dir())
+    if not store.root.exists():
+        logger.info(f"No artifact store at {store.root} yet")
+        return 0
+
+    if args.command == 'stats':
+        stats = store.stats()
+        if args.json:
+            print(json.dumps(stats, indent=2))
+            return 0
+        logger.info(f"Artifact store {stats['root']}")
+        for kind, entry in sorted(stats['kinds'].items()):
+            logger.info(f"  {kind:8} {entry['refs']:6} artifact(s) {entry['bytes'] / 1024 / 1024:9.2f} MB")
+        logger.info(f"  objects  {stats['objects']:6}             {stats['bytes'] / 1024 / 1024:9.2f} MB "
+                    f"({stats['unreferenced_objects']} unreferenced, "
+                    f"{stats['unreferenced_bytes'] / 1024 / 1024:.2f} MB)")
+        if stats['oldest_use_days'] is not None:
+            logger.info(f"  least recently used artifact: {stats['oldest_use_days']} day(s) ago")
+        return 0
+
+    if args.command == 'gc':
+        removed = store.gc(args.max_age, args.dry_run)
+        verb = 'Would remove' if args.dry_run else 'Removed'
+        logger.info(f"{verb} {removed['refs']} ref(s) and {removed['objects']} object(s) "
+                    f"({removed['bytes'] / 1024 / 1024:.2f} MB)")
+        return 0
+
+    problems = store.verify(args.fix)
+    for problem in problems:
+        logger.info(f"  ✗ {problem}{' (removed)' if args.fix else ''}")
+    if not problems:
+        logger.info("✓ All objects and refs are consistent")
+    return 1 if problems and not args.fix else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
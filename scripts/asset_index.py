@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Reverse index from exported assets back to their source diagrams.
+
+The exporters record, during their extraction pass, which mermaid blocks
+(content digest and line) every source page holds and which artifacts were
+derived from them:
+
+- rendered images (``mermaid_<digest>.png``) and ``*_advanced.drawio`` files,
+  per diagram digest
+- DOCX documents (complete or chapter), per source page
+
+The index is persisted as JSON (default ``.export-work/asset-index.json``).
+Answering "what is stale after editing architecture/network.md?" only needs
+the changed page and its changed diagrams, not a re-run of the exporters:
+
+    python asset_index.py stale docs/architecture/network.md
+    python asset_index.py stale            # every indexed page that changed
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = Path('.export-work') / 'asset-index.json'
+
+
+def file_hash(file_path: Path) -> str:
+    """Content hash of a source page."""
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+class AssetIndex:
+    """Maps source pages and mermaid digests to their derived artifacts."""
+
+    def __init__(self, path: Optional[Path] = None, project_root: Optional[Path] = None):
+        self.path = path
+        self.project_root = (project_root or Path.cwd()).resolve()
+        self.docs_dir = self.project_root / 'docs'
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {'version': INDEX_VERSION, 'sources': {}, 'diagrams': {}, 'documents': {}}
+        if path is not None and path.exists():
+            try:
+                loaded = json.loads(path.read_text(encoding='utf-8'))
+                if loaded.get('version') == INDEX_VERSION:
+                    self.data.update(loaded)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable asset index {path}: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def source_key(self, source: Any) -> str:
+        """Path of a page relative to docs/ (accepts absolute or project-relative paths)."""
+        path = Path(source)
+        if not path.is_absolute():
+            path = self.project_root / path
+        try:
+            return path.resolve().relative_to(self.docs_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def artifact_key(self, artifact: Any) -> str:
+        """Artifact path relative to the project root when it lives inside it."""
+        path = Path(artifact)
+        if not path.is_absolute():
+            path = self.project_root / path
+        try:
+            return path.resolve().relative_to(self.project_root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def record_source(self, source: Any, content: str, blocks: Iterable[Any]) -> None:
+        """Record the mermaid blocks (digest, index, line) of a source page."""
+        if not self.enabled:
+            return
+        key = self.source_key(source)
+        diagrams = [{'digest': block.digest, 'index': block.index, 'line': block.line} for block in blocks]
+        with self._lock:
+            sources = self.data['sources']
+            previous = sources.get(key, {})
+            old_digests = {entry['digest'] for entry in previous.get('diagrams', [])}
+            new_digests = {entry['digest'] for entry in diagrams}
+
+            # Detach the page from diagrams it no longer contains
+            for digest in old_digests - new_digests:
+                entry = self.data['diagrams'].get(digest)
+                if entry and key in entry['sources']:
+                    entry['sources'].remove(key)
+            for diagram in diagrams:
+                entry = self.data['diagrams'].setdefault(diagram['digest'], {'sources': [], 'artifacts': []})
+                if key not in entry['sources']:
+                    entry['sources'].append(key)
+
+            sources[key] = {
+                'hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+                'diagrams': diagrams,
+                'documents': previous.get('documents', []),
+            }
+
+    def add_diagram_artifact(self, digest: str, artifact: Any) -> None:
+        """Record an artifact (image, draw.io file) derived from a diagram."""
+        if not self.enabled:
+            return
+        artifact = self.artifact_key(artifact)
+        with self._lock:
+            entry = self.data['diagrams'].setdefault(digest, {'sources': [], 'artifacts': []})
+            if artifact not in entry['artifacts']:
+                entry['artifacts'].append(artifact)
+
+    def record_render(self, digest: str, duration: float, nodes: int, edges: int,
+                      backend: Optional[str] = None) -> None:
+        """Record how long a diagram took to render (for render scheduling)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self.data['diagrams'].setdefault(digest, {'sources': [], 'artifacts': []})
+            previous = entry.get('render', {})
+            runs = previous.get('runs', 0)
+            if runs:
+                # Smooth out one-off slow renders (cold image cache, busy host)
+                duration = (previous['duration'] + duration) / 2
+            entry['render'] = {'duration': round(duration, 3), 'nodes': nodes, 'edges': edges,
+                               'backend': backend, 'runs': runs + 1}
+
+    def render_history(self) -> Dict[str, Dict[str, Any]]:
+        """Recorded render metadata per diagram digest."""
+        with self._lock:
+            return {digest: dict(entry['render']) for digest, entry in self.data['diagrams'].items()
+                    if 'render' in entry}
+
+    def diagram_location(self, digest: str) -> Optional[Tuple[str, int]]:
+        """(page, line) of the first recorded occurrence of a diagram, None if unknown."""
+        with self._lock:
+            for source in self.data['diagrams'].get(digest, {}).get('sources', []):
+                for entry in self.data['sources'].get(source, {}).get('diagrams', []):
+                    if entry['digest'] == digest:
+                        return source, entry['line']
+        return None
+
+    def add_document(self, document: Any, sources: Iterable[Any], chapter: Optional[str] = None) -> None:
+        """Record a DOCX document and the pages it was built from."""
+        if not self.enabled:
+            return
+        document = self.artifact_key(document)
+        source_keys = [self.source_key(source) for source in sources]
+        with self._lock:
+            self.data['documents'][document] = {'sources': source_keys, 'chapter': chapter}
+            for key in source_keys:
+                entry = self.data['sources'].setdefault(key, {'hash': None, 'diagrams': [], 'documents': []})
+                if document not in entry['documents']:
+                    entry['documents'].append(document)
+
+    def stale(self, source: Any) -> Optional[Dict[str, Any]]:
+        """Artifacts made stale by the current content of a source page.
+
+        Returns None when the page is unchanged since it was indexed. Only the
+        page's own entry and its changed diagrams are looked up.
+        """
+        from convert_docs_to_docx import extract_mermaid_blocks
+
+        key = self.source_key(source)
+        entry = self.data['sources'].get(key)
+        page = self.docs_dir / key
+        content = page.read_text(encoding='utf-8') if page.exists() else ''
+        if entry and entry.get('hash') == hashlib.sha256(content.encode('utf-8')).hexdigest():
+            return None
+
+        recorded = {diagram['digest']: diagram for diagram in (entry or {}).get('diagrams', [])}
+        current = {block.digest: block for block in extract_mermaid_blocks(content)}
+        changed = [recorded[digest] for digest in recorded if digest not in current]
+        added = [{'digest': block.digest, 'index': block.index, 'line': block.line}
+                 for digest, block in current.items() if digest not in recorded]
+
+        artifacts = []
+        for diagram in changed:
+            for artifact in self.data['diagrams'].get(diagram['digest'], {}).get('artifacts', []):
+                if artifact not in artifacts:
+                    artifacts.append(artifact)
+
+        documents = list((entry or {}).get('documents', []))
+        return {
+            'source': key,
+            'indexed': entry is not None,
+            'changed_diagrams': changed,
+            'new_diagrams': added,
+            'artifacts': artifacts,
+            'documents': documents,
+            'chapters': sorted({self.data['documents'].get(document, {}).get('chapter')
+                                for document in documents} - {None}),
+        }
+
+    def save(self) -> None:
+        """Write the index atomically."""
+        if not self.enabled:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with self._lock:
+            tmp_path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding='utf-8')
+        tmp_path.replace(self.path)
+
+
+_index = AssetIndex()
+
+
+def get_asset_index() -> AssetIndex:
+    return _index
+
+
+def open_asset_index(project_root: Path, path: Optional[Path] = None) -> AssetIndex:
+    """Enable recording into the persisted index of a project for this process."""
+    global _index
+    _index = AssetIndex(project_root / (path or DEFAULT_INDEX_PATH), project_root)
+    return _index
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Human readable staleness report of one page."""
+    state = 'changed' if report['indexed'] else 'not indexed yet'
+    logger.info(f"{report['source']} ({state})")
+    for diagram in report['changed_diagrams']:
+        logger.info(f"  ~ diagram {diagram['index']} (line {diagram['line']}, {diagram['digest']}) changed or removed")
+    for diagram in report['new_diagrams']:
+        logger.info(f"  + diagram {diagram['index']} (line {diagram['line']}, {diagram['digest']}) is new")
+    for artifact in report['artifacts']:
+        logger.info(f"  stale asset:    {artifact}")
+    for document in report['documents']:
+        logger.info(f"  stale document: {document}")
+    if report['chapters']:
+        logger.info(f"  rebuild with: convert_docs_to_docx_by_chapter.py --resume --only {','.join(report['chapters'])}")
+    if report['changed_diagrams'] or report['new_diagrams']:
+        logger.info("  sync draw.io with: drawio_sync.py")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Query the index of exported assets")
+    parser.add_argument('--index', type=Path, default=None,
+                        help=f"Index file (default: <project>/{DEFAULT_INDEX_PATH})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    stale = subparsers.add_parser('stale', help="List the artifacts made stale by edited pages")
+    stale.add_argument('files', nargs='*', help="Pages to check (default: every indexed page)")
+    stale.add_argument('--json', action='store_true', help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    project_root = Path(__file__).parent.parent
+    index = open_asset_index(project_root, args.index)
+    if not index.path.exists():
+        logger.error(f"No asset index at {index.path}; run an exporter first")
+        return 1
+
+    files = args.files or sorted(index.data['sources'])
+    # Paths on the command line are relative to the current directory
+    reports = [report for report in (index.stale(Path(name).resolve() if args.files else index.docs_dir / name)
+                                     for name in files) if report]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    elif not reports:
+        logger.info("✓ All indexed assets are up to date")
+    else:
+        for report in reports:
+            print_report(report)
+    return 1 if reports else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
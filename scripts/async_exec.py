@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Asyncio executor for external tools used by the exporters.
+
+Every external call (pandoc, docker, npx, mmdc) goes through ToolExecutor so
+that renders and conversions can be scheduled on a single event loop:
+
+- stdout/stderr are streamed line by line into the logger instead of being
+  buffered in memory (only a short stderr tail is kept for error reports)
+- each task has its own timeout; on expiry the whole child process group is
+  killed so that Chromium/node grandchildren do not survive
+- a global concurrency limit is applied per tool
+- time spent in tools is accounted per tool (``TOOL_CLOCK``), so profiles can
+  tell subprocess waits from Python CPU time
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of concurrent processes per tool (keyed by executable name)
+TOOL_LIMITS: Dict[str, int] = {
+    'pandoc': 2,
+    'pandoc-server': 4,  # requests to the long-lived server, no process start-up
+    'docker': 2,
+    'docker-exec': 4,  # renders inside the long-lived mermaid-cli container
+    'npx': 2,
+    'mmdc': 4,
+}
+DEFAULT_LIMIT = os.cpu_count() or 2
+
+# Number of stderr lines kept for error reporting
+STDERR_TAIL_LINES = 50
+
+
+@dataclass
+class ToolResult:
+    """Outcome of a single tool invocation."""
+    cmd: List[str]
+    returncode: Optional[int]
+    stdout: str = ''
+    stderr: str = ''
+    duration: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class ToolClock:
+    """Time spent in external tools: per-tool totals and the wall time with any tool running."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self._active = 0
+        self._since = 0.0
+        self._busy = 0.0
+
+    def started(self) -> None:
+        with self._lock:
+            if self._active == 0:
+                self._since = time.monotonic()
+            self._active += 1
+
+    def finished(self, tool: str, duration: float) -> None:
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._busy += time.monotonic() - self._since
+            self.totals[tool] = self.totals.get(tool, 0.0) + duration
+            self.calls[tool] = self.calls.get(tool, 0) + 1
+
+    def busy(self) -> float:
+        """Wall time during which at least one tool was running."""
+        with self._lock:
+            return self._busy + (time.monotonic() - self._since if self._active else 0.0)
+
+
+TOOL_CLOCK = ToolClock()
+
+
+class ToolExecutor:
+    """Run external tools as asyncio subprocesses with per-tool limits."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = dict(TOOL_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        if tool not in self._semaphores:
+            self._semaphores[tool] = asyncio.Semaphore(self.limits.get(tool, DEFAULT_LIMIT))
+        return self._semaphores[tool]
+
+    def slot(self, tool: str) -> asyncio.Semaphore:
+        """Concurrency slot of a tool, for work that does not spawn a process."""
+        return self._semaphore(tool)
+
+    async def run(self,
+                  cmd: Sequence[str],
+                  timeout: Optional[float] = None,
+                  capture_stdout: bool = False,
+                  input_data: Optional[bytes] = None,
+                  cwd: Optional[str] = None,
+                  env: Optional[Dict[str, str]] = None,
+                  tool: Optional[str] = None) -> ToolResult:
+        """Run a command, waiting for a free slot of its tool first."""
+        cmd = [str(arg) for arg in cmd]
+        tool = tool or os.path.basename(cmd[0])
+        async with self._semaphore(tool):
+            return await self._run(cmd, tool, timeout, capture_stdout, input_data, cwd, env)
+
+    async def _run(self, cmd, tool, timeout, capture_stdout, input_data, cwd, env) -> ToolResult:
+        tool_logger = logger.getChild(tool)
+        start = time.monotonic()
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env=env,
+                start_new_session=True,
+            )
+        except (FileNotFoundError, PermissionError) as e:
+            return ToolResult(cmd=cmd, returncode=127, stderr=str(e))
+
+        TOOL_CLOCK.started()
+        try:
+            return await self._communicate(proc, cmd, tool_logger, start, timeout, capture_stdout, input_data)
+        finally:
+            TOOL_CLOCK.finished(tool, time.monotonic() - start)
+
+    async def _communicate(self, proc, cmd, tool_logger, start, timeout, capture_stdout,
+                           input_data) -> ToolResult:
+        stdout_chunks: List[str] = []
+        stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+
+        async def pump_stdout():
+            async for raw in proc.stdout:
+                line = raw.decode('utf-8', errors='replace')
+                if capture_stdout:
+                    stdout_chunks.append(line)
+                elif line.strip():
+                    tool_logger.debug(line.rstrip())
+
+        async def pump_stderr():
+            async for raw in proc.stderr:
+                line = raw.decode('utf-8', errors='replace').rstrip()
+                if line:
+                    stderr_tail.append(line)
+                    tool_logger.info(line)
+
+        async def feed_stdin():
+            if input_data is not None:
+                try:
+                    proc.stdin.write(input_data)
+                    await proc.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    proc.stdin.close()
+
+        async def communicate():
+            await asyncio.gather(feed_stdin(), pump_stdout(), pump_stderr())
+            return await proc.wait()
+
+        timed_out = False
+        try:
+            returncode = await asyncio.wait_for(communicate(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            tool_logger.error(f"Timed out after {timeout}s, killing: {' '.join(cmd)}")
+            returncode = await self._kill(proc)
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            raise
+
+        return ToolResult(
+            cmd=cmd,
+            returncode=returncode,
+            stdout=''.join(stdout_chunks),
+            stderr='\n'.join(stderr_tail),
+            duration=time.monotonic() - start,
+            timed_out=timed_out,
+        )
+
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process) -> Optional[int]:
+        """Kill the child and its whole process group, then reap it."""
+        if proc.returncode is None:
+            try:
+                if hasattr(os, 'killpg'):
+                    os.killpg(proc.pid, signal.SIGKILL)
+                else:
+                    proc.kill()
+            except ProcessLookupError:
+                pass
+        return await proc.wait()
+
+
+async def gather_tasks(*aws: Awaitable[Any]) -> List[Any]:
+    """Await coroutines concurrently, like ``asyncio.gather``, but fail fast.
+
+    On the first exception the remaining tasks are cancelled and awaited (their
+    tool processes are killed) before the exception is raised to the caller.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(aw) for aw in aws]
+    except BaseExceptionGroup as failed:
+        error = failed.exceptions[0]
+        while isinstance(error, BaseExceptionGroup):
+            error = error.exceptions[0]
+        raise error from None
+    return [task.result() for task in tasks]
+
+
+def run_tool(cmd: Sequence[str], **kwargs) -> ToolResult:
+    """Run a single tool invocation from synchronous code."""
+    return asyncio.run(ToolExecutor().run(cmd, **kwargs))
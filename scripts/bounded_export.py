@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory exports for very large documentation sets.
+
+Normally a document is combined in memory, written to a temp file and loaded
+by pandoc as one AST. That makes three copies, which exhausts small CI
+runners once the docs hold thousands of pages. With ``--memory-budget MB``
+the exporters instead:
+
+- stream the preprocessed pages straight to disk, one page at a time;
+- split a document or chapter whose markdown exceeds the part size into
+  sub-documents of whole pages, each converted by its own pandoc run. The
+  part size is derived from the budget (``pandoc_heap / PANDOC_MEMORY_FACTOR``);
+- run pandoc one at a time, with its heap capped by the GHC runtime
+  (``+RTS -M``), so an underestimated part fails cleanly instead of
+  exhausting the runner;
+- merge the part DOCX files. Only one part's ``document.xml`` is held in
+  memory at a time.
+
+The peak RSS of the exporter and of its child processes is reported at the
+end. The merge concatenates the part bodies and renumbers everything that
+must stay unique:
+- relationship ids (images, hyperlinks);
+- list numbering;
+- bookmark ids;
+- drawing ids;
+- footnotes.
+
+The table of contents of the first part is a Word field and covers the
+whole document once fields are updated.
+
+    python bounded_export.py merge part1.docx part2.docx -o merged.docx
+    python bounded_export.py plan --memory-budget 512      # parts per chapter
+"""
+
+import argparse
+import io
+import logging
+import mimetypes
+import re
+import resource
+import shutil
+import sys
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bytes of pandoc heap per byte of markdown (AST, docx writer and mermaid-filter output)
+PANDOC_MEMORY_FACTOR = 40
+# Share of the budget given to pandoc; the rest is the exporter itself
+PANDOC_SHARE = 0.75
+MIN_PANDOC_HEAP_MB = 64
+# One pandoc and one headless browser at a time (ToolExecutor limits)
+BOUNDED_TOOL_LIMITS = {'pandoc': 1, 'npx': 1, 'mmdc': 1, 'docker': 1}
+
+DOCUMENT = 'word/document.xml'
+DOCUMENT_RELS = 'word/_rels/document.xml.rels'
+NUMBERING = 'word/numbering.xml'
+FOOTNOTES = 'word/footnotes.xml'
+FOOTNOTES_RELS = 'word/_rels/footnotes.xml.rels'
+CONTENT_TYPES = '[Content_Types].xml'
+PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+# The body-level section properties: self-closing or not, and not a paragraph's own sectPr
+_SECT_PR = re.compile(r'<w:sectPr\b(?:[^>]*/>|(?:(?!<w:sectPr\b).)*?</w:sectPr>)\s*$', re.S)
+_RELATIONSHIP = re.compile(r'<Relationship\b[^>]*/>')
+_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+_REL_REFERENCE = re.compile(r'\b(r:(?:id|embed|link|pict))="([^"]+)"')
+_BOOKMARK_ID = re.compile(r'(<w:bookmark(?:Start|End)\b[^>]*?\bw:id=")(\d+)(")')
+_DRAWING_ID = re.compile(r'(<(?:wp:docPr|pic:cNvPr)\b[^>]*?\bid=")(\d+)(")')
+_NUM_ID = re.compile(r'(<w:numId w:val=")(\d+)(")')
+_NUM_DEFINITION_ID = re.compile(r'(<w:num\b[^>]*?\bw:numId=")(\d+)(")')
+_ABSTRACT_ID = re.compile(r'(<w:abstractNum\b[^>]*?\bw:abstractNumId=")(\d+)(")')
+_ABSTRACT_REFERENCE = re.compile(r'(<w:abstractNumId w:val=")(\d+)(")')
+_ABSTRACT_NUM = re.compile(r'<w:abstractNum\b.*?</w:abstractNum>', re.S)
+_NUM = re.compile(r'<w:num\b.*?</w:num>', re.S)
+_FOOTNOTE = re.compile(r'<w:footnote\b(?![^>]*w:type=)[^>]*>.*?</w:footnote>', re.S)
+_FOOTNOTE_ID = re.compile(r'(<w:footnote(?:Reference)?\b[^>]*?\bw:id=")(\d+)(")')
+_DEFAULT_TYPE = re.compile(r'<Default\b[^>]*/>')
+_OVERRIDE_TYPE = re.compile(r'<Override\b[^>]*/>')
+
+
+@dataclass
+class MemoryBudget:
+    """Peak memory allowed for one export, split between pandoc and the exporter."""
+    megabytes: int
+
+    @property
+    def pandoc_heap_mb(self) -> int:
+        return max(MIN_PANDOC_HEAP_MB, int(self.megabytes * PANDOC_SHARE))
+
+    @property
+    def part_bytes(self) -> int:
+        """Largest markdown sub-document pandoc converts within its heap."""
+        return self.pandoc_heap_mb * 1024 * 1024 // PANDOC_MEMORY_FACTOR
+
+    def pandoc_args(self) -> List[str]:
+        return ['+RTS', f"-M{self.pandoc_heap_mb}m", '-RTS']
+
+
+def split_parts(files: List[Path], max_bytes: int) -> List[List[Path]]:
+    """Group pages in order into parts of at most ``max_bytes`` (a larger page is a part of its own)."""
+    parts: List[List[Path]] = []
+    current: List[Path] = []
+    size = 0
+    for file_path in files:
+        file_size = file_path.stat().st_size if file_path.exists() else 0
+        if current and size + file_size > max_bytes:
+            parts.append(current)
+            current, size = [], 0
+        current.append(file_path)
+        size += file_size
+    if current:
+        parts.append(current)
+    return parts
+
+
+def peak_rss_mb() -> Tuple[float, float]:
+    """Peak resident memory (MB) of this process and of its largest finished child."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes on macOS, KB elsewhere
+    return own / scale, children / scale
+
+
+def report_peak_rss(budget: MemoryBudget) -> None:
+    own, child = peak_rss_mb()
+    status = '✓' if max(own, child) <= budget.megabytes else '⚠️'
+    logger.info(f"{status} Peak RSS: exporter {own:.0f} MB, largest tool process {child:.0f} MB "
+                f"(budget {budget.megabytes} MB)")
+
+
+def add_memory_budget_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="Bounded-memory mode: stream pages to disk, convert oversized documents in "
+                             "parts of whole pages and cap pandoc's heap (one pandoc at a time, CLI backend)")
+
+
+def _content_types(source: zipfile.ZipFile) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """A package's content types: by part name (``<Override>``) and by extension (``<Default>``)."""
+    types = source.read(CONTENT_TYPES).decode('utf-8')
+    overrides, defaults = {}, {}
+    for element in _OVERRIDE_TYPE.findall(types):
+        attributes = dict(_ATTRIBUTE.findall(element))
+        overrides[attributes.get('PartName', '').lower()] = attributes.get('ContentType', '')
+    for element in _DEFAULT_TYPE.findall(types):
+        attributes = dict(_ATTRIBUTE.findall(element))
+        defaults[attributes.get('Extension', '').lower()] = attributes.get('ContentType', '')
+    return overrides, defaults
+
+
+def _part_type(types: Tuple[Dict[str, str], Dict[str, str]], part_name: str) -> str:
+    """Content type of a part, as its package declares it (or guessed from the extension)."""
+    overrides, defaults = types
+    extension = Path(part_name).suffix.lstrip('.').lower()
+    return (overrides.get(part_name.lower()) or defaults.get(extension)
+            or mimetypes.guess_type(part_name)[0] or 'application/octet-stream')
+
+
+def _shift(pattern: re.Pattern, text: str, offset: int) -> Tuple[str, int]:
+    """Add ``offset`` to every numeric id matched by ``pattern``; returns the text and the largest new id."""
+    largest = -1
+
+    def replace(match):
+        nonlocal largest
+        value = int(match.group(2)) + offset
+        largest = max(largest, value)
+        return f"{match.group(1)}{value}{match.group(3)}"
+
+    return pattern.sub(replace, text), largest
+
+
+class DocxMerger:
+    """Appends the bodies of DOCX files (pandoc or draft output) to the first one."""
+
+    def __init__(self, output: Path):
+        self.output = output
+        self.bookmarks = 0
+        self.drawings = 0
+        self.footnotes = 0
+        self.nums = 0
+        self.abstracts = 0
+        self.relationships: Dict[str, List[str]] = {DOCUMENT_RELS: [], FOOTNOTES_RELS: []}
+        self.media: List[Tuple[Path, str, str]] = []  # part, name in part, name in output
+        self.content_types: Dict[str, str] = {}  # renamed media part name -> its content type
+        self.abstract_nums: List[str] = []
+        self.num_definitions: List[str] = []
+        self.footnote_elements: List[str] = []
+
+    def merge(self, parts: List[Path]) -> None:
+        tmp_output = self.output.with_name(f".{self.output.name}.tmp")
+        with zipfile.ZipFile(tmp_output, 'w', zipfile.ZIP_DEFLATED) as out, zipfile.ZipFile(parts[0]) as base:
+            with out.open(DOCUMENT, 'w') as raw:
+                writer = io.TextIOWrapper(raw, encoding='utf-8')
+                closing = ''
+                section = ''
+                for number, part in enumerate(parts):
+                    with zipfile.ZipFile(part) as source:
+                        document = source.read(DOCUMENT).decode('utf-8')
+                        head, _, rest = document.partition('<w:body>')
+                        body, _, tail = rest.rpartition('</w:body>')
+                        sect_pr = _SECT_PR.search(body)
+                        if sect_pr:
+                            body = body[:sect_pr.start()]
+                        if number == 0:
+                            writer.write(head + '<w:body>')
+                            section = sect_pr.group(0) if sect_pr else ''
+                            closing = '</w:body>' + tail
+                        else:
+                            writer.write(PAGE_BREAK)
+                        writer.write(self._renumber(number, part, source, body))
+                        del document, head, rest, body
+                writer.write(section + closing)
+                writer.flush()
+                writer.detach()
+
+            for part, name, target in self.media:
+                with zipfile.ZipFile(part) as source, source.open(name) as data, out.open(target, 'w') as copy:
+                    shutil.copyfileobj(data, copy)
+
+            rewritten = {DOCUMENT}
+            for name, xml in self._merged_parts(base).items():
+                out.writestr(name, xml)
+                rewritten.add(name)
+            for item in base.infolist():
+                if item.filename not in rewritten:
+                    with base.open(item) as data, out.open(item.filename, 'w') as copy:
+                        shutil.copyfileobj(data, copy)
+        tmp_output.replace(self.output)
+
+    def _renumber(self, number: int, part: Path, source: zipfile.ZipFile, body: str) -> str:
+        """Make the ids of one part's body unique in the merged document."""
+        names = set(source.namelist())
+        body, largest = _shift(_BOOKMARK_ID, body, self.bookmarks + 1 if number else 0)
+        self.bookmarks = max(self.bookmarks, largest)
+        body, largest = _shift(_DRAWING_ID, body, self.drawings if number else 0)
+        self.drawings = max(self.drawings, largest)
+
+        num_offset, abstract_offset = (self.nums, self.abstracts + 1) if number else (0, 0)
+        if NUMBERING in names:
+            numbering = source.read(NUMBERING).decode('utf-8')
+            for element in _ABSTRACT_NUM.findall(numbering):
+                element, largest = _shift(_ABSTRACT_ID, element, abstract_offset)
+                self.abstracts = max(self.abstracts, largest)
+                self.abstract_nums.append(element)
+            for element in _NUM.findall(numbering):
+                element, largest = _shift(_NUM_DEFINITION_ID, element, num_offset)
+                element, _ = _shift(_ABSTRACT_REFERENCE, element, abstract_offset)
+                self.nums = max(self.nums, largest)
+                self.num_definitions.append(element)
+        body, _ = _shift(_NUM_ID, body, num_offset)
+
+        footnote_offset = self.footnotes if number else 0
+        body, _ = _shift(_FOOTNOTE_ID, body, footnote_offset)
+        if FOOTNOTES in names:
+            for element in _FOOTNOTE.findall(source.read(FOOTNOTES).decode('utf-8')):
+                element, largest = _shift(_FOOTNOTE_ID, element, footnote_offset)
+                self.footnotes = max(self.footnotes, largest)
+                if number:
+                    element = self._relink(number, part, source, FOOTNOTES_RELS, element)
+                self.footnote_elements.append(element)
+        if number:
+            body = self._relink(number, part, source, DOCUMENT_RELS, body)
+        return body
+
+    def _relink(self, number: int, part: Path, source: zipfile.ZipFile, rels_name: str, xml: str) -> str:
+        """Copy the relationships ``xml`` uses from a later part under prefixed ids."""
+        if rels_name not in source.namelist():
+            return xml
+        relationships = {}
+        for element in _RELATIONSHIP.findall(source.read(rels_name).decode('utf-8')):
+            attributes = dict(_ATTRIBUTE.findall(element))
+            relationships[attributes.get('Id')] = attributes
+        prefix = f"p{number}_"
+        copied = set()
+        types = None
+
+        def replace(match):
+            nonlocal types
+            attributes = relationships.get(match.group(2))
+            if attributes is None:
+                return match.group(0)
+            new_id = prefix + attributes['Id']
+            if new_id not in copied:
+                copied.add(new_id)
+                target = attributes['Target']
+                if attributes.get('TargetMode') != 'External' and target.startswith('media/'):
+                    new_target = f"media/{prefix}{Path(target).name}"
+                    self.media.append((part, f"word/{target}", f"word/{new_target}"))
+                    if types is None:
+                        types = _content_types(source)
+                    self.content_types[f"/word/{new_target}"] = _part_type(types, f"/word/{target}")
+                    target = new_target
+                mode = f' TargetMode="{attributes["TargetMode"]}"' if 'TargetMode' in attributes else ''
+                self.relationships[rels_name].append(
+                    f'<Relationship Id="{new_id}" Type="{attributes["Type"]}" Target="{target}"{mode}/>')
+            return f'{match.group(1)}="{new_id}"'
+
+        return _REL_REFERENCE.sub(replace, xml)
+
+    def _merged_parts(self, base: zipfile.ZipFile) -> Dict[str, str]:
+        """The small XML parts rebuilt from the first part plus what later parts added."""
+        names = set(base.namelist())
+        merged = {}
+        for rels_name, added in self.relationships.items():
+            if added and rels_name in names:
+                rels = base.read(rels_name).decode('utf-8')
+                merged[rels_name] = rels.replace('</Relationships>', ''.join(added) + '</Relationships>')
+        if NUMBERING in names and (self.abstract_nums or self.num_definitions):
+            numbering = base.read(NUMBERING).decode('utf-8')
+            first = min((match.start() for match in (_ABSTRACT_NUM.search(numbering), _NUM.search(numbering))
+                         if match), default=numbering.rindex('</w:numbering>'))
+            merged[NUMBERING] = (numbering[:first] + ''.join(self.abstract_nums) + ''.join(self.num_definitions)
+                                 + '</w:numbering>')
+        if FOOTNOTES in names and self.footnote_elements:
+            footnotes = _FOOTNOTE.sub('', base.read(FOOTNOTES).decode('utf-8'))
+            merged[FOOTNOTES] = footnotes.replace('</w:footnotes>', ''.join(self.footnote_elements) + '</w:footnotes>')
+        # Pandoc lists media as <Override> entries per part name, so every renamed part needs its own
+        added = ''.join(f'<Override PartName="{name}" ContentType="{content_type}"/>'
+                        for name, content_type in self.content_types.items())
+        content_types = base.read(CONTENT_TYPES).decode('utf-8')
+        merged[CONTENT_TYPES] = content_types.replace('</Types>', added + '</Types>')
+        return merged
+
+
+def merge_docx(parts: List[Path], output: Path) -> None:
+    """Concatenate DOCX files into ``output`` (a single part is copied)."""
+    if len(parts) == 1:
+        shutil.copyfile(parts[0], output)
+        return
+    DocxMerger(output).merge(parts)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Bounded-memory export helpers")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help="Concatenate DOCX files")
+    merge.add_argument('parts', nargs='+', type=Path, help="DOCX files in document order")
+    merge.add_argument('-o', '--output', type=Path, required=True, help="Merged DOCX")
+    plan = subparsers.add_parser('plan', help="Show how the chapters would be split")
+    plan.add_argument('--memory-budget', type=int, required=True, metavar='MB')
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    if args.command == 'merge':
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        merge_docx(args.parts, args.output)
+        logger.info(f"✓ Merged {len(args.parts)} part(s) into {args.output}")
+        return 0
+
+    from convert_docs_to_docx_by_chapter import MkDocsToDocxByChapterConverter
+
+    budget = MemoryBudget(args.memory_budget)
+    logger.info(f"pandoc heap {budget.pandoc_heap_mb} MB, parts of at most {budget.part_bytes / 1024:.0f} KB markdown")
+    converter = MkDocsToDocxByChapterConverter(Path(__file__).resolve().parent.parent)
+    for chapter, files in converter.plan_chapters().items():
+        parts = split_parts(files, budget.part_bytes)
+        sizes = ', '.join(f"{sum(f.stat().st_size for f in part) / 1024:.0f} KB" for part in parts)
+        logger.info(f"{chapter}: {len(files)} page(s) in {len(parts)} part(s) ({sizes})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
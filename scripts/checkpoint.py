@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Per-stage checkpoints for long export runs.
+
+Each chapter gets its own directory in the work directory holding the
+artifact of every completed stage (combined markdown, rendered images and
+markdown, DOCX) plus a state.json recording, for each stage, the key of the
+inputs it was built from. A resumed run skips every stage whose key still
+matches and whose artifact still exists.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Export stages, in execution order
+STAGES = ('combined', 'images', 'docx')
+
+
+def content_key(*parts: Union[str, bytes]) -> str:
+    """Hash the given inputs into a checkpoint key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def files_key(files: Iterable[Path]) -> str:
+    """Checkpoint key for a list of source files (paths and contents).
+
+    Same key as ``content_key`` over the paths and contents, hashed one file
+    at a time so large chapters are never held in memory as a whole.
+    """
+    digest = hashlib.sha256()
+    for file_path in files:
+        digest.update(str(file_path).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(file_path.read_bytes() if file_path.exists() else b'')
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """Stores stage artifacts and their input keys per chapter."""
+
+    def __init__(self, work_dir: Path):
+        self.work_dir = work_dir  # created with the first chapter directory
+
+    def chapter_dir(self, chapter: str) -> Path:
+        path = self.work_dir / chapter
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _state_file(self, chapter: str) -> Path:
+        return self.chapter_dir(chapter) / 'state.json'
+
+    def load_state(self, chapter: str) -> Dict[str, Dict[str, str]]:
+        """Load the recorded stages of a chapter."""
+        state_file = self._state_file(chapter)
+        if not state_file.exists():
+            return {}
+        try:
+            return json.loads(state_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {state_file}: {e}")
+            return {}
+
+    def _save_state(self, chapter: str, state: Dict[str, Dict[str, str]]) -> None:
+        state_file = self._state_file(chapter)
+        tmp_file = state_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        tmp_file.replace(state_file)
+
+    def artifact(self, chapter: str, stage: str) -> Optional[Path]:
+        """Path of a completed stage artifact, if any."""
+        entry = self.load_state(chapter).get(stage)
+        return Path(entry['artifact']) if entry else None
+
+    def is_complete(self, chapter: str, stage: str, key: str) -> bool:
+        """True if the stage was completed from the same inputs."""
+        entry = self.load_state(chapter).get(stage)
+        return bool(entry) and entry.get('key') == key and Path(entry['artifact']).exists()
+
+    def mark_complete(self, chapter: str, stage: str, key: str, artifact: Path) -> None:
+        """Record a completed stage and invalidate the stages after it."""
+        state = self.load_state(chapter)
+        for later_stage in STAGES[STAGES.index(stage) + 1:]:
+            state.pop(later_stage, None)
+        state[stage] = {'key': key, 'artifact': str(artifact)}
+        self._save_state(chapter, state)
+
+    def reset(self, chapter: str) -> None:
+        """Drop all checkpoints and artifacts of a chapter."""
+        path = self.work_dir / chapter
+        if path.exists():
+            shutil.rmtree(path)
@@ -3,10 +3,16 @@
 Convert MkDocs documentation to a comprehensive DOCX file using Pandoc
 """
 
+import argparse
+import asyncio
+import io
+import logging
 import os
+import shutil
 import sys
 import tempfile
 import subprocess
+import time
 from pathlib import Path
 import yaml
 from yaml import SafeLoader
@@ -16,6 +22,28 @@ import base64
 import json
 import requests
 import urllib.parse
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+from artifact_store import artifact_key, get_artifact_store, open_artifact_store
+from async_exec import ToolExecutor, gather_tasks
+from asset_index import get_asset_index, open_asset_index
+from diagram_report import (DEFAULT_SCALE, add_diagram_budget_arguments, configure_diagram_report,
+                            get_diagram_report, image_filename)
+from export_events import add_event_arguments, configure_events, emit
+from link_index import build_link_index, docs_pages
+from near_duplicates import dedupe_pages
+from nav_select import filter_nav, parse_selectors, select_nav_paths
+from draft_docx import write_draft_docx
+from mermaid_container import get_mermaid_container
+from profiling import add_profile_argument, configure_profiling, profile_stage
+from pandoc_server import add_backend_argument, convert_with_server, get_pandoc_server
+from render_scheduler import get_render_scheduler
+from reproducible import build_date, normalize_ooxml, pandoc_env, reproducible_requested, source_date_epoch
+
+# Timeout for a single pandoc conversion (seconds)
+PANDOC_TIMEOUT = 300
+PANDOC_FROM = 'markdown+fenced_code_blocks+fenced_code_attributes+backtick_code_blocks'
 
 # Custom YAML loader to handle MkDocs-specific Python tags
 class MkDocsYamlLoader(SafeLoader):
@@ -37,68 +65,83 @@ MkDocsYamlLoader.add_constructor('tag:yaml.org,2002:python/name:pymdownx.superfe
 # Add generic constructor for any python/name tags
 MkDocsYamlLoader.add_multi_constructor('tag:yaml.org,2002:python/name:', python_name_constructor)
 
-def check_mermaid_cli_availability():
-    """Check if mermaid-cli is available via different methods"""
+# Cached list of available mermaid-cli methods (detected once per process)
+_MERMAID_METHODS = None
+
+async def detect_mermaid_methods(executor):
+    """Detect which mermaid-cli methods are available (Docker, npx, mmdc)"""
+    global _MERMAID_METHODS
+    if _MERMAID_METHODS is not None:
+        return _MERMAID_METHODS
+    
     methods = []
     
-    # Check Docker
-    try:
-        result = subprocess.run(['docker', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            # Check if docker daemon is running
-            result = subprocess.run(['docker', 'info'], capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                methods.append('docker')
-    except:
-        pass
+    # Check Docker (and that the daemon is running)
+    if shutil.which('docker'):
+        result = await executor.run(['docker', 'info'], timeout=10)
+        if result.ok:
+            methods.append('docker')
     
     # Check npx
-    try:
-        result = subprocess.run(['npx', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            methods.append('npx')
-    except:
-        pass
+    if shutil.which('npx'):
+        methods.append('npx')
     
     # Check locally installed mmdc
-    try:
-        result = subprocess.run(['mmdc', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            methods.append('mmdc')
-    except:
-        pass
+    if shutil.which('mmdc'):
+        methods.append('mmdc')
     
+    _MERMAID_METHODS = methods
     return methods
 
-def render_mermaid_to_png(mermaid_code, output_path):
-    """Render Mermaid diagram to PNG using available mermaid-cli method"""
-    available_methods = check_mermaid_cli_availability()
+def check_mermaid_cli_availability():
+    """Check if mermaid-cli is available via different methods"""
+    return asyncio.run(detect_mermaid_methods(ToolExecutor()))
+
+async def render_mermaid_to_png(mermaid_code, output_path, executor, scale=DEFAULT_SCALE):
+    """Render Mermaid diagram to PNG (at the given scale) using available mermaid-cli method
+    
+    Returns the name of the method that rendered the diagram, or None.
+    """
+    available_methods = await detect_mermaid_methods(executor)
     
     if not available_methods:
         print(f"    ⚠️ No mermaid-cli method available. Install Docker, Node.js/npm, or run: npm install -g @mermaid-js/mermaid-cli")
-        return False
+        return None
     
     # Try each available method
     for method in available_methods:
         try:
             if method == 'docker':
-                return _render_with_docker(mermaid_code, output_path)
+                rendered = await _render_with_docker(mermaid_code, output_path, executor, scale)
             elif method == 'npx':
-                return _render_with_npx(mermaid_code, output_path)
+                rendered = await _render_with_npx(mermaid_code, output_path, executor, scale)
             elif method == 'mmdc':
-                return _render_with_mmdc(mermaid_code, output_path)
+                rendered = await _render_with_mmdc(mermaid_code, output_path, executor, scale)
+            else:
+                continue
+            return method if rendered else None
         except Exception as e:
             print(f"    ⚠️ Failed to render with {method}: {e}")
             continue
     
-    return False
+    return None
 
-def _render_with_docker(mermaid_code, output_path):
-    """Render using Docker mermaid-cli"""
-    # Create temporary mermaid file
+def _write_temp_mermaid(mermaid_code):
+    """Write mermaid code to a temporary .mmd file and return its path"""
     with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False, encoding='utf-8') as temp_mmd:
         temp_mmd.write(mermaid_code)
-        temp_mmd_path = temp_mmd.name
+        return temp_mmd.name
+
+async def _render_with_docker(mermaid_code, output_path, executor, scale=DEFAULT_SCALE):
+    """Render using the session's mermaid-cli container, or one docker run per diagram"""
+    container = await get_mermaid_container(executor)
+    if container:
+        return await container.render(mermaid_code, output_path, executor, scale)
+    return await _render_with_docker_run(mermaid_code, output_path, executor, scale)
+
+async def _render_with_docker_run(mermaid_code, output_path, executor, scale=DEFAULT_SCALE):
+    """Render using a one-off Docker mermaid-cli container"""
+    temp_mmd_path = _write_temp_mermaid(mermaid_code)
     
     try:
         # Get directory paths for Docker volume mounting
@@ -115,25 +158,19 @@ def _render_with_docker(mermaid_code, output_path):
             '-i', f"/data/{temp_filename}",
             '-o', f"/data/{output_filename}",
             '-b', 'white',  # white background
-            '--scale', '2'  # higher resolution
+            '--scale', f"{scale:g}"  # higher resolution, lowered for oversized diagrams
         ]
         
-        # Run docker command
-        result = subprocess.run(docker_cmd, capture_output=True, text=True, timeout=60)
+        # Run docker command (stderr is streamed to the logger)
+        result = await executor.run(docker_cmd, timeout=60)
         
         # Check if file was created in temp directory
         temp_output_path = os.path.join(temp_dir, output_filename)
         
-        # Debug: Print command output
-        if result.stdout.strip():
-            print(f"    📝 Docker stdout: {result.stdout.strip()}")
-        if result.stderr.strip():
-            print(f"    ⚠️ Docker stderr: {result.stderr.strip()}")
-        
-        if result.returncode == 0:
+        if result.ok:
             if os.path.exists(temp_output_path):
                 # Move the generated file to the desired location
-                os.rename(temp_output_path, output_path)
+                shutil.move(temp_output_path, output_path)
                 return True
             else:
                 # File not created - this indicates a rendering failure
@@ -148,12 +185,9 @@ def _render_with_docker(mermaid_code, output_path):
         if os.path.exists(temp_mmd_path):
             os.unlink(temp_mmd_path)
 
-def _render_with_npx(mermaid_code, output_path):
+async def _render_with_npx(mermaid_code, output_path, executor, scale=DEFAULT_SCALE):
     """Render using npx @mermaid-js/mermaid-cli"""
-    # Create temporary mermaid file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False, encoding='utf-8') as temp_mmd:
-        temp_mmd.write(mermaid_code)
-        temp_mmd_path = temp_mmd.name
+    temp_mmd_path = _write_temp_mermaid(mermaid_code)
     
     try:
         # npx command to run mermaid-cli
@@ -162,13 +196,12 @@ def _render_with_npx(mermaid_code, output_path):
             '-i', temp_mmd_path,
             '-o', output_path,
             '-b', 'white',
-            '--scale', '2'
+            '--scale', f"{scale:g}"
         ]
         
-        # Run npx command
-        result = subprocess.run(npx_cmd, capture_output=True, text=True, timeout=60)
+        result = await executor.run(npx_cmd, timeout=60)
         
-        if result.returncode == 0 and os.path.exists(output_path):
+        if result.ok and os.path.exists(output_path):
             return True
         else:
             print(f"    ⚠️ npx command failed: {result.stderr}")
@@ -177,12 +210,9 @@ def _render_with_npx(mermaid_code, output_path):
         if os.path.exists(temp_mmd_path):
             os.unlink(temp_mmd_path)
 
-def _render_with_mmdc(mermaid_code, output_path):
+async def _render_with_mmdc(mermaid_code, output_path, executor, scale=DEFAULT_SCALE):
     """Render using locally installed mmdc"""
-    # Create temporary mermaid file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False, encoding='utf-8') as temp_mmd:
-        temp_mmd.write(mermaid_code)
-        temp_mmd_path = temp_mmd.name
+    temp_mmd_path = _write_temp_mermaid(mermaid_code)
     
     try:
         # mmdc command
@@ -191,13 +221,12 @@ def _render_with_mmdc(mermaid_code, output_path):
             '-i', temp_mmd_path,
             '-o', output_path,
             '-b', 'white',
-            '--scale', '2'
+            '--scale', f"{scale:g}"
         ]
         
-        # Run mmdc command
-        result = subprocess.run(mmdc_cmd, capture_output=True, text=True, timeout=60)
+        result = await executor.run(mmdc_cmd, timeout=60)
         
-        if result.returncode == 0 and os.path.exists(output_path):
+        if result.ok and os.path.exists(output_path):
             return True
         else:
             print(f"    ⚠️ mmdc command failed: {result.stderr}")
@@ -211,83 +240,169 @@ def load_mkdocs_config():
     with open('mkdocs.yml', 'r') as f:
         return yaml.load(f, Loader=MkDocsYamlLoader)
 
-def process_mermaid_diagrams(content, images_dir):
-    """Process Mermaid diagrams in markdown content and render to images"""
-    # Pattern to match mermaid code blocks
-    mermaid_pattern = r'```mermaid\n(.*?)\n```'
-    
-    # Fix: Remove trailing % character and other problematic characters causing syntax errors
-    def clean_mermaid_code(code):
-        # Remove trailing % and excessive whitespace, but preserve necessary whitespace
-        cleaned = code.rstrip('% \t\n\r')
-        return cleaned.strip()
-    
-    # Count diagrams processed
-    diagram_count = 0
-    successful_renders = 0
-    
-    def replace_mermaid(match):
-        nonlocal diagram_count, successful_renders
-        diagram_count += 1
-        raw_mermaid_code = match.group(1)
-        mermaid_code = clean_mermaid_code(raw_mermaid_code)
-        
-        # Create a unique filename for this diagram based on cleaned code
-        diagram_hash = hashlib.md5(mermaid_code.encode('utf-8')).hexdigest()[:8]
-        image_filename = f"mermaid_diagram_{diagram_count}_{diagram_hash}.png"
-        image_path = os.path.join(images_dir, image_filename)
-        
-        # Analyze the mermaid code to provide a description
-        if 'graph ' in mermaid_code or 'flowchart ' in mermaid_code:
-            diagram_type = "Flowchart/Graph Diagram"
-        elif 'sequenceDiagram' in mermaid_code:
-            diagram_type = "Sequence Diagram"
-        elif 'gantt' in mermaid_code:
-            diagram_type = "Gantt Chart"
-        elif 'pie' in mermaid_code:
-            diagram_type = "Pie Chart"
-        elif 'classDiagram' in mermaid_code:
-            diagram_type = "Class Diagram"
-        elif 'erDiagram' in mermaid_code:
-            diagram_type = "Entity Relationship Diagram"
-        elif 'journey' in mermaid_code:
-            diagram_type = "User Journey Diagram"
-        else:
-            diagram_type = "Diagram"
+# Pattern to match mermaid code blocks
+MERMAID_PATTERN = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+
+@dataclass
+class MermaidBlock:
+    """A mermaid code block found in a markdown page"""
+    index: int          # 1-based position of the block in the page
+    code: str           # cleaned mermaid source
+    digest: str         # short content hash of the cleaned source
+    diagram_type: str   # human readable diagram type
+    start: int          # offsets of the whole fenced block in the page
+    end: int
+    line: int           # 1-based line number of the opening fence
+
+def clean_mermaid_code(code):
+    """Remove trailing % and excessive whitespace, but preserve necessary whitespace"""
+    # Fix: trailing % characters and similar cause mermaid syntax errors
+    cleaned = code.rstrip('% \t\n\r')
+    return cleaned.strip()
+
+def describe_mermaid_diagram(mermaid_code):
+    """Analyze the mermaid code to provide a description"""
+    if 'graph ' in mermaid_code or 'flowchart ' in mermaid_code:
+        return "Flowchart/Graph Diagram"
+    elif 'sequenceDiagram' in mermaid_code:
+        return "Sequence Diagram"
+    elif 'gantt' in mermaid_code:
+        return "Gantt Chart"
+    elif 'pie' in mermaid_code:
+        return "Pie Chart"
+    elif 'classDiagram' in mermaid_code:
+        return "Class Diagram"
+    elif 'erDiagram' in mermaid_code:
+        return "Entity Relationship Diagram"
+    elif 'journey' in mermaid_code:
+        return "User Journey Diagram"
+    return "Diagram"
+
+def extract_mermaid_blocks(content):
+    """Find all mermaid code blocks in markdown content (no rendering)"""
+    blocks = []
+    for match in MERMAID_PATTERN.finditer(content):
+        mermaid_code = clean_mermaid_code(match.group(1))
+        blocks.append(MermaidBlock(
+            index=len(blocks) + 1,
+            code=mermaid_code,
+            digest=hashlib.md5(mermaid_code.encode('utf-8')).hexdigest()[:8],
+            diagram_type=describe_mermaid_diagram(mermaid_code),
+            start=match.start(),
+            end=match.end(),
+            line=content.count('\n', 0, match.start()) + 1,
+        ))
+    return blocks
+
+def diagram_store_key(mermaid_code, scale=DEFAULT_SCALE):
+    """Artifact store key of a diagram's PNG (source and render settings)"""
+    return artifact_key('mermaid-png', mermaid_code, 'background=white', f"scale={scale:g}")
+
+async def render_mermaid_block(block, images_dir, executor, source=None):
+    """Render one mermaid block and return its markdown replacement"""
+    # Complexity analysis; oversized diagrams are rendered at a lower scale
+    report = get_diagram_report()
+    metrics = report.plan(block, source)
+    
+    # Images are named by content hash (and lowered scale) so they can be reused across runs
+    filename = image_filename(block.digest, metrics.scale)
+    image_path = os.path.join(images_dir, filename)
+    image_reference = f"\n**{block.diagram_type}**\n\n![{block.diagram_type}]({image_path})\n\n"
+    
+    if os.path.exists(image_path):
+        print(f"    ♻️ Reusing rendered {block.diagram_type}: {filename}")
+        emit('diagram_cache_hit', source=source, digest=block.digest, image=image_path)
+        get_asset_index().add_diagram_artifact(block.digest, image_path)
+        report.measure(metrics, image_path)
+        return True, image_reference
+    
+    # Concurrent jobs on this runner share renders through the artifact store
+    store = get_artifact_store()
+    store_key = diagram_store_key(block.code, metrics.scale)
+    async with store.producing_async('diagram', store_key):
+        if store.fetch('diagram', store_key, Path(image_path)):
+            print(f"    ♻️ Reusing {block.diagram_type} from the shared artifact store: {filename}")
+            emit('diagram_cache_hit', source=source, digest=block.digest, image=image_path)
+            get_asset_index().add_diagram_artifact(block.digest, image_path)
+            report.measure(metrics, image_path)
+            return True, image_reference
         
         # Try to render the diagram to PNG
-        print(f"    🎨 Rendering {diagram_type}...")
+        print(f"    🎨 Rendering {block.diagram_type}...")
         
-        # Debug: print the first few lines of mermaid code
-        code_lines = mermaid_code.strip().split('\n')
+        # Debug: print the first line of mermaid code
+        code_lines = block.code.strip().split('\n')
         print(f"    🔍 Code preview: {code_lines[0] if code_lines else 'empty'}...")
         
-        if render_mermaid_to_png(mermaid_code, image_path):
-            successful_renders += 1
-            # Create markdown image reference
-            replacement = f"\n**{diagram_type}**\n\n![{diagram_type}]({image_path})\n\n"
-        else:
-            # Save failed diagram to debug file
-            debug_filename = f"failed_mermaid_{diagram_count}_{diagram_hash}.mmd"
-            debug_path = os.path.join(images_dir, debug_filename)
-            with open(debug_path, 'w', encoding='utf-8') as debug_file:
-                debug_file.write(mermaid_code)
-            print(f"    💾 Saved failing diagram to: {debug_path}")
-            
-            # Fallback to text description if rendering fails
-            replacement = f"\n**[Mermaid {diagram_type} - Rendering Failed]**\n\n"
-            replacement += f"```\n{mermaid_code}\n```\n"
-            replacement += "\n*Note: Diagram rendering failed, showing code instead.*\n\n"
-        
-        return replacement
+        # Longest expected renders get the first slots
+        scheduler = await get_render_scheduler(executor)
+        async with scheduler.turn(scheduler.history.expected_duration(block.digest, block.code)):
+            started = time.monotonic()
+            backend = await render_mermaid_to_png(block.code, image_path, executor, metrics.scale)
+            duration = time.monotonic() - started
+        if backend:
+            store.put('diagram', store_key, Path(image_path), backend=backend)
+    emit('diagram_rendered', source=source, digest=block.digest, diagram_type=block.diagram_type,
+         backend=backend, duration=round(duration, 3), ok=backend is not None)
+    if backend:
+        get_asset_index().add_diagram_artifact(block.digest, image_path)
+        get_asset_index().record_render(block.digest, duration, metrics.nodes, metrics.edges, backend=backend)
+        report.measure(metrics, image_path, duration)
+        return True, image_reference
+    
+    # Save failed diagram to debug file
+    debug_filename = f"failed_mermaid_{block.index}_{block.digest}.mmd"
+    debug_path = os.path.join(images_dir, debug_filename)
+    with open(debug_path, 'w', encoding='utf-8') as debug_file:
+        debug_file.write(block.code)
+    print(f"    💾 Saved failing diagram to: {debug_path}")
+    
+    # Fallback to text description if rendering fails
+    replacement = f"\n**[Mermaid {block.diagram_type} - Rendering Failed]**\n\n"
+    replacement += f"```\n{block.code}\n```\n"
+    replacement += "\n*Note: Diagram rendering failed, showing code instead.*\n\n"
+    return False, replacement
+
+def substitute_mermaid_blocks(content, blocks, replacements):
+    """Replace each mermaid block in content with its rendered replacement"""
+    parts = []
+    position = 0
+    for block, replacement in zip(blocks, replacements):
+        parts.append(content[position:block.start])
+        parts.append(replacement)
+        position = block.end
+    parts.append(content[position:])
+    return ''.join(parts)
+
+async def render_mermaid_page(content, images_dir, executor, source=None, blocks=None):
+    """Render all Mermaid diagrams of a page concurrently.
     
-    # Replace all mermaid blocks
-    processed_content = re.sub(mermaid_pattern, replace_mermaid, content, flags=re.DOTALL)
+    Returns (processed_content, diagram_count, rendered_count).
+    """
+    if blocks is None:
+        blocks = extract_mermaid_blocks(content)
+    if not blocks:
+        return content, 0, 0
     
-    if diagram_count > 0:
-        print(f"  → Processed {diagram_count} Mermaid diagram(s) ({successful_renders} rendered successfully)")
+    results = await gather_tasks(*(render_mermaid_block(block, images_dir, executor, source) for block in blocks))
+    successful_renders = sum(1 for rendered, _ in results if rendered)
+    print(f"  → Processed {len(blocks)} Mermaid diagram(s) ({successful_renders} rendered successfully)")
     
-    return processed_content
+    processed = substitute_mermaid_blocks(content, blocks, [replacement for _, replacement in results])
+    return processed, len(blocks), successful_renders
+
+async def process_mermaid_diagrams_async(content, images_dir, executor, source=None):
+    """Render all Mermaid diagrams of a page concurrently and inline the images"""
+    blocks = extract_mermaid_blocks(content)
+    if source:
+        # Record the page's diagrams in the asset index during the extraction pass
+        get_asset_index().record_source(source, content, blocks)
+    processed, _, _ = await render_mermaid_page(content, images_dir, executor, source, blocks)
+    return processed
+
+def process_mermaid_diagrams(content, images_dir):
+    """Process Mermaid diagrams in markdown content and render to images"""
+    return asyncio.run(process_mermaid_diagrams_async(content, images_dir, ToolExecutor()))
 
 def extract_nav_files(nav_section, prefix=""):
     """Recursively extract markdown files from navigation structure"""
@@ -311,10 +426,55 @@ def extract_nav_files(nav_section, prefix=""):
     
     return files
 
-def create_combined_markdown(files, output_path, images_dir):
-    """Combine all markdown files into one document"""
+async def _preprocess_file(title, file_path, images_dir, executor):
+    """Read one nav file and render its diagrams; returns (content, error)"""
+    print(f"Processing: {title} -> {file_path}")
+    emit('file_started', file=file_path, title=title)
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return await process_mermaid_diagrams_async(content, images_dir, executor, file_path), None
+    except Exception as e:
+        # The page's other renders were cancelled; cancellation itself (not an Exception) propagates
+        print(f"Error processing {file_path}: {e}")
+        return None, e
+
+def index_links(files):
+    """Index the page and heading anchors of all nav files in one pass"""
+    pages = []
+    for _, file_path in files:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                pages.append((os.path.relpath(file_path, 'docs'), f.read()))
+        except OSError:
+            continue
+    index = build_link_index(pages, docs_pages(Path('docs')))
+    for link in index.check():
+        print(f"Warning: dangling link in docs/{link.source}:{link.line} ({link.reason}): {link.target}")
+    return index
+
+async def combine_markdown_async(files, images_dir, executor, dedupe=False):
+    """Combine all markdown files into one document string, rendering diagrams of all files concurrently"""
+    processed = await gather_tasks(
+        *(_preprocess_file(title, file_path, images_dir, executor) for title, file_path in files)
+    )
     
-    with open(output_path, 'w', encoding='utf-8') as combined:
+    # Give headings explicit ids and point inter-page links at them
+    link_index = index_links(files)
+    processed = [(link_index.rewrite(os.path.relpath(file_path, 'docs'), content), None) if error is None
+                 else (content, error) for (_, file_path), (content, error) in zip(files, processed)]
+    anchors = [link_index.page_id(os.path.relpath(file_path, 'docs')) for _, file_path in files]
+    
+    if dedupe:
+        # Replace paragraphs repeating an earlier section by a cross-reference
+        loaded = [(i, (title, anchors[i], content))
+                  for i, ((title, _), (content, error)) in enumerate(zip(files, processed)) if error is None]
+        contents, replaced = dedupe_pages([page for _, page in loaded])
+        for (i, _), content in zip(loaded, contents):
+            processed[i] = (content, None)
+        print(f"♻️ Replaced {replaced} near-duplicate paragraph(s) by cross-references")
+    
+    with io.StringIO() as combined:
         # Write title page
         combined.write("# RH OVE Multi-Cluster Ecosystem\n\n")
         combined.write("## Complete Documentation Export\n\n")
@@ -323,81 +483,227 @@ def create_combined_markdown(files, output_path, images_dir):
         
         # Write table of contents
         combined.write("# Table of Contents\n\n")
-        for title, _ in files:
-            # Create anchor-friendly title
-            anchor = title.lower().replace(' ', '-').replace('&', 'and')
+        for (title, _), anchor in zip(files, anchors):
             combined.write(f"- [{title}](#{anchor})\n")
         combined.write("\n---\n\n")
         
-        # Process each file
-        for title, file_path in files:
-            print(f"Processing: {title} -> {file_path}")
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Add section header
-                combined.write(f"\n\\newpage\n\n# {title}\n\n")
-                
-                # Process mermaid diagrams
-                content = process_mermaid_diagrams(content, images_dir)
-                
-                # Process content to adjust heading levels
-                lines = content.split('\n')
-                processed_lines = []
-                
-                for line in lines:
-                    # Adjust heading levels (add one # to make them sub-sections)
-                    if line.startswith('#'):
-                        line = '#' + line
-                    processed_lines.append(line)
-                
-                # Write processed content
-                combined.write('\n'.join(processed_lines))
-                combined.write('\n\n')
-                
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
+        # Write each file in navigation order
+        for (title, file_path), (content, error), anchor in zip(files, processed, anchors):
+            if error is not None:
                 combined.write(f"*Error loading content from {file_path}*\n\n")
+                continue
+            
+            # Add section header
+            combined.write(f"\n\\newpage\n\n# {title} {{#{anchor}}}\n\n")
+            
+            # Process content to adjust heading levels
+            lines = content.split('\n')
+            processed_lines = []
+            
+            for line in lines:
+                # Adjust heading levels (add one # to make them sub-sections)
+                if line.startswith('#'):
+                    line = '#' + line
+                processed_lines.append(line)
+            
+            # Write processed content
+            combined.write('\n'.join(processed_lines))
+            combined.write('\n\n')
+        
+        return combined.getvalue()
 
-def convert_to_docx(markdown_path, docx_path):
-    """Convert markdown to DOCX using Pandoc"""
+async def create_combined_markdown_async(files, output_path, images_dir, executor, dedupe=False):
+    """Combine all markdown files into one document file"""
+    markdown = await combine_markdown_async(files, images_dir, executor, dedupe)
+    with open(output_path, 'w', encoding='utf-8') as combined:
+        combined.write(markdown)
+
+@contextmanager
+def temporary_markdown(markdown):
+    """Path of a temporary file holding the markdown, for tools that read files"""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as temp_md:
+        temp_md.write(markdown)
+    try:
+        yield temp_md.name
+    finally:
+        os.unlink(temp_md.name)
+
+def create_combined_markdown(files, output_path, images_dir, dedupe=False):
+    """Combine all markdown files into one document"""
+    asyncio.run(create_combined_markdown_async(files, output_path, images_dir, ToolExecutor(), dedupe))
+
+async def convert_to_docx_async(markdown_path, docx_path, executor, epoch=None, pandoc_backend='auto',
+                                markdown=None):
+    """Convert markdown to DOCX using pandoc-server or Pandoc (byte-stable when an epoch is given)
+    
+    pandoc-server is sent ``markdown`` when given; the pandoc CLI reads ``markdown_path``.
+    """
+    
+    metadata = {
+        'title': 'RH OVE Multi-Cluster Ecosystem Documentation',
+        'author': 'Professional Team',
+        'date': build_date(epoch),
+    }
     
     # Pandoc command with comprehensive options
     cmd = [
         'pandoc',
         markdown_path,
         '-o', docx_path,
-        '--from', 'markdown+fenced_code_blocks+fenced_code_attributes+backtick_code_blocks',
+        '--from', PANDOC_FROM,
         '--to', 'docx',
         '--toc',
         '--toc-depth=3',
         '--number-sections',
         '--highlight-style', 'pygments',
-        '--metadata', 'title=RH OVE Multi-Cluster Ecosystem Documentation',
-        '--metadata', 'author=Professional Team',
-        '--metadata', 'date=' + subprocess.check_output(['date', '+%Y-%m-%d']).decode().strip(),
     ]
+    for key, value in metadata.items():
+        cmd.extend(['--metadata', f'{key}={value}'])
     
     # Add reference doc if it exists
     if os.path.exists('scripts/reference.docx'):
         cmd.extend(['--reference-doc', 'scripts/reference.docx'])
     
-    print(f"Running: {' '.join(cmd)}")
-    
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    emit('pandoc_started', document=docx_path)
+    server = get_pandoc_server(pandoc_backend)
+    if server:
+        print(f"Converting through pandoc-server ({server.url})")
+        if markdown is None:
+            with open(markdown_path, 'r', encoding='utf-8') as f:
+                markdown = f.read()
+        options = {'from': PANDOC_FROM, 'to': 'docx', 'table-of-contents': True, 'toc-depth': 3,
+                   'number-sections': True, 'highlight-style': 'pygments', 'metadata': metadata}
+        result = await convert_with_server(server, executor, markdown, docx_path, options,
+                                           Path('scripts/reference.docx'))
+    else:
+        print(f"Running: {' '.join(cmd)}")
+        result = await executor.run(cmd, timeout=PANDOC_TIMEOUT, env=pandoc_env(epoch))
+    emit('pandoc_finished', document=docx_path, duration=round(result.duration, 3),
+         returncode=result.returncode, ok=result.ok)
+    if result.ok:
         print("Conversion successful!")
+        if epoch is not None:
+            print(f"🔒 Normalized DOCX (sha256 {normalize_ooxml(Path(docx_path), epoch)[:12]})")
         if result.stderr:
             print(f"Warnings: {result.stderr}")
-    except subprocess.CalledProcessError as e:
-        print(f"Conversion failed: {e}")
-        print(f"Error output: {e.stderr}")
-        raise
+    else:
+        reason = f"timed out after {PANDOC_TIMEOUT}s" if result.timed_out else f"exit code {result.returncode}"
+        print(f"Conversion failed: {reason}")
+        print(f"Error output: {result.stderr}")
+        raise subprocess.CalledProcessError(result.returncode or 1, cmd, stderr=result.stderr)
+
+def convert_to_docx(markdown_path, docx_path):
+    """Convert markdown to DOCX using Pandoc"""
+    asyncio.run(convert_to_docx_async(markdown_path, docx_path, ToolExecutor()))
+
+async def convert_to_draft_docx_async(markdown_path, docx_path, epoch=None):
+    """Write a draft DOCX directly from the markdown, without pandoc"""
+    reference_doc = Path('scripts/reference.docx')
+    emit('pandoc_started', document=docx_path, backend='draft')
+    stats = await asyncio.to_thread(write_draft_docx, Path(markdown_path), Path(docx_path), reference_doc,
+                                    Path('.'), 'RH OVE Multi-Cluster Ecosystem Documentation')
+    emit('pandoc_finished', document=docx_path, duration=round(stats.duration, 3), returncode=0, ok=True)
+    print(f"Draft written in {stats.duration * 1000:.0f} ms ({stats.paragraphs} paragraphs, "
+          f"{stats.tables} tables, {stats.images} images)")
+    if epoch is not None:
+        print(f"🔒 Normalized DOCX (sha256 {normalize_ooxml(Path(docx_path), epoch)[:12]})")
+
+def document_store_key(markdown, images_dir, epoch, mode):
+    """Artifact store key of the DOCX built from the combined markdown"""
+    # Image directories differ between checkouts and runs; the image names are content hashes
+    return artifact_key('docx', mode, markdown.replace(str(images_dir), ''), build_date(epoch), str(epoch),
+                        Path('scripts/reference.docx'))
+
+async def convert_through_store(markdown, images_dir, docx_path, epoch, mode, convert):
+    """Fetch the DOCX from the shared artifact store, or run convert() and store its output"""
+    store = get_artifact_store()
+    store_key = document_store_key(markdown, images_dir, epoch, mode)
+    async with store.producing_async('docx', store_key):
+        if store.fetch('docx', store_key, Path(docx_path)):
+            print(f"♻️ Reusing DOCX from the shared artifact store ({store.root})")
+            return
+        await convert()
+        store.put('docx', store_key, Path(docx_path), mode=mode)
+
+async def export_docx_async(nav_files, images_dir, docx_path, dedupe=False, epoch=None,
+                            pandoc_backend='auto', draft=False):
+    """Run the whole export on one event loop: diagram renders, then pandoc (or the draft writer)"""
+    executor = ToolExecutor()
+    
+    if draft:
+        print("Combining markdown files...")
+        with profile_stage('combine'):
+            markdown = await combine_markdown_async(nav_files, images_dir, executor, dedupe)
+        print(f"Writing draft DOCX: {docx_path}")
+        with profile_stage('convert'), temporary_markdown(markdown) as markdown_path:
+            await convert_through_store(markdown, images_dir, docx_path, epoch, 'draft',
+                                        lambda: convert_to_draft_docx_async(markdown_path, docx_path, epoch))
+        return
+    
+    # pandoc-server starts in the background while diagrams render
+    server_started = asyncio.create_task(asyncio.to_thread(get_pandoc_server, pandoc_backend))
+    
+    # Combine all markdown files
+    print("Combining markdown files...")
+    print(f"Images will be saved to: {images_dir}")
+    with profile_stage('combine'):
+        markdown = await combine_markdown_async(nav_files, images_dir, executor, dedupe)
+        server = await server_started
+    
+    # Convert to DOCX; pandoc-server gets the markdown in memory, the pandoc CLI a temporary file
+    print(f"Converting to DOCX: {docx_path}")
+    with profile_stage('convert'), ExitStack() as stack:
+        markdown_path = None if server else stack.enter_context(temporary_markdown(markdown))
+        await convert_through_store(markdown, images_dir, docx_path, epoch, 'pandoc',
+                                    lambda: convert_to_docx_async(markdown_path, docx_path, executor, epoch,
+                                                                  pandoc_backend, markdown))
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Convert MkDocs documentation to a single DOCX file")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Export only matching pages: nav:<Section/Page>, glob:<docs path>, tag:<name> "
+                             "(repeatable or comma-separated); output goes to docs/export/selection/")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Replace near-duplicate paragraphs by a cross-reference to their first occurrence")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Byte-stable output dated from SOURCE_DATE_EPOCH or the last commit "
+                             "(implied when SOURCE_DATE_EPOCH is set)")
+    parser.add_argument('--draft', action='store_true',
+                        help="Fast review draft written without pandoc (no TOC or numbering) to docs/export/draft/")
+    add_backend_argument(parser)
+    add_diagram_budget_arguments(parser)
+    add_profile_argument(parser)
+    add_event_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 def main():
     """Main conversion process"""
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    configure_events(args.events, args.events_file)
+    configure_diagram_report(args)
+    configure_profiling(args.profile, 'convert_docs_to_docx', Path(__file__).resolve().parent.parent)
+    asset_index = open_asset_index(Path(__file__).resolve().parent.parent)
+    open_artifact_store()
+    emit('run_started', exporter='convert_docs_to_docx')
+    started = time.monotonic()
+    exit_code = 1
+    try:
+        exit_code = export(args)
+        return exit_code
+    finally:
+        asset_index.save()
+        emit('run_finished', exporter='convert_docs_to_docx', success=exit_code == 0,
+             duration=round(time.monotonic() - started, 3))
+
+def export(args):
+    """Export the (selected) navigation to a single DOCX file"""
     
     # Change to project root if we're in scripts directory
     if os.path.basename(os.getcwd()) == 'scripts':
@@ -414,39 +720,50 @@ def main():
     
     # Extract files from navigation
     print("Extracting files from navigation...")
-    nav_files = extract_nav_files(config.get('nav', []))
+    nav = config.get('nav', [])
+    output_path = 'docs/export/RH_OVE_Complete_Documentation.docx'
+    
+    if args.selectors:
+        # Only resolve (and later read) the selected pages
+        selected = select_nav_paths(nav, args.selectors, Path('docs'))
+        nav = filter_nav(nav, selected)
+        output_path = 'docs/export/selection/RH_OVE_Complete_Documentation.docx'
+        print(f"Selected {len(selected)} page(s) with: {', '.join(args.select)}")
+    
+    if args.draft:
+        output_path = os.path.join(os.path.dirname(output_path), 'draft', os.path.basename(output_path))
+    
+    nav_files = extract_nav_files(nav)
     
     print(f"Found {len(nav_files)} files to process")
+    if not nav_files:
+        print("Error: no files to export")
+        return 1
     
-    # Create temporary directories for images
-    temp_images_dir = tempfile.mkdtemp(prefix='mermaid_images_')
+    epoch = None
+    if reproducible_requested(args.reproducible):
+        # Fixed image directory: content-hash names are reused across runs
+        epoch = source_date_epoch(Path('.'))
+        temp_images_dir = os.path.join('.export-work', 'images')
+        os.makedirs(temp_images_dir, exist_ok=True)
+        print(f"Reproducible build dated {build_date(epoch)} (SOURCE_DATE_EPOCH={epoch})")
+    else:
+        # Create temporary directories for images
+        temp_images_dir = tempfile.mkdtemp(prefix='mermaid_images_')
     
-    # Create temporary combined markdown file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as temp_md:
-        temp_md_path = temp_md.name
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    try:
-        # Combine all markdown files
-        print("Combining markdown files...")
-        print(f"Images will be saved to: {temp_images_dir}")
-        create_combined_markdown(nav_files, temp_md_path, temp_images_dir)
-        
-        # Convert to DOCX
-        output_path = 'docs/export/RH_OVE_Complete_Documentation.docx'
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        print(f"Converting to DOCX: {output_path}")
-        convert_to_docx(temp_md_path, output_path)
-        
-        print(f"\n✅ Success! DOCX file created: {output_path}")
-        print(f"📄 File size: {os.path.getsize(output_path)} bytes")
-        
-        return 0
-        
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_md_path):
-            os.unlink(temp_md_path)
+    # Render diagrams, combine and convert on a single event loop
+    asyncio.run(export_docx_async(nav_files, temp_images_dir, output_path, args.dedupe, epoch,
+                                  args.pandoc_backend, args.draft))
+    
+    print(f"\n✅ Success! DOCX file created: {output_path}")
+    print(f"📄 File size: {os.path.getsize(output_path)} bytes")
+    emit('document_done', document=output_path, output=output_path, size_bytes=os.path.getsize(output_path))
+    get_asset_index().add_document(output_path, [file_path for _, file_path in nav_files])
+    
+    # Over-budget diagrams fail the export with --diagram-budget fail
+    return 0 if get_diagram_report().finish() else 1
 
 if __name__ == "__main__":
     exit(main())
@@ -3,7 +3,8 @@
 Convert MkDocs documentation to separate DOCX files by chapter using pandoc-mermaid-filter.
 
 This script creates individual DOCX files for each major chapter of the documentation,
-making it easier to distribute and work with specific sections.
+making it easier to distribute and work with specific sections. Every stage of a
+chapter is checkpointed so that an interrupted run can be resumed with --resume.
 
 Requirements:
 - pandoc
@@ -11,15 +12,34 @@ Requirements:
 - Python packages: PyYAML, pathlib
 """
 
+import argparse
+import asyncio
+import io
 import os
 import sys
 import yaml
-import subprocess
 import shutil
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Optional, TextIO, Tuple
 import tempfile
+import time
 import logging
+
+from artifact_store import artifact_key, get_artifact_store, open_artifact_store
+from async_exec import ToolExecutor, gather_tasks
+from asset_index import get_asset_index, open_asset_index
+from bounded_export import (BOUNDED_TOOL_LIMITS, MemoryBudget, add_memory_budget_argument, merge_docx,
+                            report_peak_rss, split_parts)
+from checkpoint import CheckpointStore, content_key, files_key
+from convert_docs_to_docx import detect_mermaid_methods, extract_mermaid_blocks, render_mermaid_page
+from diagram_report import add_diagram_budget_arguments, configure_diagram_report, get_diagram_report
+from export_events import add_event_arguments, configure_events, emit
+from link_index import LinkIndex, build_link_index, docs_pages
+from nav_select import Selector, filter_nav, parse_selectors, select_nav_paths
+from pandoc_server import add_backend_argument, convert_with_server, get_pandoc_server
+from draft_docx import write_draft_docx_text
+from profiling import add_profile_argument, configure_profiling, profile_stage
+from reproducible import build_date, normalize_ooxml, pandoc_env, reproducible_requested, source_date_epoch
 import re
 
 # Setup logging
@@ -27,14 +47,44 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 class MkDocsToDocxByChapterConverter:
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, work_dir: Optional[Path] = None,
+                 resume: bool = False, only: Optional[List[str]] = None,
+                 selectors: Optional[List[Selector]] = None, epoch: Optional[int] = None,
+                 images_dir: Optional[Path] = None, pandoc_backend: str = 'auto', draft: bool = False,
+                 memory_budget: Optional[MemoryBudget] = None):
         self.project_root = project_root
+        # Bounded-memory mode: chapters one at a time, oversized ones converted in parts
+        self.memory_budget = memory_budget
+        if memory_budget and pandoc_backend != 'cli':
+            # Only a pandoc process can be given a heap limit
+            logger.info("Memory budget set: using the pandoc CLI backend")
+            pandoc_backend = 'cli'
+        # Review drafts are written without pandoc, next to (not over) the real exports
+        self.draft = draft
+        # 'auto': long-lived pandoc-server when available, else one pandoc per chapter
+        self.pandoc_backend = pandoc_backend
+        # Shared diagram directory (content-hash names); default is per chapter
+        self.images_dir = images_dir
+        # Reproducible builds: fixed document date and normalized DOCX zip
+        self.epoch = epoch
         self.docs_dir = project_root / "docs"
         self.export_dir = project_root / "docs" / "export"
         self.mkdocs_config = project_root / "mkdocs.yml"
+        work_dir = work_dir or project_root / ".export-work"
+        
+        # Partial exports never overwrite the full chapter documents
+        self.selectors = selectors or []
+        if self.selectors:
+            self.export_dir = self.export_dir / "selection"
+            work_dir = work_dir / "selection"
+        if self.draft:
+            self.export_dir = self.export_dir / "draft"
         
-        # Ensure export directory exists
-        self.export_dir.mkdir(exist_ok=True)
+        # Per-stage checkpoints (combined markdown, rendered images, DOCX)
+        self.checkpoints = CheckpointStore(work_dir)
+        self.resume = resume
+        self.only = only
+        # The export directory is created when a chapter is written: planning stays read-only
         
     def check_dependencies(self) -> bool:
         """Check if required dependencies are available."""
@@ -42,17 +92,11 @@ class MkDocsToDocxByChapterConverter:
         
         missing = []
         for dep in dependencies:
-            try:
-                result = subprocess.run(['which', dep], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=10)
-                if result.returncode != 0:
-                    missing.append(dep)
-                else:
-                    logger.info(f"✓ {dep} is available at {result.stdout.strip()}")
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+            dep_path = shutil.which(dep)
+            if dep_path is None:
                 missing.append(dep)
+            else:
+                logger.info(f"✓ {dep} is available at {dep_path}")
         
         if missing:
             logger.error(f"Missing dependencies: {', '.join(missing)}")
@@ -156,84 +200,151 @@ class MkDocsToDocxByChapterConverter:
                 
         return '\n'.join(adjusted_lines)
     
-    def combine_chapter_files(self, chapter_name: str, files: List[Path]) -> str:
-        """Combine multiple markdown files for a chapter into a single document."""
-        combined_content = []
-        
-        # Add chapter title
-        chapter_title = f"# {chapter_name.replace('-', ' ').title()}"
-        combined_content.append(chapter_title)
-        combined_content.append('')
-        
-        for i, file_path in enumerate(files):
+    def read_chapter_pages(self, files: List[Path]) -> Iterator[Tuple[Path, str, str]]:
+        """Yield (file, docs-relative path, content) of each readable page, one at a time."""
+        for file_path in files:
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                
-                # Add section break before each file (except first)
-                if i > 0:
-                    combined_content.append('\n\\newpage\n')
-                
-                # Add file title as a section heading
-                relative_path = file_path.relative_to(self.docs_dir)
-                section_title = f"## {relative_path.stem.replace('-', ' ').replace('_', ' ').title()}"
-                combined_content.append(section_title)
-                combined_content.append('')
-                
-                # Adjust heading levels in content (shift all headings down by 2)
-                adjusted_content = self.adjust_heading_levels(content, 2)
-                combined_content.append(adjusted_content)
-                combined_content.append('')
-                
-                logger.debug(f"Added to {chapter_name}: {relative_path}")
-                
             except Exception as e:
                 logger.error(f"Failed to read {file_path}: {e}")
-                
-        return '\n'.join(combined_content)
+                continue
+            yield file_path, file_path.relative_to(self.docs_dir).as_posix(), content
     
-    def convert_to_docx(self, chapter_name: str, markdown_content: str) -> bool:
-        """Convert markdown content to DOCX using pandoc with mermaid filter."""
+    def index_chapter_pages(self, files: List[Path]) -> LinkIndex:
+        """Extraction pass: bookmark ids of the chapter's pages, diagrams recorded in the asset index."""
+        def pages():
+            for file_path, relative_path, content in self.read_chapter_pages(files):
+                emit('file_started', file=str(file_path))
+                # Record the page's diagrams in the asset index during the extraction pass
+                get_asset_index().record_source(file_path, content, extract_mermaid_blocks(content))
+                yield relative_path, content
         
-        # Create output filename
-        output_file = self.export_dir / f"RH_OVE_{chapter_name}_Documentation.docx"
+        # Links between pages of the chapter become internal bookmarks
+        link_index = build_link_index(pages(), docs_pages(self.docs_dir))
+        for link in link_index.check():
+            # Links into other chapters are expected; they are kept as plain text
+            log = logger.debug if link.reason == 'page not exported' else logger.warning
+            log(f"Dangling link in {link.source}:{link.line} ({link.reason}): {link.target}")
+        return link_index
+    
+    def write_chapter_pages(self, chapter_name: str, link_index: LinkIndex, files: List[Path],
+                            output: TextIO) -> None:
+        """Stream the sections of the given pages to ``output``, one page at a time."""
+        for i, (file_path, relative_path, content) in enumerate(self.read_chapter_pages(files)):
+            output.write('\n')
+            # Add section break before each file (except first)
+            if i > 0:
+                output.write('\n\\newpage\n\n')
+            
+            # Add file title as a section heading
+            stem = Path(relative_path).stem
+            section_title = f"## {stem.replace('-', ' ').replace('_', ' ').title()} {{#{link_index.page_id(relative_path)}}}"
+            
+            # Adjust heading levels in content (shift all headings down by 2)
+            adjusted_content = self.adjust_heading_levels(link_index.rewrite(relative_path, content), 2)
+            output.write(f"{section_title}\n\n{adjusted_content}\n")
+            
+            logger.debug(f"Added to {chapter_name}: {relative_path}")
+    
+    def combine_chapter_files(self, chapter_name: str, files: List[Path]) -> str:
+        """Combine multiple markdown files for a chapter into a single document."""
+        buffer = io.StringIO()
+        
+        # Add chapter title
+        buffer.write(f"# {chapter_name.replace('-', ' ').title()}\n")
+        self.write_chapter_pages(chapter_name, self.index_chapter_pages(files), files, buffer)
+        return buffer.getvalue()
+    
+    def write_chapter_parts(self, chapter_name: str, parts: List[List[Path]], chapter_dir: Path) -> List[Path]:
+        """Stream the combined markdown of each part of a chapter to ``partNN.combined.md``."""
+        link_index = self.index_chapter_pages([file_path for part in parts for file_path in part])
+        paths = []
+        for number, part_files in enumerate(parts, start=1):
+            path = chapter_dir / f"part{number:02d}.combined.md"
+            with open(path, 'w', encoding='utf-8') as output:
+                if number == 1:
+                    output.write(f"# {chapter_name.replace('-', ' ').title()}\n")
+                self.write_chapter_pages(chapter_name, link_index, part_files, output)
+            paths.append(path)
+        return paths
+    
+    def output_file(self, chapter_name: str) -> Path:
+        """Final DOCX path of a chapter."""
+        return self.export_dir / f"RH_OVE_{chapter_name}_Documentation.docx"
+    
+    async def convert_to_docx_async(self, chapter_name: str, markdown_content: str,
+                                    executor: ToolExecutor, output_file: Optional[Path] = None,
+                                    continuation: bool = False) -> bool:
+        """Convert markdown content to DOCX through pandoc-server, or pandoc with mermaid filter.
         
-        # Create temporary markdown file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as tmp_file:
-            tmp_file.write(markdown_content)
-            tmp_markdown = Path(tmp_file.name)
+        Continuation parts of a chapter converted in parts are appended to the
+        first part, so they get neither a table of contents nor a title.
+        """
+        
+        # Create output filename
+        output_file = output_file or self.output_file(chapter_name)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        reference_doc = self.project_root / 'scripts' / 'reference.docx'
+        metadata = {
+            'title': f'RH OVE {chapter_name.replace("-", " ").title()} Documentation',
+            'author': 'Red Hat OpenShift Virtualization Ecosystem Team',
+            'date': build_date(self.epoch),
+        }
+        if continuation:
+            metadata = {}
         
+        # The server cannot run mermaid-filter: only pre-rendered chapters go through it
+        server = get_pandoc_server(self.pandoc_backend)
+        tmp_markdown = None
         try:
-            # Pandoc command with mermaid filter
-            pandoc_cmd = [
-                'pandoc',
-                str(tmp_markdown),
-                '--filter', 'mermaid-filter',
-                '--from', 'markdown',
-                '--to', 'docx',
-                '--output', str(output_file),
-                '--toc',
-                '--toc-depth=3',
-                '--standalone',
-                '--reference-doc=' + str(self.project_root / 'scripts' / 'reference.docx') if (self.project_root / 'scripts' / 'reference.docx').exists() else '',
-                '--metadata', f'title=RH OVE {chapter_name.replace("-", " ").title()} Documentation',
-                '--metadata', 'author=Red Hat OpenShift Virtualization Ecosystem Team',
-                '--metadata', 'date=' + subprocess.run(['date', '+%Y-%m-%d'], capture_output=True, text=True).stdout.strip()
-            ]
-            
-            # Remove empty reference-doc argument if file doesn't exist
-            pandoc_cmd = [arg for arg in pandoc_cmd if arg and not arg.startswith('--reference-doc=--reference-doc')]
-            
             logger.info(f"Converting {chapter_name} to DOCX...")
+            emit('pandoc_started', document=chapter_name)
             
-            result = subprocess.run(
-                pandoc_cmd,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minutes timeout per chapter
-            )
+            if server and not extract_mermaid_blocks(markdown_content):
+                options = {'from': 'markdown', 'to': 'docx', 'standalone': True,
+                           'table-of-contents': not continuation, 'toc-depth': 3, 'metadata': metadata}
+                result = await convert_with_server(server, executor, markdown_content, output_file, options,
+                                                   reference_doc, self.project_root)
+            else:
+                # Create temporary markdown file
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as tmp_file:
+                    tmp_file.write(markdown_content)
+                    tmp_markdown = Path(tmp_file.name)
+                
+                # Pandoc command with mermaid filter
+                pandoc_cmd = [
+                    'pandoc',
+                    str(tmp_markdown),
+                    '--filter', 'mermaid-filter',
+                    '--from', 'markdown',
+                    '--to', 'docx',
+                    '--output', str(output_file),
+                    '--standalone',
+                ]
+                if not continuation:
+                    pandoc_cmd.extend(['--toc', '--toc-depth=3'])
+                if reference_doc.exists():
+                    pandoc_cmd.append(f'--reference-doc={reference_doc}')
+                for key, value in metadata.items():
+                    pandoc_cmd.extend(['--metadata', f'{key}={value}'])
+                if self.memory_budget:
+                    pandoc_cmd.extend(self.memory_budget.pandoc_args())
+                
+                result = await executor.run(
+                    pandoc_cmd,
+                    timeout=120,  # 2 minutes timeout per chapter
+                    env=pandoc_env(self.epoch)
+                )
+            emit('pandoc_finished', document=chapter_name, duration=round(result.duration, 3),
+                 returncode=result.returncode, ok=result.ok)
             
-            if result.returncode == 0:
+            if result.timed_out:
+                logger.error(f"Pandoc conversion timed out for {chapter_name}")
+                return False
+            elif result.returncode == 0:
+                if self.epoch is not None:
+                    normalize_ooxml(output_file, self.epoch)
                 file_size = output_file.stat().st_size / 1024 / 1024
                 logger.info(f"✓ Created {output_file.name} ({file_size:.2f} MB)")
                 return True
@@ -242,63 +353,304 @@ class MkDocsToDocxByChapterConverter:
                 logger.error(f"STDERR: {result.stderr}")
                 return False
                 
-        except subprocess.TimeoutExpired:
-            logger.error(f"Pandoc conversion timed out for {chapter_name}")
-            return False
         except Exception as e:
             logger.error(f"Conversion failed for {chapter_name}: {e}")
             return False
         finally:
             # Clean up temporary file
-            tmp_markdown.unlink(missing_ok=True)
+            if tmp_markdown:
+                tmp_markdown.unlink(missing_ok=True)
     
-    def run(self) -> bool:
-        """Run the complete conversion process."""
-        logger.info("Starting MkDocs to DOCX conversion by chapter with pandoc-mermaid-filter")
+    async def write_draft_async(self, chapter_name: str, markdown_content: str, output_file: Path) -> bool:
+        """Write a draft DOCX straight from the markdown, without pandoc."""
+        title = f'RH OVE {chapter_name.replace("-", " ").title()} Documentation'
+        emit('pandoc_started', document=chapter_name, backend='draft')
+        try:
+            stats = await asyncio.to_thread(write_draft_docx_text, markdown_content, output_file,
+                                            self.project_root / 'scripts' / 'reference.docx',
+                                            self.project_root, title)
+        except OSError as e:
+            logger.error(f"Draft failed for {chapter_name}: {e}")
+            emit('pandoc_finished', document=chapter_name, duration=0, returncode=1, ok=False)
+            return False
+        emit('pandoc_finished', document=chapter_name, duration=round(stats.duration, 3), returncode=0, ok=True)
+        if self.epoch is not None:
+            normalize_ooxml(output_file, self.epoch)
+        logger.info(f"✓ Drafted {output_file.name} in {stats.duration * 1000:.0f} ms")
+        return True
+    
+    def convert_to_docx(self, chapter_name: str, markdown_content: str) -> bool:
+        """Convert markdown content to DOCX using pandoc with mermaid filter."""
+        return asyncio.run(self.convert_to_docx_async(chapter_name, markdown_content, ToolExecutor()))
+    
+    async def render_chapter_diagrams(self, chapter_name: str, content: str, images_dir: Path,
+                                      executor: ToolExecutor) -> Tuple[str, int, int]:
+        """Pre-render mermaid diagrams into the chapter work directory.
+        
+        Images are named by content hash, so diagrams rendered by an earlier
+        (interrupted) run are reused. Without any mermaid-cli method the blocks
+        are left for mermaid-filter.
+        """
+        if not await detect_mermaid_methods(executor):
+            logger.info("No mermaid-cli method available, leaving diagrams to mermaid-filter")
+            return content, 0, 0
         
-        # Check dependencies
-        if not self.check_dependencies():
+        images_dir.mkdir(parents=True, exist_ok=True)
+        return await render_mermaid_page(content, str(images_dir), executor, source=chapter_name)
+    
+    async def process_chapter(self, chapter_name: str, files: List[Path],
+                              executor: ToolExecutor) -> Optional[bool]:
+        """Run the combined -> images -> docx stages of a chapter.
+        
+        When resuming, stages whose checkpoint matches their inputs are skipped.
+        Returns None if the chapter has no content.
+        """
+        if (self.memory_budget and not self.draft
+                and sum(file_path.stat().st_size for file_path in files) > self.memory_budget.part_bytes):
+            return await self.process_chapter_parts(chapter_name, files, executor)
+        
+        checkpoints = self.checkpoints
+        if not self.resume:
+            checkpoints.reset(chapter_name)
+        chapter_dir = checkpoints.chapter_dir(chapter_name)
+        
+        # Stage 1: combined markdown
+        combined_path = chapter_dir / 'combined.md'
+        key = files_key(files)
+        if self.resume and checkpoints.is_complete(chapter_name, 'combined', key):
+            logger.info(f"↺ {chapter_name}: reusing combined markdown checkpoint")
+            emit('stage_skipped', chapter=chapter_name, stage='combined')
+            combined_content = combined_path.read_text(encoding='utf-8')
+        else:
+            combined_content = self.combine_chapter_files(chapter_name, files)
+            if not combined_content.strip():
+                logger.warning(f"No content for chapter: {chapter_name}")
+                return None
+            combined_path.write_text(combined_content, encoding='utf-8')
+            checkpoints.mark_complete(chapter_name, 'combined', key, combined_path)
+        
+        # Stage 2: rendered images
+        images_dir = self.images_dir or chapter_dir / 'images'
+        rendered_path = chapter_dir / 'rendered.md'
+        # Without a renderer the diagrams are left for mermaid-filter: a host with one must render them
+        renderers = await detect_mermaid_methods(executor)
+        key = content_key(combined_content, ','.join(renderers))
+        if self.resume and checkpoints.is_complete(chapter_name, 'images', key):
+            logger.info(f"↺ {chapter_name}: reusing rendered images checkpoint")
+            emit('stage_skipped', chapter=chapter_name, stage='images')
+            rendered_content = rendered_path.read_text(encoding='utf-8')
+        else:
+            rendered_content, diagram_count, rendered_count = await self.render_chapter_diagrams(
+                chapter_name, combined_content, images_dir, executor)
+            rendered_path.write_text(rendered_content, encoding='utf-8')
+            if rendered_count == diagram_count:
+                checkpoints.mark_complete(chapter_name, 'images', key, rendered_path)
+            else:
+                logger.warning(f"{chapter_name}: {diagram_count - rendered_count} diagram(s) failed, "
+                               f"images stage left incomplete")
+        
+        # Stage 3: DOCX
+        output_file = self.output_file(chapter_name)
+        reference_doc = self.project_root / 'scripts' / 'reference.docx'
+        key = content_key(rendered_content, reference_doc.read_bytes() if reference_doc.exists() else b'',
+                          str(self.epoch), 'draft' if self.draft else 'pandoc')
+        if self.resume and checkpoints.is_complete(chapter_name, 'docx', key) and output_file.exists():
+            logger.info(f"↺ {chapter_name}: DOCX is up to date ({output_file.name})")
+            emit('stage_skipped', chapter=chapter_name, stage='docx')
+            get_asset_index().add_document(output_file, files, chapter=chapter_name)
+            emit('chapter_done', chapter=chapter_name, output=str(output_file),
+                 size_bytes=output_file.stat().st_size)
+            return True
+        
+        chapter_docx = chapter_dir / output_file.name
+        # Concurrent jobs on this runner convert an identical chapter once
+        store = get_artifact_store()
+        mode = 'draft' if self.draft else 'pandoc'
+        store_key = artifact_key('docx', mode, chapter_name, rendered_content.replace(str(images_dir), ''),
+                                 build_date(self.epoch), str(self.epoch), reference_doc)
+        async with store.producing_async('docx', store_key):
+            if store.fetch('docx', store_key, chapter_docx):
+                logger.info(f"♻️ {chapter_name}: reusing DOCX from the shared artifact store")
+                converted = True
+            else:
+                if self.draft:
+                    converted = await self.write_draft_async(chapter_name, rendered_content, chapter_docx)
+                else:
+                    converted = await self.convert_to_docx_async(chapter_name, rendered_content, executor,
+                                                                 chapter_docx)
+                if converted:
+                    store.put('docx', store_key, chapter_docx, mode=mode)
+        if not converted:
             return False
-            
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(chapter_docx, output_file)
+        checkpoints.mark_complete(chapter_name, 'docx', key, chapter_docx)
+        get_asset_index().add_document(output_file, files, chapter=chapter_name)
+        emit('chapter_done', chapter=chapter_name, output=str(output_file),
+             size_bytes=output_file.stat().st_size)
+        return True
+    
+    async def process_chapter_parts(self, chapter_name: str, files: List[Path],
+                                    executor: ToolExecutor) -> Optional[bool]:
+        """Bounded-memory variant of process_chapter for a chapter larger than one part.
+        
+        The chapter is streamed to disk in parts of whole pages; each part has its
+        diagrams rendered and is converted by its own pandoc run, then the part
+        DOCX files are merged. Only the final DOCX is checkpointed.
+        """
+        checkpoints = self.checkpoints
+        if not self.resume:
+            checkpoints.reset(chapter_name)
+        chapter_dir = checkpoints.chapter_dir(chapter_name)
+        output_file = self.output_file(chapter_name)
+        reference_doc = self.project_root / 'scripts' / 'reference.docx'
+        part_bytes = self.memory_budget.part_bytes
+        key = content_key(files_key(files), reference_doc.read_bytes() if reference_doc.exists() else b'',
+                          str(self.epoch), f'pandoc-parts-{part_bytes}')
+        if self.resume and checkpoints.is_complete(chapter_name, 'docx', key) and output_file.exists():
+            logger.info(f"↺ {chapter_name}: DOCX is up to date ({output_file.name})")
+            emit('stage_skipped', chapter=chapter_name, stage='docx')
+            get_asset_index().add_document(output_file, files, chapter=chapter_name)
+            emit('chapter_done', chapter=chapter_name, output=str(output_file),
+                 size_bytes=output_file.stat().st_size)
+            return True
+        
+        parts = split_parts(files, part_bytes)
+        logger.info(f"{chapter_name}: converting in {len(parts)} part(s) of at most {part_bytes / 1024:.0f} KB")
+        combined_paths = await asyncio.to_thread(self.write_chapter_parts, chapter_name, parts, chapter_dir)
+        
+        images_dir = self.images_dir or chapter_dir / 'images'
+        store = get_artifact_store()
+        part_docx = []
+        for number, combined_path in enumerate(combined_paths, start=1):
+            rendered_content, diagram_count, rendered_count = await self.render_chapter_diagrams(
+                chapter_name, combined_path.read_text(encoding='utf-8'), images_dir, executor)
+            if rendered_count != diagram_count:
+                logger.warning(f"{chapter_name}: {diagram_count - rendered_count} diagram(s) of part {number} failed")
+            docx = chapter_dir / f"part{number:02d}.docx"
+            store_key = artifact_key('docx', 'pandoc-part', chapter_name, str(number),
+                                     rendered_content.replace(str(images_dir), ''),
+                                     build_date(self.epoch), str(self.epoch), reference_doc)
+            async with store.producing_async('docx', store_key):
+                if store.fetch('docx', store_key, docx):
+                    logger.info(f"♻️ {chapter_name}: reusing part {number} from the shared artifact store")
+                    converted = True
+                else:
+                    converted = await self.convert_to_docx_async(chapter_name, rendered_content, executor, docx,
+                                                                 continuation=number > 1)
+                    if converted:
+                        store.put('docx', store_key, docx, mode='pandoc-part')
+            del rendered_content
+            if not converted:
+                return False
+            part_docx.append(docx)
+        
+        chapter_docx = chapter_dir / output_file.name
+        try:
+            await asyncio.to_thread(merge_docx, part_docx, chapter_docx)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Merging the parts of {chapter_name} failed: {e}")
+            return False
+        if self.epoch is not None:
+            normalize_ooxml(chapter_docx, self.epoch)
+        logger.info(f"✓ Merged {len(part_docx)} part(s) into {output_file.name} "
+                    f"({chapter_docx.stat().st_size / 1024 / 1024:.2f} MB)")
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(chapter_docx, output_file)
+        checkpoints.mark_complete(chapter_name, 'docx', key, chapter_docx)
+        get_asset_index().add_document(output_file, files, chapter=chapter_name)
+        emit('chapter_done', chapter=chapter_name, output=str(output_file),
+             size_bytes=output_file.stat().st_size)
+        return True
+    
+    async def convert_chapters(self, chapters: Dict[str, List[Path]]) -> Tuple[int, List[str]]:
+        """Process all chapters concurrently on one event loop (one at a time with a memory budget)."""
+        executor = ToolExecutor(BOUNDED_TOOL_LIMITS if self.memory_budget else None)
+        
+        for chapter_name, files in chapters.items():
+            logger.info(f"Processing chapter: {chapter_name} ({len(files)} files)")
+        
+        # Start the shared pandoc-server once, off the event loop
+        if not self.draft:
+            await asyncio.to_thread(get_pandoc_server, self.pandoc_backend)
+        
+        # Pandoc and renderer concurrency is bounded by the executor
+        if self.memory_budget:
+            results = [await self.process_chapter(name, files, executor) for name, files in chapters.items()]
+        else:
+            results = await gather_tasks(
+                *(self.process_chapter(name, files, executor) for name, files in chapters.items())
+            )
+        
+        success_count = sum(1 for ok in results if ok)
+        failed_chapters = [name for name, ok in zip(chapters, results) if ok is False]
+        return success_count, failed_chapters
+    
+    def select_chapters(self, chapters: Dict[str, List[Path]]) -> Dict[str, List[Path]]:
+        """Restrict chapters to the ones requested with --only."""
+        if not self.only:
+            return chapters
+        
+        by_name = {name.lower(): name for name in chapters}
+        unknown = [name for name in self.only if name.lower() not in by_name]
+        if unknown:
+            logger.error(f"Unknown chapter(s): {', '.join(unknown)}")
+            logger.error(f"Available chapters: {', '.join(chapters)}")
+            return {}
+        
+        selected = [by_name[name.lower()] for name in self.only]
+        return {name: files for name, files in chapters.items() if name in selected}
+    
+    def plan_chapters(self) -> Dict[str, List[Path]]:
+        """Chapters (and their files) to export after --select and --only; empty on error."""
         # Load MkDocs configuration
         config = self.load_mkdocs_config()
         if not config:
             logger.error("Failed to load MkDocs configuration")
-            return False
+            return {}
             
         # Extract navigation structure
         nav = config.get('nav', [])
         if not nav:
             logger.error("No navigation found in MkDocs config")
-            return False
+            return {}
+        
+        # Restrict the navigation to the selected pages before anything is read
+        if self.selectors:
+            selected = select_nav_paths(nav, self.selectors, self.docs_dir)
+            logger.info(f"Selected {len(selected)} page(s)")
+            nav = filter_nav(nav, selected)
             
         # Extract chapters
         chapters = self.extract_chapters_from_nav(nav)
         if not chapters:
             logger.error("No chapters found in navigation")
-            return False
+            return {}
             
-        logger.info(f"Found {len(chapters)} chapters to process")
-        
-        # Process each chapter
-        success_count = 0
-        failed_chapters = []
+        return self.select_chapters(chapters)
+    
+    def run(self) -> bool:
+        """Run the complete conversion process."""
+        logger.info("Starting MkDocs to DOCX conversion by chapter with pandoc-mermaid-filter")
         
-        for chapter_name, files in chapters.items():
-            logger.info(f"Processing chapter: {chapter_name} ({len(files)} files)")
+        # Check dependencies (drafts need neither pandoc nor mermaid-filter)
+        if not self.draft and not self.check_dependencies():
+            return False
             
-            # Combine files for this chapter
-            combined_content = self.combine_chapter_files(chapter_name, files)
+        with profile_stage('plan'):
+            chapters = self.plan_chapters()
+        if not chapters:
+            return False
             
-            if not combined_content.strip():
-                logger.warning(f"No content for chapter: {chapter_name}")
-                continue
-                
-            # Convert to DOCX
-            if self.convert_to_docx(chapter_name, combined_content):
-                success_count += 1
-            else:
-                failed_chapters.append(chapter_name)
+        logger.info(f"Found {len(chapters)} chapters to process")
+        if self.resume:
+            logger.info(f"Resuming from checkpoints in {self.checkpoints.work_dir}")
+        
+        # Process all chapters
+        with profile_stage('chapters'):
+            success_count, failed_chapters = asyncio.run(self.convert_chapters(chapters))
+        if self.memory_budget:
+            report_peak_rss(self.memory_budget)
         
         # Summary
         logger.info(f"✓ Successfully converted {success_count} chapters")
@@ -306,15 +658,66 @@ class MkDocsToDocxByChapterConverter:
             logger.error(f"✗ Failed to convert {len(failed_chapters)} chapters: {', '.join(failed_chapters)}")
             
         logger.info(f"Output directory: {self.export_dir}")
-        return len(failed_chapters) == 0
+        # Over-budget diagrams fail the run with --diagram-budget fail
+        diagrams_ok = get_diagram_report().finish()
+        return len(failed_chapters) == 0 and diagrams_ok
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Convert MkDocs documentation to DOCX files by chapter")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue from the last incomplete stage of each chapter")
+    parser.add_argument('--only', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help="Comma-separated list of chapters to (re-)run, e.g. Architecture,Use-Cases")
+    parser.add_argument('--work-dir', type=Path,
+                        help="Checkpoint directory (default: <project>/.export-work)")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Export only matching pages: nav:<Section/Page>, glob:<docs path>, tag:<name> "
+                             "(repeatable or comma-separated); output goes to docs/export/selection/")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Byte-stable output dated from SOURCE_DATE_EPOCH or the last commit "
+                             "(implied when SOURCE_DATE_EPOCH is set)")
+    parser.add_argument('--draft', action='store_true',
+                        help="Fast review drafts written without pandoc (no TOC) to docs/export/draft/")
+    add_backend_argument(parser)
+    add_memory_budget_argument(parser)
+    add_diagram_budget_arguments(parser)
+    add_profile_argument(parser)
+    add_event_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 def main():
     """Main entry point."""
+    args = parse_args()
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     
-    converter = MkDocsToDocxByChapterConverter(project_root)
-    success = converter.run()
+    converter = MkDocsToDocxByChapterConverter(project_root, work_dir=args.work_dir,
+                                               resume=args.resume, only=args.only,
+                                               selectors=args.selectors, pandoc_backend=args.pandoc_backend,
+                                               draft=args.draft,
+                                               memory_budget=MemoryBudget(args.memory_budget)
+                                               if args.memory_budget else None,
+                                               epoch=source_date_epoch(project_root)
+                                               if reproducible_requested(args.reproducible) else None)
+    configure_events(args.events, args.events_file)
+    configure_diagram_report(args)
+    configure_profiling(args.profile, 'convert_docs_to_docx_by_chapter', project_root)
+    asset_index = open_asset_index(project_root)
+    open_artifact_store()
+    emit('run_started', exporter='convert_docs_to_docx_by_chapter')
+    started = time.monotonic()
+    try:
+        success = converter.run()
+    finally:
+        asset_index.save()
+    emit('run_finished', exporter='convert_docs_to_docx_by_chapter', success=success,
+         duration=round(time.monotonic() - started, 3))
     
     sys.exit(0 if success else 1)
 
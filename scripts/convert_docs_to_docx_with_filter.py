@@ -11,29 +11,49 @@ Requirements:
 - Python packages: PyYAML, pathlib
 """
 
+import argparse
+import io
 import os
 import sys
 import yaml
-import subprocess
 import shutil
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TextIO
 import tempfile
+import time
 import logging
 
+from artifact_store import artifact_key, get_artifact_store, open_artifact_store
+from async_exec import run_tool
+from bounded_export import MemoryBudget, add_memory_budget_argument, merge_docx, report_peak_rss, split_parts
+from export_events import add_event_arguments, configure_events, emit
+from nav_select import Selector, filter_nav, parse_selectors, select_nav_paths
+from profiling import add_profile_argument, configure_profiling, profile_stage
+from reproducible import build_date, normalize_ooxml, pandoc_env, reproducible_requested, source_date_epoch
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 class MkDocsToDocxConverter:
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, selectors: Optional[List[Selector]] = None,
+                 epoch: Optional[int] = None, memory_budget: Optional[MemoryBudget] = None):
         self.project_root = project_root
+        # Bounded-memory mode: streamed combine, pandoc per part with a capped heap
+        self.memory_budget = memory_budget
+        # Reproducible builds: fixed document date and normalized DOCX zip
+        self.epoch = epoch
         self.docs_dir = project_root / "docs"
         self.export_dir = project_root / "docs" / "export"
         self.mkdocs_config = project_root / "mkdocs.yml"
         
+        # Partial exports never overwrite the full document
+        self.selectors = selectors or []
+        if self.selectors:
+            self.export_dir = self.export_dir / "selection"
+        
         # Ensure export directory exists
-        self.export_dir.mkdir(exist_ok=True)
+        self.export_dir.mkdir(parents=True, exist_ok=True)
         
     def check_dependencies(self) -> bool:
         """Check if required dependencies are available."""
@@ -41,17 +61,11 @@ class MkDocsToDocxConverter:
         
         missing = []
         for dep in dependencies:
-            try:
-                result = subprocess.run(['which', dep], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=10)
-                if result.returncode != 0:
-                    missing.append(dep)
-                else:
-                    logger.info(f"✓ {dep} is available at {result.stdout.strip()}")
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+            dep_path = shutil.which(dep)
+            if dep_path is None:
                 missing.append(dep)
+            else:
+                logger.info(f"✓ {dep} is available at {dep_path}")
         
         if missing:
             logger.error(f"Missing dependencies: {', '.join(missing)}")
@@ -132,36 +146,109 @@ class MkDocsToDocxConverter:
                 
         return '\n'.join(adjusted_lines)
     
-    def combine_markdown_files(self, files: List[Path]) -> str:
-        """Combine multiple markdown files into a single document."""
-        combined_content = []
-        
+    def write_markdown_files(self, files: List[Path], output: TextIO) -> int:
+        """Stream the combined document to ``output``, one page at a time; returns the pages written."""
+        written = 0
         for i, file_path in enumerate(files):
+            emit('file_started', file=str(file_path))
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     content = f.read()
                 
                 # Add page break before each section (except first)
                 if i > 0:
-                    combined_content.append('\n\\newpage\n')
+                    output.write('\n\n\\newpage\n\n')
                 
                 # Add file title as a heading
                 relative_path = file_path.relative_to(self.docs_dir)
                 section_title = f"# {relative_path.stem.replace('-', ' ').replace('_', ' ').title()}"
-                combined_content.append(section_title)
-                combined_content.append('')
                 
                 # Adjust heading levels in content (shift all headings down by 1)
                 adjusted_content = self.adjust_heading_levels(content, 1)
-                combined_content.append(adjusted_content)
-                combined_content.append('')
+                output.write(f"{section_title}\n\n{adjusted_content}\n")
+                written += 1
                 
                 logger.info(f"Added: {relative_path}")
                 
             except Exception as e:
                 logger.error(f"Failed to read {file_path}: {e}")
                 
-        return '\n'.join(combined_content)
+        return written
+    
+    def combine_markdown_files(self, files: List[Path]) -> str:
+        """Combine multiple markdown files into a single document."""
+        buffer = io.StringIO()
+        self.write_markdown_files(files, buffer)
+        return buffer.getvalue()
+    
+    def write_markdown_parts(self, files: List[Path], work_dir: Path) -> List[Path]:
+        """Stream the combined document to disk, split into parts of whole pages that fit the memory budget."""
+        parts = []
+        for number, part_files in enumerate(split_parts(files, self.memory_budget.part_bytes), start=1):
+            part = work_dir / f"part{number:02d}.md"
+            with open(part, 'w', encoding='utf-8') as output:
+                if self.write_markdown_files(part_files, output):
+                    parts.append(part)
+        return parts
+    
+    def run_pandoc(self, markdown_file: Path, output_file: Path, continuation: bool = False) -> bool:
+        """Run pandoc with mermaid filter on a markdown file.
+        
+        Continuation parts of a bounded-memory export are appended to the first
+        part, so they get neither a table of contents nor a title.
+        """
+        reference_doc = self.project_root / 'scripts' / 'reference.docx'
+        pandoc_cmd = [
+            'pandoc',
+            str(markdown_file),
+            '--filter', 'mermaid-filter',
+            '--from', 'markdown',
+            '--to', 'docx',
+            '--output', str(output_file),
+            '--standalone',
+        ]
+        if reference_doc.exists():
+            pandoc_cmd.append(f'--reference-doc={reference_doc}')
+        if not continuation:
+            pandoc_cmd.extend([
+                '--toc',
+                '--toc-depth=3',
+                '--metadata', 'title=RH OVE Complete Documentation',
+                '--metadata', 'author=Red Hat OpenShift Virtualization Ecosystem Team',
+                '--metadata', 'date=' + build_date(self.epoch)
+            ])
+        if self.memory_budget:
+            pandoc_cmd.extend(self.memory_budget.pandoc_args())
+        
+        logger.info(f"Running pandoc with mermaid filter...")
+        logger.debug(f"Command: {' '.join(pandoc_cmd)}")
+        
+        emit('pandoc_started', document=str(output_file))
+        result = run_tool(
+            pandoc_cmd,
+            timeout=300,  # 5 minutes timeout
+            env=pandoc_env(self.epoch)
+        )
+        emit('pandoc_finished', document=str(output_file), duration=round(result.duration, 3),
+             returncode=result.returncode, ok=result.ok)
+        
+        if result.timed_out:
+            logger.error("Pandoc conversion timed out after 5 minutes")
+            return False
+        elif result.returncode != 0:
+            logger.error(f"Pandoc failed with return code {result.returncode}")
+            logger.error(f"STDERR: {result.stderr}")
+            return False
+        return True
+    
+    def finish_document(self, output_file: Path) -> None:
+        """Normalize (reproducible builds) and report a converted document."""
+        if self.epoch is not None:
+            logger.info(f"🔒 Normalized DOCX (sha256 {normalize_ooxml(output_file, self.epoch)[:12]})")
+        logger.info(f"✓ Successfully created DOCX: {output_file}")
+        logger.info(f"File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
+        emit('document_done', document=str(output_file), output=str(output_file),
+             size_bytes=output_file.stat().st_size)
     
     def convert_to_docx(self, markdown_content: str, output_file: Path) -> bool:
         """Convert markdown content to DOCX using pandoc with mermaid filter."""
@@ -172,49 +259,11 @@ class MkDocsToDocxConverter:
             tmp_markdown = Path(tmp_file.name)
         
         try:
-            # Pandoc command with mermaid filter
-            pandoc_cmd = [
-                'pandoc',
-                str(tmp_markdown),
-                '--filter', 'mermaid-filter',
-                '--from', 'markdown',
-                '--to', 'docx',
-                '--output', str(output_file),
-                '--toc',
-                '--toc-depth=3',
-                '--standalone',
-                '--reference-doc=' + str(self.project_root / 'scripts' / 'reference.docx') if (self.project_root / 'scripts' / 'reference.docx').exists() else '',
-                '--metadata', 'title=RH OVE Complete Documentation',
-                '--metadata', 'author=Red Hat OpenShift Virtualization Ecosystem Team',
-                '--metadata', 'date=' + subprocess.run(['date', '+%Y-%m-%d'], capture_output=True, text=True).stdout.strip()
-            ]
-            
-            # Remove empty reference-doc argument if file doesn't exist
-            pandoc_cmd = [arg for arg in pandoc_cmd if arg and not arg.startswith('--reference-doc=--reference-doc')]
-            
-            logger.info(f"Running pandoc with mermaid filter...")
-            logger.debug(f"Command: {' '.join(pandoc_cmd)}")
-            
-            result = subprocess.run(
-                pandoc_cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes timeout
-            )
-            
-            if result.returncode == 0:
-                logger.info(f"✓ Successfully created DOCX: {output_file}")
-                logger.info(f"File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
-                return True
-            else:
-                logger.error(f"Pandoc failed with return code {result.returncode}")
-                logger.error(f"STDOUT: {result.stdout}")
-                logger.error(f"STDERR: {result.stderr}")
+            if not self.run_pandoc(tmp_markdown, output_file):
                 return False
+            self.finish_document(output_file)
+            return True
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Pandoc conversion timed out after 5 minutes")
-            return False
         except Exception as e:
             logger.error(f"Conversion failed: {e}")
             return False
@@ -222,6 +271,23 @@ class MkDocsToDocxConverter:
             # Clean up temporary file
             tmp_markdown.unlink(missing_ok=True)
     
+    def convert_parts(self, parts: List[Path], output_file: Path) -> bool:
+        """Convert each markdown part with its own pandoc run and merge the results."""
+        part_docx = []
+        try:
+            for number, part in enumerate(parts):
+                docx = part.with_suffix('.docx')
+                logger.info(f"Part {number + 1}/{len(parts)}: {part.stat().st_size / 1024:.0f} KB of markdown")
+                if not self.run_pandoc(part, docx, continuation=number > 0):
+                    return False
+                part_docx.append(docx)
+            merge_docx(part_docx, output_file)
+            self.finish_document(output_file)
+            return True
+        except Exception as e:
+            logger.error(f"Conversion failed: {e}")
+            return False
+    
     def run(self) -> bool:
         """Run the complete conversion process."""
         logger.info("Starting MkDocs to DOCX conversion with pandoc-mermaid-filter")
@@ -241,6 +307,12 @@ class MkDocsToDocxConverter:
         if not nav:
             logger.error("No navigation found in MkDocs config")
             return False
+        
+        # Restrict the navigation to the selected pages before anything is read
+        if self.selectors:
+            selected = select_nav_paths(nav, self.selectors, self.docs_dir)
+            logger.info(f"Selected {len(selected)} page(s)")
+            nav = filter_nav(nav, selected)
             
         files = self.extract_nav_files(nav)
         if not files:
@@ -249,19 +321,64 @@ class MkDocsToDocxConverter:
             
         logger.info(f"Found {len(files)} files to process")
         
+        # Convert to DOCX
+        output_file = self.export_dir / "RH_OVE_Complete_Documentation_Filtered.docx"
+        if self.memory_budget:
+            return self.run_bounded(files, output_file)
+        
         # Combine markdown files
         logger.info("Combining markdown files...")
-        combined_content = self.combine_markdown_files(files)
+        with profile_stage('combine'):
+            combined_content = self.combine_markdown_files(files)
         
         if not combined_content.strip():
             logger.error("No content to convert")
             return False
             
-        # Convert to DOCX
-        output_file = self.export_dir / "RH_OVE_Complete_Documentation_Filtered.docx"
         logger.info(f"Converting to DOCX: {output_file}")
         
-        success = self.convert_to_docx(combined_content, output_file)
+        # Identical conversions of concurrent jobs on this runner run pandoc once
+        store_key = artifact_key('docx', 'mermaid-filter', combined_content, build_date(self.epoch), str(self.epoch),
+                                 self.project_root / 'scripts' / 'reference.docx')
+        return self.convert_through_store(store_key, output_file,
+                                          lambda: self.convert_to_docx(combined_content, output_file))
+    
+    def run_bounded(self, files: List[Path], output_file: Path) -> bool:
+        """Bounded-memory conversion: markdown streamed to disk in parts, one capped pandoc per part."""
+        budget = self.memory_budget
+        logger.info(f"Memory budget {budget.megabytes} MB: pandoc heap {budget.pandoc_heap_mb} MB, "
+                    f"parts of at most {budget.part_bytes / 1024:.0f} KB")
+        work_dir = Path(tempfile.mkdtemp(prefix='docx_parts_'))
+        try:
+            logger.info("Streaming markdown files to disk...")
+            with profile_stage('combine'):
+                parts = self.write_markdown_parts(files, work_dir)
+            if not parts:
+                logger.error("No content to convert")
+                return False
+            
+            logger.info(f"Converting to DOCX in {len(parts)} part(s): {output_file}")
+            # Part files are hashed from disk, the combined document is never in memory
+            store_key = artifact_key('docx', 'mermaid-filter-parts', *parts, build_date(self.epoch), str(self.epoch),
+                                     self.project_root / 'scripts' / 'reference.docx')
+            return self.convert_through_store(store_key, output_file, lambda: self.convert_parts(parts, output_file))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            report_peak_rss(budget)
+    
+    def convert_through_store(self, store_key: str, output_file: Path, convert) -> bool:
+        """Fetch the DOCX from the shared artifact store, or convert it and store it."""
+        store = get_artifact_store()
+        with profile_stage('convert'), store.producing('docx', store_key):
+            if store.fetch('docx', store_key, output_file):
+                logger.info(f"♻️ Reusing DOCX from the shared artifact store ({store.root})")
+                emit('document_done', document=str(output_file), output=str(output_file),
+                     size_bytes=output_file.stat().st_size)
+                success = True
+            else:
+                success = convert()
+                if success:
+                    store.put('docx', store_key, output_file, mode='mermaid-filter')
         
         if success:
             logger.info("✓ Conversion completed successfully!")
@@ -271,13 +388,43 @@ class MkDocsToDocxConverter:
             
         return success
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Convert MkDocs documentation to DOCX using mermaid-filter")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Export only matching pages: nav:<Section/Page>, glob:<docs path>, tag:<name> "
+                             "(repeatable or comma-separated); output goes to docs/export/selection/")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Byte-stable output dated from SOURCE_DATE_EPOCH or the last commit "
+                             "(implied when SOURCE_DATE_EPOCH is set)")
+    add_memory_budget_argument(parser)
+    add_profile_argument(parser)
+    add_event_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 def main():
     """Main entry point."""
+    args = parse_args()
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     
-    converter = MkDocsToDocxConverter(project_root)
+    epoch = source_date_epoch(project_root) if reproducible_requested(args.reproducible) else None
+    memory_budget = MemoryBudget(args.memory_budget) if args.memory_budget else None
+    converter = MkDocsToDocxConverter(project_root, selectors=args.selectors, epoch=epoch,
+                                      memory_budget=memory_budget)
+    configure_events(args.events, args.events_file)
+    configure_profiling(args.profile, 'convert_docs_to_docx_with_filter', project_root)
+    open_artifact_store()
+    emit('run_started', exporter='convert_docs_to_docx_with_filter')
+    started = time.monotonic()
     success = converter.run()
+    emit('run_finished', exporter='convert_docs_to_docx_with_filter', success=success,
+         duration=round(time.monotonic() - started, 3))
     
     sys.exit(0 if success else 1)
 
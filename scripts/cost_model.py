@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Cost model joining the weekly allocations with the persona rates.
+
+The weekly allocation tables of the workload page (days per persona and week
+range, see export_workload_to_xlsx.py) are joined with the weekly rates of
+docs/export/project-charges.csv. The plan is held in columnar ``array``
+buffers, one row per phase block:
+
+- block start/end week
+- days per week per persona (block x persona matrix)
+- rate per day per persona, for the block's sub-project
+
+Weekly burn, cumulative cost and per-phase cost follow directly; what-if
+scenarios (rate changes per persona, phase slips of N weeks) only rescale the
+block costs and shift their week ranges, so evaluating a scenario costs
+O(blocks x personas + weeks) and hundreds of scenarios run per second.
+"""
+
+import argparse
+import csv
+import logging
+import re
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from table_extract import NumberRange
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DAYS_PER_WEEK = 5
+
+# Sub-project (as in project-charges.csv) -> weekly allocation sheet
+PROJECT_SHEETS = {
+    'RH OVE Infrastructure': 'Infrastructure Weekly',
+    'Use-Cases Implementation': 'Use-Cases Weekly',
+    'Migration from VMware': 'Migration Weekly',
+}
+
+# Column names of the allocation tables that differ from the CSV persona names
+PERSONA_ALIASES = {
+    'VMware Admin': 'VMware Administrator',
+}
+
+_MULTIPLIER_PATTERN = re.compile(r'\s*\(\d+x\)\s*$')
+
+
+def persona_name(column: str) -> str:
+    """Persona of an allocation column ('DevOps Engineer (2x)' -> 'DevOps Engineer')."""
+    name = _MULTIPLIER_PATTERN.sub('', column).strip()
+    return PERSONA_ALIASES.get(name, name)
+
+
+def persona_headcount(column: str) -> int:
+    """Number of resources of an allocation column ('DevOps Engineer (2x)' -> 2)."""
+    match = re.search(r'\((\d+)x\)\s*$', column)
+    return int(match.group(1)) if match else 1
+
+
+def load_rates(csv_path: Path) -> Dict[Tuple[str, str], float]:
+    """Weekly rate per (sub-project, persona) from project-charges.csv."""
+    rates = {}
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get('Persona'):
+                continue
+            rates[(row['Sub-Project'], row['Persona'])] = float(row['Weekly Rate'])
+    return rates
+
+
+@dataclass
+class PhaseBlock:
+    """One row of a weekly allocation table: a phase over a week range."""
+    project: int
+    phase: str
+    start: int
+    end: int
+    days: Dict[int, float]  # persona index -> days per week
+    multipliers: Dict[int, int] = field(default_factory=dict)  # persona index -> headcount
+
+
+def plan_blocks(sheets: Dict[str, List[List]]) -> Tuple[List[str], List[str], List[PhaseBlock]]:
+    """Projects, personas and phase blocks of the weekly allocation sheets."""
+    projects: List[str] = []
+    persona_index: Dict[str, int] = {}
+    blocks = []
+    for project, sheet_name in PROJECT_SHEETS.items():
+        sheet = sheets.get(sheet_name)
+        if not sheet:
+            continue
+        projects.append(project)
+        header = sheet[0]
+        # Week, Phase, personas..., Weekly Total
+        columns = [(index, persona_name(name), persona_headcount(name)) for index, name in enumerate(header)
+                   if 1 < index < len(header) - 1]
+        for _, persona, _ in columns:
+            persona_index.setdefault(persona, len(persona_index))
+        for row in sheet[1:]:
+            weeks = row[0]
+            if not isinstance(weeks, NumberRange):
+                continue
+            blocks.append(PhaseBlock(
+                project=len(projects) - 1,
+                phase=str(row[1]),
+                start=int(weeks.start),
+                end=int(weeks.end),
+                days={persona_index[persona]: float(row[index] or 0) for index, persona, _ in columns},
+                multipliers={persona_index[persona]: count for _, persona, count in columns},
+            ))
+    return projects, list(persona_index), blocks
+
+
+@dataclass
+class Scenario:
+    """A what-if scenario: rate factors per persona ('*' for all) and phase slips."""
+    name: str
+    rate_factors: Dict[str, float] = field(default_factory=dict)
+    # (sub-project, phase) -> weeks; the phase and every later phase of the project move
+    slips: Dict[Tuple[str, str], int] = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    weekly: array
+    total: float
+    peak_week: int
+    peak_cost: float
+    end_week: int
+
+
+class CostModel:
+    """Columnar cost model of the workload plan."""
+
+    def __init__(self, sheets: Dict[str, List[List]], rates: Dict[Tuple[str, str], float]):
+        self.projects, self.personas, blocks = plan_blocks(sheets)
+        self.phases: List[str] = [block.phase for block in blocks]
+        self.block_project = array('i', (block.project for block in blocks))
+        self.block_start = array('i', (block.start for block in blocks))
+        self.block_end = array('i', (block.end for block in blocks))
+        rows = [(block.days, self.projects[block.project]) for block in blocks]
+
+        width = len(self.personas)
+        # Block x persona matrices, row-major
+        self.days = array('d', [0.0]) * (len(rows) * width)
+        self.day_rates = array('d', [0.0]) * (len(rows) * width)
+        missing = set()
+        for block, (days, project) in enumerate(rows):
+            for persona, value in days.items():
+                self.days[block * width + persona] = value
+                weekly_rate = rates.get((project, self.personas[persona]))
+                if weekly_rate is None:
+                    # Fall back to the persona's rate in another sub-project
+                    weekly_rate = next((rate for (_, name), rate in rates.items() if name == self.personas[persona]), None)
+                if weekly_rate is None:
+                    if value:
+                        missing.add(self.personas[persona])
+                    weekly_rate = 0.0
+                self.day_rates[block * width + persona] = weekly_rate / DAYS_PER_WEEK
+        for persona in sorted(missing):
+            logger.warning(f"No rate for persona '{persona}' in project-charges.csv, costed at 0")
+
+        self.weeks = max(self.block_end) if self.block_end else 0
+
+    @property
+    def block_count(self) -> int:
+        return len(self.block_start)
+
+    def block_costs(self, rate_factors: Optional[Dict[str, float]] = None) -> array:
+        """Weekly cost of every block (days x rate summed over personas)."""
+        width = len(self.personas)
+        factors = array('d', [1.0]) * width
+        for persona, factor in (rate_factors or {}).items():
+            if persona == '*':
+                for index in range(width):
+                    factors[index] *= factor
+            elif persona in self.personas:
+                factors[self.personas.index(persona)] *= factor
+        days, rates = self.days, self.day_rates
+        return array('d', (
+            sum(days[offset + p] * rates[offset + p] * factors[p] for p in range(width))
+            for offset in range(0, self.block_count * width, width)
+        ))
+
+    def block_shifts(self, slips: Dict[Tuple[str, str], int]) -> array:
+        """Week shift of every block; a slip moves its phase and all later phases of the project."""
+        shifts = array('i', [0]) * self.block_count
+        for (project, phase), weeks in slips.items():
+            if project not in self.projects:
+                continue
+            project_index = self.projects.index(project)
+            blocks = [b for b in range(self.block_count) if self.block_project[b] == project_index]
+            slipped = [b for b in blocks if self.phases[b].lower() == phase.lower()]
+            if not slipped:
+                continue
+            first_start = min(self.block_start[b] for b in slipped)
+            for b in blocks:
+                if self.block_start[b] >= first_start:
+                    shifts[b] += weeks
+        return shifts
+
+    def evaluate(self, scenario: Scenario) -> ScenarioResult:
+        """Weekly burn of a scenario via a difference array over the shifted blocks."""
+        costs = self.block_costs(scenario.rate_factors)
+        shifts = self.block_shifts(scenario.slips)
+        end_week = max((self.block_end[b] + shifts[b] for b in range(self.block_count)), default=0)
+
+        delta = array('d', [0.0]) * (end_week + 2)
+        for b in range(self.block_count):
+            delta[self.block_start[b] + shifts[b]] += costs[b]
+            delta[self.block_end[b] + shifts[b] + 1] -= costs[b]
+        weekly = array('d', [0.0]) * (end_week + 1)  # index = week number, week 0 unused
+        running = 0.0
+        for week in range(1, end_week + 1):
+            running += delta[week]
+            weekly[week] = running
+
+        peak_week = max(range(1, end_week + 1), key=weekly.__getitem__, default=0)
+        return ScenarioResult(scenario, weekly, sum(weekly), peak_week,
+                              weekly[peak_week] if peak_week else 0.0, end_week)
+
+    def evaluate_many(self, scenarios: Iterable[Scenario]) -> List[ScenarioResult]:
+        return [self.evaluate(scenario) for scenario in scenarios]
+
+    def weekly_by_project(self) -> List[array]:
+        """Baseline weekly burn per project."""
+        costs = self.block_costs()
+        series = [array('d', [0.0]) * (self.weeks + 1) for _ in self.projects]
+        for b in range(self.block_count):
+            for week in range(self.block_start[b], self.block_end[b] + 1):
+                series[self.block_project[b]][week] += costs[b]
+        return series
+
+    def phase_rows(self) -> List[List]:
+        """Per-phase rows: project, phase, weeks, person-days, cost."""
+        costs = self.block_costs()
+        width = len(self.personas)
+        rows = []
+        for b in range(self.block_count):
+            weeks = self.block_end[b] - self.block_start[b] + 1
+            person_days = sum(self.days[b * width:(b + 1) * width]) * weeks
+            rows.append([self.projects[self.block_project[b]], self.phases[b],
+                         f"{self.block_start[b]}-{self.block_end[b]}", person_days, costs[b] * weeks])
+        return rows
+
+    def sheets(self, scenarios: Optional[List[Scenario]] = None) -> Dict[str, List[List]]:
+        """Cost sheets for the workload workbook."""
+        by_project = self.weekly_by_project()
+        weekly_rows = [['Week'] + self.projects + ['Weekly Burn', 'Cumulative Cost']]
+        cumulative = 0.0
+        for week in range(1, self.weeks + 1):
+            burn = sum(series[week] for series in by_project)
+            cumulative += burn
+            weekly_rows.append([week] + [round(series[week], 2) for series in by_project]
+                               + [round(burn, 2), round(cumulative, 2)])
+
+        phase_rows = [['Sub-Project', 'Phase', 'Weeks', 'Person-Days', 'Cost']]
+        phase_rows.extend(self.phase_rows())
+        phase_rows.append(['TOTAL', '', '', sum(row[3] for row in phase_rows[1:]),
+                           sum(row[4] for row in phase_rows[1:])])
+
+        results = self.evaluate_many(scenarios or default_scenarios(self))
+        baseline = results[0].total if results else 0.0
+        scenario_rows = [['Scenario', 'Total Cost', 'Delta vs Baseline', 'End Week', 'Peak Week', 'Peak Weekly Burn']]
+        for result in results:
+            scenario_rows.append([result.scenario.name, round(result.total, 2), round(result.total - baseline, 2),
+                                  result.end_week, result.peak_week, round(result.peak_cost, 2)])
+
+        return {'Cost Weekly Burn': weekly_rows, 'Cost by Phase': phase_rows, 'Cost Scenarios': scenario_rows}
+
+
+def default_scenarios(model: CostModel) -> List[Scenario]:
+    """Baseline, global rate changes and implementation slips of each project."""
+    scenarios = [Scenario('Baseline'),
+                 Scenario('Rates +5%', {'*': 1.05}),
+                 Scenario('Rates +10%', {'*': 1.10})]
+    for project in model.projects:
+        for weeks in (2, 4, 8):
+            scenarios.append(Scenario(f"{project}: Implementation +{weeks}w",
+                                      slips={(project, 'Implementation'): weeks}))
+    return scenarios
+
+
+def load_scenarios(path: Path) -> List[Scenario]:
+    """Load scenarios from YAML.
+
+    - name: Migration late, senior rates up
+      rates: {"*": 1.03, "Migration Specialist": 1.2}
+      slips: {"Migration from VMware/Design": 4}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = yaml.safe_load(f) or []
+    scenarios = [Scenario('Baseline')]
+    for entry in entries:
+        slips = {}
+        for key, weeks in (entry.get('slips') or {}).items():
+            project, _, phase = key.partition('/')
+            slips[(project.strip(), phase.strip())] = int(weeks)
+        scenarios.append(Scenario(entry['name'], {k: float(v) for k, v in (entry.get('rates') or {}).items()}, slips))
+    return scenarios
+
+
+def build_model(project_root: Path) -> CostModel:
+    """Cost model of the documented workload plan."""
+    from export_workload_to_xlsx import parse_markdown_tables
+
+    sheets = parse_markdown_tables(project_root / 'docs' / 'project-plan' / 'weekly-charge-breakdown.md')
+    return CostModel(sheets, load_rates(project_root / 'docs' / 'export' / 'project-charges.csv'))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Evaluate cost scenarios of the workload plan")
+    parser.add_argument('--scenarios', type=Path, help="YAML file with scenarios (default: built-in set)")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="Evaluate N scenarios and report throughput")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    model = build_model(Path(__file__).resolve().parent.parent)
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else default_scenarios(model)
+
+    if args.benchmark:
+        grid = [Scenario(f"bench-{i}", {'*': 1 + (i % 20) / 100},
+                         {(model.projects[i % len(model.projects)], 'Implementation'): i % 9})
+                for i in range(args.benchmark)]
+        started = time.perf_counter()
+        model.evaluate_many(grid)
+        elapsed = time.perf_counter() - started
+        logger.info(f"✓ {len(grid)} scenarios in {elapsed:.3f}s ({len(grid) / elapsed:.0f} scenarios/s)")
+        return 0
+
+    for row in model.sheets(scenarios)['Cost Scenarios']:
+        print('  '.join(f"{value:>14,.0f}" if isinstance(value, float) else f"{value!s:>14}" for value in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Mermaid diagram complexity report and size budgets.
+
+A few very large diagrams dominate render time and DOCX size, and used to be
+noticed only when an export timed out. Every mermaid block the exporters
+render is analyzed first, for:
+- node and edge count;
+- label volume (characters of node, edge and message text).
+
+A diagram larger than the node, edge or label budget is rendered at a lower
+PNG scale (down to ``MIN_SCALE``), so its pixel area stays roughly what the
+budget allows. After rendering, the PNG's pixel area and byte size are
+checked against their own budgets.
+
+Per diagram and per page, the exporters log what exceeded a budget. With
+``--diagram-budget fail`` the export then exits non-zero;
+``--diagram-report FILE`` writes every measurement as JSON.
+
+Run on its own, the report covers every nav page. Pixel and byte figures come
+from the images recorded in the asset index by earlier exports.
+
+    python diagram_report.py                          # per-page table, over-budget diagrams
+    python diagram_report.py --max-diagram-nodes 80 --diagram-budget fail
+    python convert_docs_to_docx_by_chapter.py --diagram-report ../docs/export/diagrams.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import re
+import struct
+import sys
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from asset_index import get_asset_index
+from render_scheduler import diagram_size
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALE = 2.0
+MIN_SCALE = 1.0
+SCALE_STEP = 0.25
+BUDGET_MODES = ('warn', 'fail', 'off')
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_LABEL_PATTERN = re.compile(r'"[^"]*"|\|[^|]*\||\[[^\]]*\]|\([^)]*\)|\{[^}]*\}|:[^:]*$')
+_LABEL_DELIMITERS = '"|[](){}:/\\ '
+_IGNORED_LINE = re.compile(r'^\s*(%%|style\b|classDef\b|linkStyle\b|click\b)')
+
+
+@dataclass
+class DiagramBudget:
+    """Per-diagram limits; complexity limits lower the render scale, size limits only warn or fail."""
+    max_nodes: int = 120
+    max_edges: int = 160
+    max_label_chars: int = 3000
+    max_pixels: int = 12_000_000  # about 4000 x 3000 px
+    max_bytes: int = 1536 * 1024
+    mode: str = 'warn'
+
+
+@dataclass
+class DiagramMetrics:
+    """Analysis and measurements of one rendered mermaid block."""
+    source: str
+    index: int
+    line: int
+    digest: str
+    diagram_type: str
+    nodes: int
+    edges: int
+    label_chars: int
+    scale: float
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bytes: Optional[int] = None
+    duration: Optional[float] = None
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def pixels(self) -> Optional[int]:
+        return self.width * self.height if self.width and self.height else None
+
+    @property
+    def location(self) -> str:
+        return f"{self.source}:{self.line}" if self.line else self.source
+
+
+def label_volume(code: str) -> int:
+    """Characters of label text (node text, edge labels, messages) in a mermaid diagram."""
+    total = 0
+    for line in code.strip().split('\n')[1:]:  # the first line is the diagram type
+        if _IGNORED_LINE.match(line):
+            continue
+        for label in _LABEL_PATTERN.findall(line.strip()):
+            total += len(label.strip(_LABEL_DELIMITERS))
+    return total
+
+
+def analyze_diagram(code: str) -> Tuple[int, int, int]:
+    """(nodes, edges, label characters) of a mermaid diagram."""
+    nodes, edges = diagram_size(code)
+    return nodes, edges, label_volume(code)
+
+
+def render_scale(nodes: int, edges: int, label_chars: int, budget: DiagramBudget) -> float:
+    """PNG scale for a diagram: the default within budget, lower as it grows.
+
+    The pixel area grows roughly with the number of elements and with the
+    square of the scale, so the scale is divided by the square root of the
+    overshoot.
+    """
+    overshoot = max(nodes / max(budget.max_nodes, 1), edges / max(budget.max_edges, 1),
+                    label_chars / max(budget.max_label_chars, 1))
+    if overshoot <= 1:
+        return DEFAULT_SCALE
+    scale = math.floor(DEFAULT_SCALE / math.sqrt(overshoot) / SCALE_STEP) * SCALE_STEP
+    return max(MIN_SCALE, scale)
+
+
+def image_filename(digest: str, scale: float) -> str:
+    """Name of a diagram's PNG (content hash, plus the scale when it was lowered)."""
+    suffix = '' if scale == DEFAULT_SCALE else f"_s{scale:g}"
+    return f"mermaid_{digest}{suffix}.png"
+
+
+def png_size(path: Path) -> Optional[Tuple[int, int]]:
+    """(width, height) from a PNG header, None if the file is not a PNG."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or not header.startswith(_PNG_SIGNATURE) or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+class DiagramReport:
+    """Collects the diagrams of one export and checks them against a budget."""
+
+    def __init__(self, budget: Optional[DiagramBudget] = None, output: Optional[Path] = None):
+        self.budget = budget or DiagramBudget()
+        self.output = output
+        self.diagrams: List[DiagramMetrics] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget.mode != 'off'
+
+    def scale_for(self, code: str) -> float:
+        """Render scale of a diagram under this report's budget."""
+        if not self.enabled:
+            return DEFAULT_SCALE
+        return render_scale(*analyze_diagram(code), self.budget)
+
+    def plan(self, block: Any, source: Optional[Any] = None) -> DiagramMetrics:
+        """Analyze a mermaid block (``MermaidBlock``) before rendering; picks its scale."""
+        nodes, edges, label_chars = analyze_diagram(block.code)
+        scale = render_scale(nodes, edges, label_chars, self.budget) if self.enabled else DEFAULT_SCALE
+        page, line = self.locate(block, source)
+        metrics = DiagramMetrics(page, block.index, line, block.digest, block.diagram_type,
+                                 nodes, edges, label_chars, scale)
+        budget = self.budget
+        limits = (('nodes', nodes, budget.max_nodes), ('edges', edges, budget.max_edges),
+                  ('label chars', label_chars, budget.max_label_chars))
+        for name, value, limit in limits if self.enabled else ():
+            if value > limit:
+                metrics.violations.append(f"{value} {name} > {limit}")
+        if scale < DEFAULT_SCALE:
+            logger.info(f"📉 {block.diagram_type} at {metrics.location} ({nodes} nodes, {edges} edges, "
+                        f"{label_chars} label chars): rendering at scale {scale:g}")
+        with self._lock:
+            self.diagrams.append(metrics)
+        return metrics
+
+    def locate(self, block: Any, source: Optional[Any]) -> Tuple[str, int]:
+        """Page (relative to docs/) and line of a block.
+
+        Combined chapters are rendered as one document; their diagrams are
+        located through the pages the asset index recorded them on.
+        """
+        index = get_asset_index()
+        if source is not None and str(source).endswith('.md'):
+            return index.source_key(source), block.line
+        location = index.diagram_location(block.digest)
+        if location:
+            return location
+        return str(source or '-'), block.line
+
+    def measure(self, metrics: DiagramMetrics, image_path: Any, duration: Optional[float] = None) -> None:
+        """Record the rendered PNG of a planned diagram and check its size budgets."""
+        path = Path(image_path)
+        size = png_size(path)
+        if size:
+            metrics.width, metrics.height = size
+        if path.exists():
+            metrics.bytes = path.stat().st_size
+        if duration is not None:
+            metrics.duration = round(duration, 3)
+        if not self.enabled:
+            return
+        if metrics.pixels and metrics.pixels > self.budget.max_pixels:
+            metrics.violations.append(f"{metrics.width}x{metrics.height} px > {self.budget.max_pixels / 1e6:g} MP")
+        if metrics.bytes and metrics.bytes > self.budget.max_bytes:
+            metrics.violations.append(f"{metrics.bytes / 1024:.0f} KB > {self.budget.max_bytes / 1024:.0f} KB")
+
+    @property
+    def over_budget(self) -> List[DiagramMetrics]:
+        return [metrics for metrics in self.diagrams if metrics.violations]
+
+    def pages(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per source page."""
+        pages: Dict[str, Dict[str, Any]] = {}
+        for metrics in self.diagrams:
+            page = pages.setdefault(metrics.source, {'diagrams': 0, 'nodes': 0, 'edges': 0, 'label_chars': 0,
+                                                     'pixels': 0, 'bytes': 0, 'over_budget': 0})
+            page['diagrams'] += 1
+            page['nodes'] += metrics.nodes
+            page['edges'] += metrics.edges
+            page['label_chars'] += metrics.label_chars
+            page['pixels'] += metrics.pixels or 0
+            page['bytes'] += metrics.bytes or 0
+            page['over_budget'] += bool(metrics.violations)
+        return pages
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'budget': asdict(self.budget),
+            'diagrams': [dict(asdict(metrics), pixels=metrics.pixels) for metrics in self.diagrams],
+            'pages': self.pages(),
+        }
+
+    def log_summary(self, pages: int = 10) -> None:
+        """Largest pages by output bytes (then elements) and every over-budget diagram."""
+        totals = self.pages()
+        if not totals:
+            return
+        ranked = sorted(totals.items(), key=lambda item: (item[1]['bytes'], item[1]['nodes'] + item[1]['edges']),
+                        reverse=True)
+        logger.info(f"📊 {len(self.diagrams)} diagram(s) on {len(totals)} page(s); largest pages:")
+        for source, page in ranked[:pages]:
+            logger.info(f"  {page['bytes'] / 1024:8.0f} KB {page['pixels'] / 1e6:6.1f} MP "
+                        f"{page['nodes']:5d} nodes {page['edges']:5d} edges {page['diagrams']:3d} diagram(s)  "
+                        f"{source}")
+        for metrics in self.over_budget:
+            logger.warning(f"⚠️ {metrics.diagram_type} at {metrics.location} is over budget: "
+                           f"{', '.join(metrics.violations)}")
+
+    def finish(self, pages: int = 10) -> bool:
+        """Log the summary and write the JSON report; False if over budget in fail mode."""
+        if not self.enabled or not self.diagrams:
+            return True
+        self.log_summary(pages)
+        if self.output:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            self.output.write_text(json.dumps(self.to_dict(), indent=2), encoding='utf-8')
+            logger.info(f"Diagram report written to {self.output}")
+        if self.over_budget and self.budget.mode == 'fail':
+            logger.error(f"✗ {len(self.over_budget)} diagram(s) over budget (--diagram-budget fail)")
+            return False
+        return True
+
+
+_report = DiagramReport()
+
+
+def get_diagram_report() -> DiagramReport:
+    return _report
+
+
+def configure_diagram_report(args: argparse.Namespace) -> DiagramReport:
+    """Set the process-wide report from the ``add_diagram_budget_arguments`` options."""
+    global _report
+    budget = DiagramBudget(max_nodes=args.max_diagram_nodes, max_edges=args.max_diagram_edges,
+                           max_label_chars=args.max_diagram_labels, max_pixels=args.max_diagram_pixels,
+                           max_bytes=args.max_diagram_kb * 1024, mode=args.diagram_budget)
+    # Resolved now: some exporters change to the project root later
+    _report = DiagramReport(budget, args.diagram_report.resolve() if args.diagram_report else None)
+    return _report
+
+
+def add_diagram_budget_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = DiagramBudget()
+    parser.add_argument('--diagram-budget', choices=BUDGET_MODES, default=defaults.mode,
+                        help="What an over-budget diagram does: warn, fail the export, or off "
+                             "(no analysis, no scale reduction)")
+    parser.add_argument('--max-diagram-nodes', type=int, default=defaults.max_nodes, metavar='N',
+                        help=f"Nodes per diagram before its scale is lowered (default: {defaults.max_nodes})")
+    parser.add_argument('--max-diagram-edges', type=int, default=defaults.max_edges, metavar='N',
+                        help=f"Edges per diagram before its scale is lowered (default: {defaults.max_edges})")
+    parser.add_argument('--max-diagram-labels', type=int, default=defaults.max_label_chars, metavar='CHARS',
+                        help=f"Label characters per diagram before its scale is lowered "
+                             f"(default: {defaults.max_label_chars})")
+    parser.add_argument('--max-diagram-pixels', type=int, default=defaults.max_pixels, metavar='PX',
+                        help=f"Rendered pixel area per diagram (default: {defaults.max_pixels})")
+    parser.add_argument('--max-diagram-kb', type=int, default=defaults.max_bytes // 1024, metavar='KB',
+                        help=f"Rendered PNG size per diagram (default: {defaults.max_bytes // 1024})")
+    parser.add_argument('--diagram-report', type=Path, metavar='FILE',
+                        help="Write the per-diagram and per-page measurements as JSON")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Report mermaid diagram complexity and check size budgets")
+    parser.add_argument('--pages', type=int, default=20, help="Number of pages listed (default: 20)")
+    add_diagram_budget_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    from asset_index import open_asset_index
+    from convert_docs_to_docx import extract_mermaid_blocks
+    from convert_docs_to_docx_by_chapter import MkDocsToDocxByChapterConverter
+
+    project_root = Path(__file__).resolve().parent.parent
+    report = configure_diagram_report(args)
+    if not report.enabled:
+        return 0
+    # Read-only: images recorded by earlier exports
+    index = open_asset_index(project_root)
+    converter = MkDocsToDocxByChapterConverter(project_root)
+    for files in converter.plan_chapters().values():
+        for file_path in files:
+            content = file_path.read_text(encoding='utf-8')
+            for block in extract_mermaid_blocks(content):
+                metrics = report.plan(block, file_path)
+                # Latest image an earlier export rendered at the planned scale
+                artifacts = index.data['diagrams'].get(block.digest, {}).get('artifacts', [])
+                for artifact in reversed(artifacts):
+                    path = project_root / artifact
+                    if path.exists() and path.name == image_filename(block.digest, metrics.scale):
+                        report.measure(metrics, path)
+                        break
+    return 0 if report.finish(args.pages) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Fast draft DOCX writer that bypasses pandoc.
+
+Review cycles only need headings, paragraphs, lists, code blocks, tables and
+images. This writer reads the exporters' preprocessed markdown (the output of
+``create_combined_markdown`` / ``combine_chapter_files``) line by line and
+streams ``word/document.xml`` straight into the zip, so memory stays constant
+whatever the document size. Only image paths and hyperlink targets are kept
+until the end, when the media parts and relationships are written.
+
+Styles come from ``scripts/reference.docx`` when it exists (pandoc style ids:
+Heading1..6, BodyText, Compact, SourceCode, VerbatimChar, Hyperlink, Table),
+otherwise from a small built-in stylesheet. There is no TOC field, section
+numbering or syntax highlighting.
+
+    python draft_docx.py combined.md -o draft.docx
+    python convert_docs_to_docx_by_chapter.py --draft      # docs/export/draft/
+"""
+
+import argparse
+import io
+import logging
+import re
+import struct
+import sys
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+EMU_PER_PIXEL = 9525  # at 96 dpi
+MAX_IMAGE_WIDTH = 6 * 914400  # 6 inches
+REFERENCE_PARTS = {
+    'word/styles.xml': 'application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml',
+    'word/theme/theme1.xml': 'application/vnd.openxmlformats-officedocument.theme+xml',
+    'word/fontTable.xml': 'application/vnd.openxmlformats-officedocument.wordprocessingml.fontTable+xml',
+}
+REL_TYPES = {
+    'word/styles.xml': 'styles',
+    'word/theme/theme1.xml': 'theme',
+    'word/fontTable.xml': 'fontTable',
+}
+IMAGE_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif'}
+
+_NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+       'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+       'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+       'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+       'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"')
+_REL_BASE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)(?:\s*\{#([\w-]+)[^}]*\})?\s*#*\s*$')
+_LIST_PATTERN = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+_RULE_PATTERN = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_IMAGE_LINE = re.compile(r'^\s*!\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)\s*$')
+_INLINE_PATTERN = re.compile(
+    r'(?P<code>(`+)(?P<code_text>.+?)\2)'
+    r'|\*\*(?P<bold>.+?)\*\*|__(?P<bold2>.+?)__'
+    r'|\*(?P<italic>[^*\s][^*]*?)\*|(?<!\w)_(?P<italic2>[^_\s][^_]*?)_(?!\w)'
+    r'|!\[(?P<image_alt>[^\]]*)\]\((?P<image>[^)\s]+)[^)]*\)'
+    r'|\[(?P<link_text>(?:[^\[\]]|\[[^\]]*\])*)\]\((?P<link>[^)\s]+)[^)]*\)'
+)
+
+DEFAULT_STYLES = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles {_NS}>
+<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:eastAsia="Calibri" w:cs="Calibri"/><w:sz w:val="22"/></w:rPr></w:rPrDefault>
+<w:pPrDefault><w:pPr><w:spacing w:after="120"/></w:pPr></w:pPrDefault></w:docDefaults>
+<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+<w:style w:type="paragraph" w:styleId="BodyText"><w:name w:val="Body Text"/><w:basedOn w:val="Normal"/></w:style>
+<w:style w:type="paragraph" w:styleId="Compact"><w:name w:val="Compact"/><w:basedOn w:val="BodyText"/><w:pPr><w:spacing w:after="36"/></w:pPr></w:style>
+<w:style w:type="paragraph" w:styleId="BlockText"><w:name w:val="Block Text"/><w:basedOn w:val="BodyText"/><w:pPr><w:ind w:left="480"/></w:pPr><w:rPr><w:i/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="SourceCode"><w:name w:val="Source Code"/><w:basedOn w:val="Normal"/><w:pPr><w:shd w:val="clear" w:fill="F8F8F8"/><w:spacing w:after="0"/></w:pPr><w:rPr><w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/><w:sz w:val="18"/></w:rPr></w:style>
+<w:style w:type="character" w:styleId="VerbatimChar"><w:name w:val="Verbatim Char"/><w:rPr><w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/><w:sz w:val="20"/></w:rPr></w:style>
+<w:style w:type="character" w:styleId="Hyperlink"><w:name w:val="Hyperlink"/><w:rPr><w:color w:val="4F81BD"/><w:u w:val="single"/></w:rPr></w:style>
+<w:style w:type="table" w:styleId="Table"><w:name w:val="Table"/><w:tblPr><w:tblBorders><w:top w:val="single" w:sz="4"/><w:bottom w:val="single" w:sz="4"/><w:insideH w:val="single" w:sz="2"/></w:tblBorders></w:tblPr></w:style>
+""" + ''.join(
+    f'<w:style w:type="paragraph" w:styleId="Heading{level}"><w:name w:val="heading {level}"/>'
+    f'<w:basedOn w:val="Normal"/><w:next w:val="BodyText"/><w:pPr><w:keepNext/><w:spacing w:before="240" w:after="80"/>'
+    f'<w:outlineLvl w:val="{level - 1}"/></w:pPr><w:rPr><w:b/><w:color w:val="345A8A"/><w:sz w:val="{size}"/></w:rPr></w:style>\n'
+    for level, size in zip(range(1, 7), (36, 32, 28, 26, 24, 22))
+) + "</w:styles>"
+
+
+@dataclass
+class DraftStats:
+    paragraphs: int = 0
+    tables: int = 0
+    images: int = 0
+    duration: float = 0.0
+
+
+_RUN_PROPERTY_ORDER = ('<w:rStyle', '<w:b/>', '<w:i/>')  # schema order inside w:rPr
+
+
+def _with(props: str, prop: str) -> str:
+    """Add a run property, keeping the schema order and a single rStyle."""
+    if prop in props or (prop.startswith('<w:rStyle') and '<w:rStyle' in props):
+        return props
+    parts = re.findall(r'<[^>]+/>', props) + [prop]
+    return ''.join(sorted(parts, key=lambda part: next(
+        (i for i, name in enumerate(_RUN_PROPERTY_ORDER) if part.startswith(name)), len(_RUN_PROPERTY_ORDER))))
+
+
+def image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """Pixel size from the PNG/GIF/JPEG header, or None if unreadable."""
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and len(head) >= 24:
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if not head.startswith(b'\xff\xd8'):
+            return None
+        f.seek(2)
+        while True:
+            marker = f.read(4)
+            if len(marker) < 4 or marker[0] != 0xff:
+                return None
+            length = struct.unpack('>H', marker[2:4])[0]
+            if 0xc0 <= marker[1] <= 0xcf and marker[1] not in (0xc4, 0xc8, 0xcc):
+                height, width = struct.unpack('>xHH', f.read(5))
+                return width, height
+            f.seek(length - 2, 1)
+
+
+def _text_run(text: str, props: str = '') -> str:
+    rpr = f"<w:rPr>{props}</w:rPr>" if props else ''
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+class DraftWriter:
+    """Streams markdown into the OOXML parts of one DOCX file."""
+
+    def __init__(self, output_path: Path, reference_doc: Optional[Path] = None,
+                 base_dir: Optional[Path] = None):
+        self.output_path = Path(output_path)
+        self.reference_doc = reference_doc if reference_doc and Path(reference_doc).exists() else None
+        self.base_dir = Path(base_dir) if base_dir else Path('.')
+        self.stats = DraftStats()
+        self._relationships: List[Tuple[str, str, str, bool]] = []  # (rId, type, target, external)
+        self._images: List[Tuple[str, Path]] = []  # (zip name, source path)
+        self._bookmark_id = 0
+
+    def _relationship(self, rel_type: str, target: str, external: bool = False) -> str:
+        rid = f"rId{len(self._relationships) + 10}"
+        self._relationships.append((rid, rel_type, target, external))
+        return rid
+
+    # Inline content
+
+    def _runs(self, text: str, props: str = '') -> str:
+        parts = []
+        position = 0
+        for match in _INLINE_PATTERN.finditer(text):
+            if match.start() > position:
+                parts.append(_text_run(text[position:match.start()], props))
+            position = match.end()
+            if match.group('code'):
+                parts.append(_text_run(match.group('code_text').strip(),
+                                       _with(props, '<w:rStyle w:val="VerbatimChar"/>')))
+            elif match.group('bold') or match.group('bold2'):
+                parts.append(self._runs(match.group('bold') or match.group('bold2'), _with(props, '<w:b/>')))
+            elif match.group('italic') or match.group('italic2'):
+                parts.append(self._runs(match.group('italic') or match.group('italic2'), _with(props, '<w:i/>')))
+            elif match.group('image') is not None:
+                parts.append(self._image(match.group('image'), match.group('image_alt')))
+            else:
+                parts.append(self._hyperlink(match.group('link_text'), match.group('link'), props))
+        if position < len(text):
+            parts.append(_text_run(text[position:], props))
+        return ''.join(parts)
+
+    def _hyperlink(self, text: str, target: str, props: str) -> str:
+        runs = self._runs(text, _with(props, '<w:rStyle w:val="Hyperlink"/>'))
+        if target.startswith('#'):
+            return f'<w:hyperlink w:anchor="{escape(target[1:])}">{runs}</w:hyperlink>'
+        rid = self._relationship('hyperlink', target, external=True)
+        return f'<w:hyperlink r:id="{rid}">{runs}</w:hyperlink>'
+
+    def _image(self, target: str, alt: str) -> str:
+        path = Path(target) if Path(target).is_absolute() else self.base_dir / target
+        suffix = path.suffix.lower()
+        if suffix not in IMAGE_TYPES or not path.is_file():
+            return _text_run(f"[{alt or 'image'}: {target}]", '<w:i/>')
+        try:
+            size = image_size(path)
+        except (OSError, struct.error):
+            size = None
+        if not size:
+            return _text_run(f"[{alt or 'image'}: {target}]", '<w:i/>')
+
+        width, height = size
+        cx, cy = width * EMU_PER_PIXEL, height * EMU_PER_PIXEL
+        if cx > MAX_IMAGE_WIDTH:
+            cx, cy = MAX_IMAGE_WIDTH, int(cy * MAX_IMAGE_WIDTH / cx)
+        self.stats.images += 1
+        name = f"media/image{self.stats.images}{suffix}"
+        self._images.append((f"word/{name}", path))
+        rid = self._relationship('image', name)
+        number = self.stats.images
+        return (f'<w:r><w:drawing><wp:inline><wp:extent cx="{cx}" cy="{cy}"/>'
+                f'<wp:docPr id="{number}" name="Picture {number}" descr="{escape(alt, {chr(34): "&quot;"})}"/>'
+                f'<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+                f'<pic:pic><pic:nvPicPr><pic:cNvPr id="{number}" name="{escape(path.name)}"/><pic:cNvPicPr/></pic:nvPicPr>'
+                f'<pic:blipFill><a:blip r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+                f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+                f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+                f'</a:graphicData></a:graphic></wp:inline></w:drawing></w:r>')
+
+    # Blocks
+
+    def _paragraph(self, content: str, style: Optional[str] = None, extra: str = '') -> str:
+        self.stats.paragraphs += 1
+        ppr = (f'<w:pStyle w:val="{style}"/>' if style else '') + extra
+        return f"<w:p>{f'<w:pPr>{ppr}</w:pPr>' if ppr else ''}{content}</w:p>\n"
+
+    def _heading(self, level: int, text: str, anchor: Optional[str]) -> str:
+        paragraph = self._paragraph(self._runs(text), f"Heading{level}")
+        if not anchor:
+            return paragraph
+        self._bookmark_id += 1
+        return (f'<w:bookmarkStart w:id="{self._bookmark_id}" w:name="{escape(anchor)}"/>'
+                f'{paragraph}<w:bookmarkEnd w:id="{self._bookmark_id}"/>\n')
+
+    def _table_row(self, line: str, header: bool = False) -> str:
+        cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+        props = '<w:b/>' if header else ''
+        xml = ''.join(f'<w:tc><w:p><w:pPr><w:pStyle w:val="Compact"/></w:pPr>{self._runs(cell, props)}</w:p></w:tc>'
+                      for cell in cells)
+        return f"<w:tr>{'<w:trPr><w:tblHeader/></w:trPr>' if header else ''}{xml}</w:tr>\n"
+
+    def blocks(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the XML of the body, one block at a time."""
+        paragraph: List[str] = []
+        pending_header: Optional[str] = None
+        in_fence = False
+        in_table = False
+
+        def flush_paragraph():
+            text = ' '.join(part.strip() for part in paragraph)
+            paragraph.clear()
+            return self._paragraph(self._runs(text), 'BodyText') if text else ''
+
+        for raw in lines:
+            line = raw.rstrip('\n')
+
+            if in_fence:
+                if _FENCE_PATTERN.match(line):
+                    in_fence = False
+                else:
+                    yield self._paragraph(_text_run(line), 'SourceCode')
+                continue
+
+            if in_table:
+                if line.strip().startswith('|'):
+                    yield self._table_row(line)
+                    continue
+                in_table = False
+                yield '</w:tbl>\n'
+
+            if pending_header is not None:
+                header, pending_header = pending_header, None
+                if _TABLE_SEPARATOR.match(line):
+                    self.stats.tables += 1
+                    in_table = True
+                    yield '<w:tbl><w:tblPr><w:tblStyle w:val="Table"/><w:tblW w:w="5000" w:type="pct"/></w:tblPr>\n'
+                    yield self._table_row(header, header=True)
+                    continue
+                paragraph.append(header)
+
+            stripped = line.strip()
+            if _FENCE_PATTERN.match(line):
+                yield flush_paragraph()
+                in_fence = True
+            elif not stripped:
+                yield flush_paragraph()
+            elif stripped.startswith('|'):
+                yield flush_paragraph()
+                pending_header = line
+            elif stripped == '\\newpage':
+                yield flush_paragraph()
+                yield '<w:p><w:r><w:br w:type="page"/></w:r></w:p>\n'
+            elif _HEADING_PATTERN.match(line):
+                yield flush_paragraph()
+                match = _HEADING_PATTERN.match(line)
+                yield self._heading(len(match.group(1)), match.group(2), match.group(3))
+            elif _RULE_PATTERN.match(line):
+                yield flush_paragraph()
+                yield self._paragraph('', extra='<w:pBdr><w:bottom w:val="single" w:sz="6" w:space="1"/></w:pBdr>')
+            elif _IMAGE_LINE.match(line):
+                yield flush_paragraph()
+                match = _IMAGE_LINE.match(line)
+                yield self._paragraph(self._image(match.group(2), match.group(1)), 'BodyText')
+            elif _LIST_PATTERN.match(line):
+                yield flush_paragraph()
+                indent, marker, text = _LIST_PATTERN.match(line).groups()
+                level = len(indent.expandtabs(4)) // 2
+                bullet = '• ' if marker in '-*+' else f"{marker} "
+                yield self._paragraph(_text_run(bullet) + self._runs(text), 'Compact',
+                                      f'<w:ind w:left="{360 * (level + 1)}" w:hanging="240"/>')
+            elif stripped.startswith('>'):
+                yield flush_paragraph()
+                yield self._paragraph(self._runs(stripped.lstrip('>').strip()), 'BlockText')
+            else:
+                paragraph.append(line)
+
+        if pending_header is not None:
+            paragraph.append(pending_header)
+        if in_table:
+            yield '</w:tbl>\n'
+        yield flush_paragraph()
+
+    # Package
+
+    def _reference_parts(self) -> List[Tuple[str, bytes]]:
+        if self.reference_doc is None:
+            return [('word/styles.xml', DEFAULT_STYLES.encode('utf-8'))]
+        with zipfile.ZipFile(self.reference_doc) as reference:
+            names = set(reference.namelist())
+            return [(name, reference.read(name)) for name in REFERENCE_PARTS if name in names]
+
+    def write(self, lines: Iterable[str], title: Optional[str] = None) -> DraftStats:
+        """Write the DOCX; ``lines`` is consumed once, as a stream."""
+        started = time.monotonic()
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(self.output_path, 'w', zipfile.ZIP_DEFLATED) as package:
+            with package.open('word/document.xml', 'w') as raw:
+                document = io.TextIOWrapper(raw, encoding='utf-8', write_through=False)
+                document.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                               f'<w:document {_NS}><w:body>\n')
+                for xml in self.blocks(lines):
+                    if xml:
+                        document.write(xml)
+                document.write('<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+                               '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" '
+                               'w:header="708" w:footer="708" w:gutter="0"/></w:sectPr>\n</w:body></w:document>')
+                document.flush()
+                document.detach()
+
+            for name, path in self._images:
+                package.write(path, name)
+
+            parts = self._reference_parts()
+            for name, data in parts:
+                package.writestr(name, data)
+            for name, _ in parts:
+                self._relationship(REL_TYPES[name], name[len('word/'):])
+
+            package.writestr('word/_rels/document.xml.rels', self._document_rels())
+            package.writestr('[Content_Types].xml', self._content_types([name for name, _ in parts]))
+            package.writestr('_rels/.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                f'<Relationship Id="rId1" Type="{_REL_BASE}/officeDocument" Target="word/document.xml"/>'
+                f'<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" '
+                f'Target="docProps/core.xml"/></Relationships>'))
+            package.writestr('docProps/core.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+                'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                f'<dc:title>{escape(title or self.output_path.stem)}</dc:title></cp:coreProperties>'))
+        self.stats.duration = time.monotonic() - started
+        return self.stats
+
+    def _document_rels(self) -> str:
+        rels = []
+        for rid, rel_type, target, external in self._relationships:
+            mode = ' TargetMode="External"' if external else ''
+            rels.append(f'<Relationship Id="{rid}" Type="{_REL_BASE}/{rel_type}" '
+                        f'Target="{escape(target, {chr(34): "&quot;"})}"{mode}/>')
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + ''.join(rels) + '</Relationships>')
+
+    def _content_types(self, parts: List[str]) -> str:
+        extensions = sorted({Path(name).suffix.lower() for name, _ in self._images})
+        defaults = ''.join(f'<Default Extension="{ext[1:]}" ContentType="{IMAGE_TYPES[ext]}"/>' for ext in extensions)
+        overrides = ''.join(f'<Override PartName="/{name}" ContentType="{REFERENCE_PARTS[name]}"/>' for name in parts)
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>' + defaults +
+                '<Override PartName="/word/document.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                '<Override PartName="/docProps/core.xml" '
+                'ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>' + overrides + '</Types>')
+
+
+def write_draft_docx(markdown_path: Path, output_path: Path, reference_doc: Optional[Path] = None,
+                     base_dir: Optional[Path] = None, title: Optional[str] = None) -> DraftStats:
+    """Stream a markdown file into a draft DOCX."""
+    writer = DraftWriter(output_path, reference_doc, base_dir)
+    with open(markdown_path, 'r', encoding='utf-8') as markdown:
+        return writer.write(markdown, title)
+
+
+def write_draft_docx_text(markdown: str, output_path: Path, reference_doc: Optional[Path] = None,
+                          base_dir: Optional[Path] = None, title: Optional[str] = None) -> DraftStats:
+    """Write a draft DOCX from markdown already in memory."""
+    return DraftWriter(output_path, reference_doc, base_dir).write(io.StringIO(markdown), title)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Write a draft DOCX from preprocessed markdown without pandoc")
+    parser.add_argument('markdown', type=Path, help="Markdown file (e.g. a chapter's combined.md)")
+    parser.add_argument('-o', '--output', type=Path, help="DOCX file (default: next to the markdown)")
+    parser.add_argument('--reference-doc', type=Path,
+                        default=Path(__file__).resolve().parent / 'reference.docx',
+                        help="DOCX whose styles are reused (default: scripts/reference.docx if present)")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    output = args.output or args.markdown.with_suffix('.docx')
+    try:
+        stats = write_draft_docx(args.markdown, output, args.reference_doc, args.markdown.parent)
+    except (OSError, zipfile.BadZipFile) as e:
+        logger.error(f"✗ {e}")
+        return 1
+    logger.info(f"✓ {output}: {stats.paragraphs} paragraphs, {stats.tables} tables, {stats.images} images "
+                f"in {stats.duration * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
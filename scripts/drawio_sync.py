@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Generate and sync the docs/export/*_advanced.drawio files from the Mermaid
+diagrams of the MkDocs pages.
+
+Each page with mermaid blocks gets one draw.io file holding one diagram page
+per block, with the mermaid source embedded as a ``mermaidData`` UserObject
+(draw.io renders and edits it with its Mermaid plugin). The diagrams are
+found with the same extraction pass as the DOCX exporter
+(``extract_mermaid_blocks``). A file is only rewritten when the hash of its
+embedded mermaid sources differs from the page; pages are processed in
+parallel.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from asset_index import get_asset_index, open_asset_index
+from convert_docs_to_docx import extract_mermaid_blocks, load_mkdocs_config
+from nav_select import filter_nav, parse_selectors, select_nav_paths, walk_nav
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DRAWIO_SUFFIX = '_advanced.drawio'
+DRAWIO_VERSION = '28.0.4'
+
+# Placeholder preview shown by draw.io until the Mermaid plugin re-renders the diagram
+PLACEHOLDER_IMAGE = (
+    'data:image/svg+xml,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48'
+    'cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI2Y5ZjlmOSIgc3Ryb2tlPSIjY2NjIi8+PHRleHQgeD0iMTAwIiB5PSIxMDAi'
+    'IHRleHQtYW5jaG9yPSJtaWRkbGUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzMzMyI+TWVybWFpZCBEaWFn'
+    'cmFtPC90ZXh0Pjwvc3ZnPg=='
+)
+
+DIAGRAM_PATTERN = re.compile(r'<diagram id="([^"]*)" name="([^"]*)">')
+USER_OBJECT_ID_PATTERN = re.compile(r'<UserObject label="[^"]*" mermaidData="[^"]*" id="([^"]*)">')
+MERMAID_DATA_PATTERN = re.compile(r'mermaidData="([^"]*)"')
+MXFILE_PATTERN = re.compile(r'<mxfile ([^>]*)>')
+
+
+@dataclass
+class SyncResult:
+    """Outcome of syncing one page."""
+    page: str
+    drawio_file: Path
+    status: str  # 'created', 'updated', 'unchanged' or 'stale' (check mode)
+    diagram_count: int
+
+
+def mermaid_hash(codes: List[str]) -> str:
+    """Hash of the ordered list of mermaid sources of a page."""
+    digest = hashlib.sha256()
+    for code in codes:
+        digest.update(code.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def read_embedded_mermaid(drawio_path: Path) -> Optional[List[str]]:
+    """Return the mermaid sources embedded in a draw.io file, or None if it does not exist."""
+    if not drawio_path.exists():
+        return None
+    content = drawio_path.read_text(encoding='utf-8')
+    codes = []
+    for raw in MERMAID_DATA_PATTERN.findall(content):
+        try:
+            codes.append(json.loads(html.unescape(raw)).get('data', ''))
+        except ValueError:
+            codes.append('')
+    return codes
+
+
+def diagram_page_names(page_stem: str, codes: List[str]) -> List[str]:
+    """Name each diagram page '<Page Title> <Diagram Kind>' with a counter for repeats."""
+    page_title = page_stem.replace('-', ' ').replace('_', ' ').title()
+    names = []
+    seen: Dict[str, int] = {}
+    for code in codes:
+        first_line = code.strip().split('\n')[0] if code.strip() else 'diagram'
+        kind = re.sub(r'[^\w\s]', ' ', first_line).title()
+        name = f"{page_title} {kind}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} {seen[name]}")
+    return names
+
+
+def xml_attr(value: str) -> str:
+    """Escape a value for a double-quoted XML attribute (draw.io style)."""
+    return escape(value, {'"': '&quot;'})
+
+
+def stable_id(*parts: str) -> str:
+    """Deterministic 16 hex digit draw.io id."""
+    return hashlib.md5(':'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def render_drawio(rel_path: str, page_stem: str, codes: List[str], existing: str = '') -> str:
+    """Build the draw.io XML for a page, keeping ids and header of an existing file."""
+    names = diagram_page_names(page_stem, codes)
+    existing_ids = {name: diagram_id for diagram_id, name in DIAGRAM_PATTERN.findall(existing)}
+    existing_object_ids = dict(zip((name for _, name in DIAGRAM_PATTERN.findall(existing)),
+                                   USER_OBJECT_ID_PATTERN.findall(existing)))
+
+    header = MXFILE_PATTERN.search(existing)
+    if header:
+        header_attrs = re.sub(r'pages="\d+"', f'pages="{len(codes)}"', header.group(1))
+    else:
+        header_attrs = (f'host="rh-ove-ecosystem" agent="drawio_sync.py" version="{DRAWIO_VERSION}" '
+                        f'pages="{len(codes)}"')
+
+    lines = [f'<mxfile {header_attrs}>']
+    for index, (name, code) in enumerate(zip(names, codes), 1):
+        diagram_id = existing_ids.get(name) or stable_id(rel_path, str(index), 'diagram')
+        object_id = existing_object_ids.get(name) or stable_id(rel_path, str(index), 'mermaid')
+        mermaid_data = json.dumps({'data': code}, separators=(',', ':'), ensure_ascii=False)
+        lines.extend([
+            f'  <diagram id="{diagram_id}" name="{xml_attr(name)}">',
+            '    <mxGraphModel dx="706" dy="604" grid="1" gridSize="10" guides="1" tooltips="1" connect="1" '
+            'arrows="1" fold="1" page="1" pageScale="1" pageWidth="827" pageHeight="1169" math="0" shadow="0">',
+            '      <root>',
+            '        <mxCell id="0" />',
+            '        <mxCell id="1" parent="0" />',
+            f'        <UserObject label="" mermaidData="{xml_attr(mermaid_data)}" id="{object_id}">',
+            '          <mxCell style="shape=image;noLabel=1;verticalAlign=top;imageAspect=1;'
+            f'image={PLACEHOLDER_IMAGE};" vertex="1" parent="1">',
+            '            <mxGeometry x="260" y="130" width="200" height="200" as="geometry" />',
+            '          </mxCell>',
+            '        </UserObject>',
+            '      </root>',
+            '    </mxGraphModel>',
+            '  </diagram>',
+        ])
+    lines.append('</mxfile>')
+    return '\n'.join(lines)
+
+
+def drawio_stems(rel_paths: List[str]) -> Dict[str, str]:
+    """Map page paths to draw.io file stems; clashing names get their directory as prefix."""
+    by_stem: Dict[str, List[str]] = {}
+    for rel_path in rel_paths:
+        by_stem.setdefault(Path(rel_path).stem, []).append(rel_path)
+
+    stems = {}
+    for stem, paths in by_stem.items():
+        for rel_path in paths:
+            if len(paths) == 1:
+                stems[rel_path] = stem
+            else:
+                stems[rel_path] = str(Path(rel_path).with_suffix('')).replace('/', '-')
+    return stems
+
+
+def page_mermaid_codes(docs_dir: Path, rel_path: str) -> List[str]:
+    """Extraction pass: the cleaned mermaid sources of a page (recorded in the asset index)."""
+    content = (docs_dir / rel_path).read_text(encoding='utf-8')
+    blocks = extract_mermaid_blocks(content)
+    get_asset_index().record_source(docs_dir / rel_path, content, blocks)
+    return [block.code for block in blocks]
+
+
+def sync_page(export_dir: Path, rel_path: str, stem: str, codes: List[str], check: bool) -> SyncResult:
+    """Create or update the draw.io file of one page if its diagrams changed."""
+    drawio_path = export_dir / f"{stem}{DRAWIO_SUFFIX}"
+    embedded = read_embedded_mermaid(drawio_path)
+    if embedded is not None and mermaid_hash(embedded) == mermaid_hash(codes):
+        return SyncResult(rel_path, drawio_path, 'unchanged', len(codes))
+
+    status = 'created' if embedded is None else 'updated'
+    if check:
+        return SyncResult(rel_path, drawio_path, 'stale', len(codes))
+
+    existing = drawio_path.read_text(encoding='utf-8') if embedded is not None else ''
+    tmp_path = drawio_path.with_suffix('.drawio.tmp')
+    tmp_path.write_text(render_drawio(rel_path, Path(rel_path).stem, codes, existing), encoding='utf-8')
+    os.replace(tmp_path, drawio_path)
+    return SyncResult(rel_path, drawio_path, status, len(codes))
+
+
+def index_drawio_file(result: SyncResult) -> None:
+    """Record the draw.io file as artifact of every diagram of its page."""
+    entry = get_asset_index().data['sources'].get(result.page, {})
+    for diagram in entry.get('diagrams', []):
+        get_asset_index().add_diagram_artifact(diagram['digest'], result.drawio_file)
+
+
+def sync_drawio_files(docs_dir: Path, export_dir: Path, rel_paths: List[str],
+                      jobs: Optional[int] = None, check: bool = False) -> List[SyncResult]:
+    """Sync the draw.io files of all given pages in parallel."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        # Extract diagrams of all pages first: file names depend on which pages have diagrams
+        page_codes = dict(zip(rel_paths, pool.map(lambda rel_path: page_mermaid_codes(docs_dir, rel_path),
+                                                  rel_paths)))
+        pages = [rel_path for rel_path in rel_paths if page_codes[rel_path]]
+        stems = drawio_stems(pages)
+        return list(pool.map(lambda rel_path: sync_page(export_dir, rel_path, stems[rel_path],
+                                                        page_codes[rel_path], check),
+                             pages))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Generate/sync draw.io files from Mermaid diagrams in the docs")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Only sync matching pages (nav:, glob: or tag: selectors)")
+    parser.add_argument('--jobs', type=int, default=None, help="Number of pages processed in parallel")
+    parser.add_argument('--check', action='store_true',
+                        help="Only report stale or missing files; exit 1 if any")
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).parent.parent
+    docs_dir = project_root / 'docs'
+    export_dir = docs_dir / 'export'
+
+    os.chdir(project_root)
+    nav = load_mkdocs_config().get('nav', [])
+    if args.selectors:
+        nav = filter_nav(nav, select_nav_paths(nav, args.selectors, docs_dir))
+
+    rel_paths = [rel_path for _, rel_path in walk_nav(nav) if (docs_dir / rel_path).exists()]
+    if not args.check:
+        asset_index = open_asset_index(project_root)
+    results = sync_drawio_files(docs_dir, export_dir, rel_paths, jobs=args.jobs, check=args.check)
+    if not args.check:
+        for result in results:
+            index_drawio_file(result)
+        asset_index.save()
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+        if result.status != 'unchanged':
+            logger.info(f"{result.status:>9}: {result.drawio_file.name} ({result.diagram_count} diagrams, {result.page})")
+
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    logger.info(f"✓ {len(results)} draw.io files checked: {summary or 'nothing to do'}")
+    return 1 if args.check and counts.get('stale') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Structured progress events for the exporters.
+
+With ``--events jsonl`` every exporter writes one JSON object per line to a
+file (``--events-file``) or to stdout, so CI can chart stage durations and
+cache-hit ratios without scraping the human readable output. When events go
+to stdout, human output is moved to stderr so the stream stays parseable.
+
+Event types:
+
+- run_started / run_finished    exporter name, success, duration
+- file_started                  source file (and nav title)
+- diagram_cache_hit             source, digest, image
+- diagram_rendered              source, digest, backend, duration, ok
+- stage_skipped                 chapter, stage (resumed from a checkpoint)
+- pandoc_started / pandoc_finished   document, duration, returncode, ok
+- chapter_done / document_done  chapter or document, output, size_bytes
+"""
+
+import argparse
+import atexit
+import json
+import sys
+import threading
+import time
+import uuid
+from typing import IO, Any, Optional
+
+EVENT_TYPES = (
+    'run_started', 'run_finished',
+    'file_started',
+    'diagram_cache_hit', 'diagram_rendered',
+    'stage_skipped',
+    'pandoc_started', 'pandoc_finished',
+    'chapter_done', 'document_done',
+)
+
+
+class EventStream:
+    """Thread-safe JSON-lines event writer; disabled when no output is set."""
+
+    def __init__(self, output: Optional[IO[str]] = None):
+        self.output = output
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.output is not None
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if self.output is None:
+            return
+        if event not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event}")
+        record = {'ts': round(time.time(), 3), 'run_id': self.run_id, 'event': event}
+        record.update(fields)
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with self._lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.output not in (None, sys.stdout, sys.__stdout__):
+                self.output.close()
+            self.output = None
+
+
+_stream = EventStream()
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Emit an event on the configured stream (no-op when events are off)."""
+    _stream.emit(event, **fields)
+
+
+def configure_events(mode: Optional[str], output_path: str = '-') -> EventStream:
+    """Enable the event stream for this process (closed at exit)."""
+    global _stream
+    _stream.close()
+    if mode != 'jsonl':
+        _stream = EventStream()
+        return _stream
+
+    if output_path == '-':
+        output = sys.stdout
+        # Keep stdout reserved for events; human output goes to stderr
+        sys.stdout = sys.stderr
+    else:
+        output = open(output_path, 'a', encoding='utf-8')
+    _stream = EventStream(output)
+    atexit.register(_stream.close)
+    return _stream
+
+
+def add_event_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --events/--events-file options to an exporter CLI."""
+    parser.add_argument('--events', choices=['jsonl'],
+                        help="Emit structured progress events (JSON lines)")
+    parser.add_argument('--events-file', default='-', metavar='PATH',
+                        help="Event output file (default: stdout)")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Export the built MkDocs site to PDF with headless Chromium.
+
+The ``pdf-export`` plugin prints every page with WeasyPrint, one after the
+other, inside ``mkdocs build``. This exporter works on an already built
+``site/`` instead. A pool of Playwright Chromium pages prints the pages
+concurrently, after their mermaid diagrams have rendered. The page PDFs are
+then merged in nav order into one PDF per chapter and one complete PDF, with
+a bookmark per chapter and page.
+
+Chapters are the same as in the DOCX export (top-level nav sections). Output
+goes to ``docs/export/pdf/``.
+
+    mkdocs build && python export_pdf.py
+    python export_pdf.py --only Architecture,Operations --workers 8
+"""
+
+import argparse
+import asyncio
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from convert_docs_to_docx_by_chapter import MkDocsToDocxByChapterConverter
+from export_events import add_event_arguments, configure_events, emit
+from profiling import add_profile_argument, configure_profiling, profile_stage
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+PAGE_TIMEOUT = 60_000  # ms, load plus diagram rendering
+PDF_OPTIONS = {
+    'format': 'A4',
+    'print_background': True,
+    'margin': {'top': '15mm', 'bottom': '15mm', 'left': '12mm', 'right': '12mm'},
+}
+# True once every mermaid block has been replaced by its SVG
+DIAGRAMS_RENDERED = """() => [...document.querySelectorAll('.mermaid')]
+    .every(element => element.querySelector('svg') || element.dataset.processed)"""
+
+
+@dataclass
+class PrintJob:
+    """One site page to print."""
+    chapter: str
+    title: str
+    source: Path
+    html: Path
+    pdf: Path
+
+
+def nav_titles(nav: Any, docs_dir: Path, titles: Optional[Dict[Path, str]] = None) -> Dict[Path, str]:
+    """Nav title of every page in the navigation."""
+    titles = {} if titles is None else titles
+    if isinstance(nav, list):
+        for item in nav:
+            nav_titles(item, docs_dir, titles)
+    elif isinstance(nav, dict):
+        for title, value in nav.items():
+            if isinstance(value, str):
+                titles[docs_dir / value] = title
+            else:
+                nav_titles(value, docs_dir, titles)
+    return titles
+
+
+def site_page(source: Path, docs_dir: Path, site_dir: Path, use_directory_urls: bool = True) -> Path:
+    """The HTML file MkDocs writes for a markdown page."""
+    relative = source.relative_to(docs_dir).with_suffix('')
+    if relative.name in ('index', 'README'):
+        return site_dir / relative.parent / 'index.html'
+    if use_directory_urls:
+        return site_dir / relative / 'index.html'
+    return site_dir / relative.with_suffix('.html')
+
+
+class SitePdfExporter:
+    """Prints the pages of a built site and merges them per chapter."""
+
+    def __init__(self, project_root: Path, site_dir: Optional[Path] = None, output_dir: Optional[Path] = None,
+                 workers: int = DEFAULT_WORKERS, only: Optional[List[str]] = None, complete: bool = True):
+        self.project_root = project_root
+        self.docs = MkDocsToDocxByChapterConverter(project_root, only=only)
+        self.config = self.docs.load_mkdocs_config()
+        self.site_dir = site_dir or project_root / self.config.get('site_dir', 'site')
+        self.output_dir = output_dir or project_root / 'docs' / 'export' / 'pdf'
+        self.workers = max(1, workers)
+        self.complete = complete
+        self.work_dir: Optional[Path] = None
+
+    def plan(self) -> Dict[str, List[PrintJob]]:
+        """Print jobs per chapter, in nav order; empty on error."""
+        chapters = self.docs.plan_chapters()
+        titles = nav_titles(self.config.get('nav', []), self.docs.docs_dir)
+        use_directory_urls = self.config.get('use_directory_urls', True)
+        self.work_dir = Path(tempfile.mkdtemp(prefix='pdf_pages_'))
+        planned = {}
+        missing = []
+        for chapter, files in chapters.items():
+            jobs = []
+            for number, source in enumerate(files):
+                html = site_page(source, self.docs.docs_dir, self.site_dir, use_directory_urls)
+                if not html.exists():
+                    missing.append(html)
+                    continue
+                title = titles.get(source) or source.stem.replace('-', ' ').title()
+                jobs.append(PrintJob(chapter, title, source, html, self.work_dir / chapter / f"{number:03d}.pdf"))
+            if jobs:
+                planned[chapter] = jobs
+        if missing:
+            logger.warning(f"{len(missing)} page(s) missing from {self.site_dir}, "
+                           f"run 'mkdocs build' first (e.g. {missing[0]})")
+        return planned
+
+    async def print_pages(self, jobs: List[PrintJob]) -> List[PrintJob]:
+        """Print all jobs on a pool of Chromium pages; returns the failed jobs."""
+        from playwright.async_api import async_playwright
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+        failed = []
+
+        async def worker(browser) -> None:
+            page = await browser.new_page()
+            await page.emulate_media(media='print')
+            try:
+                while not queue.empty():
+                    job = queue.get_nowait()
+                    if not await self.print_page(page, job):
+                        failed.append(job)
+            finally:
+                await page.close()
+
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch()
+            try:
+                await asyncio.gather(*(worker(browser) for _ in range(min(self.workers, len(jobs)))))
+            finally:
+                await browser.close()
+        return failed
+
+    async def print_page(self, page, job: PrintJob) -> bool:
+        emit('file_started', file=str(job.source), title=job.title)
+        started = time.monotonic()
+        try:
+            await page.goto(job.html.as_uri(), wait_until='networkidle', timeout=PAGE_TIMEOUT)
+            try:
+                await page.wait_for_function(DIAGRAMS_RENDERED, timeout=PAGE_TIMEOUT)
+            except Exception:
+                logger.warning(f"Diagrams of {job.html.relative_to(self.site_dir)} did not finish rendering")
+            job.pdf.parent.mkdir(parents=True, exist_ok=True)
+            await page.pdf(path=str(job.pdf), **PDF_OPTIONS)
+        except Exception as e:
+            logger.error(f"Failed to print {job.html.relative_to(self.site_dir)}: {e}")
+            return False
+        logger.info(f"  ✓ {job.chapter}/{job.title} ({time.monotonic() - started:.1f}s)")
+        return True
+
+    def merge(self, output: Path, sections: List[Tuple[str, List[PrintJob]]], nested: bool) -> None:
+        """Concatenate page PDFs with bookmarks (per chapter, then per page when nested)."""
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for chapter, jobs in sections:
+            parent = None
+            for job in jobs:
+                start = len(writer.pages)
+                writer.append(str(job.pdf), import_outline=False)
+                if nested and parent is None:
+                    parent = writer.add_outline_item(chapter.replace('-', ' '), start)
+                writer.add_outline_item(job.title, start, parent=parent)
+        writer.page_mode = '/UseOutlines'
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'wb') as f:
+            writer.write(f)
+        logger.info(f"✓ Created {output.name} ({output.stat().st_size / 1024 / 1024:.2f} MB, "
+                    f"{len(writer.pages)} pages)")
+
+    def output_file(self, chapter: Optional[str] = None) -> Path:
+        name = f"RH_OVE_{chapter}_Documentation.pdf" if chapter else "RH_OVE_Complete_Documentation.pdf"
+        return self.output_dir / name
+
+    def run(self) -> bool:
+        """Print and merge; True if every page was exported."""
+        if not self.site_dir.is_dir():
+            logger.error(f"No built site at {self.site_dir}, run 'mkdocs build' first")
+            return False
+        try:
+            with profile_stage('plan'):
+                chapters = self.plan()
+            if not chapters:
+                logger.error("No pages to print")
+                return False
+            jobs = [job for chapter_jobs in chapters.values() for job in chapter_jobs]
+            logger.info(f"Printing {len(jobs)} page(s) of {len(chapters)} chapter(s) "
+                        f"with {self.workers} worker(s)")
+
+            with profile_stage('print'):
+                failed = asyncio.run(self.print_pages(jobs))
+            printed = {chapter: [job for job in chapter_jobs if job not in failed]
+                       for chapter, chapter_jobs in chapters.items()}
+            with profile_stage('merge'):
+                for chapter, chapter_jobs in printed.items():
+                    if chapter_jobs:
+                        output = self.output_file(chapter)
+                        self.merge(output, [(chapter, chapter_jobs)], nested=False)
+                        emit('chapter_done', chapter=chapter, output=str(output), size_bytes=output.stat().st_size)
+                if self.complete and len(printed) > 1:
+                    output = self.output_file()
+                    self.merge(output, [item for item in printed.items() if item[1]], nested=True)
+                    emit('document_done', document='complete', output=str(output),
+                         size_bytes=output.stat().st_size)
+        finally:
+            if self.work_dir is not None:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+                self.work_dir = None
+
+        if failed:
+            logger.error(f"✗ {len(failed)} page(s) could not be printed")
+        logger.info(f"Output directory: {self.output_dir}")
+        return not failed
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Print the built MkDocs site to per-chapter and complete PDFs")
+    parser.add_argument('--site-dir', type=Path, help="Built site (default: site_dir of mkdocs.yml)")
+    parser.add_argument('--output-dir', type=Path, help="Output directory (default: docs/export/pdf)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent Chromium pages (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--only', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help="Comma-separated list of chapters to export, e.g. Architecture,Use-Cases")
+    parser.add_argument('--no-complete', action='store_true', help="Only write the per-chapter PDFs")
+    add_profile_argument(parser)
+    add_event_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    configure_events(args.events, args.events_file)
+    configure_profiling(args.profile, 'export_pdf', project_root)
+    exporter = SitePdfExporter(project_root, site_dir=args.site_dir, output_dir=args.output_dir,
+                               workers=args.workers, only=args.only, complete=not args.no_complete)
+    emit('run_started', exporter='export_pdf')
+    started = time.monotonic()
+    success = exporter.run()
+    emit('run_finished', exporter='export_pdf', success=success, duration=round(time.monotonic() - started, 3))
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
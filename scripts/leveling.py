@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Resource leveling of the workload plan.
+
+The phase blocks of the weekly allocation tables (see cost_model.plan_blocks)
+are moved in time to minimise the peak weekly load, or the over-allocation of
+personas beyond their headcount, subject to:
+
+- phase order within a project (a phase starts after its predecessor ends)
+- a start window per phase (default: planned start up to --max-delay weeks later)
+- optional finish-to-start dependencies between phases of different projects
+- a latest end week (default: the planned end week, so leveling never
+  lengthens the plan; a later ``--max-end-week`` lets it)
+
+The search is a local search over chain moves: moving a phase also moves every
+later phase of its project by the same number of weeks. Week loads, the sum
+of squared loads and the over-allocation are updated incrementally for the
+weeks a move touches, so plans with hundreds of phases level in seconds.
+
+    python leveling.py
+    python leveling.py --objective overallocation --max-delay 12
+    python leveling.py --max-end-week 68         # allow the plan to end later
+    python leveling.py --constraints leveling.yaml
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from cost_model import DAYS_PER_WEEK, PhaseBlock, plan_blocks
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ('peak', 'overallocation')
+MAX_PASSES = 50
+
+PhaseKey = Tuple[str, str]  # (sub-project, phase)
+
+
+@dataclass
+class LevelingConstraints:
+    """Windows and dependencies the leveled plan must respect."""
+    max_delay: int = 8
+    max_advance: int = 0
+    # (sub-project, phase) -> (earliest start week, latest start week)
+    windows: Dict[PhaseKey, Tuple[int, int]] = field(default_factory=dict)
+    # Finish-to-start: (predecessor, successor)
+    dependencies: List[Tuple[PhaseKey, PhaseKey]] = field(default_factory=list)
+    max_end_week: Optional[int] = None  # None: the planned end week
+
+
+@dataclass
+class LevelingResult:
+    planned_starts: List[int]
+    starts: List[int]
+    planned_peak: float
+    peak: float
+    planned_overallocation: float
+    overallocation: float
+    passes: int
+    duration: float
+
+
+class Leveler:
+    """Local search over phase start weeks with incremental load bookkeeping."""
+
+    def __init__(self, projects: List[str], personas: List[str], blocks: List[PhaseBlock],
+                 constraints: Optional[LevelingConstraints] = None,
+                 capacities: Optional[Dict[str, float]] = None):
+        self.projects = projects
+        self.personas = personas
+        self.blocks = blocks
+        self.constraints = constraints or LevelingConstraints()
+        self._objective = 'peak'
+        n = len(blocks)
+
+        self.length = [block.end - block.start + 1 for block in blocks]
+        self.load = [sum(block.days.values()) for block in blocks]
+        self.persona_days = [[(p, v) for p, v in block.days.items() if v] for block in blocks]
+
+        # Pooled capacity per persona: largest headcount seen in any column
+        self.capacity = array('d', [0.0]) * len(personas)
+        for block in blocks:
+            for persona, count in block.multipliers.items():
+                self.capacity[persona] = max(self.capacity[persona], count * DAYS_PER_WEEK)
+        for name, capacity in (capacities or {}).items():
+            if name in personas:
+                self.capacity[personas.index(name)] = capacity
+
+        # Windows and project chains (blocks of a project in planned order)
+        keys = [(projects[block.project], block.phase.lower()) for block in blocks]
+        windows = {(project, phase.lower()): window for (project, phase), window in self.constraints.windows.items()}
+        self.lo = [windows.get(key, (block.start - self.constraints.max_advance, 0))[0] for key, block in zip(keys, blocks)]
+        self.hi = [windows.get(key, (0, block.start + self.constraints.max_delay))[1] for key, block in zip(keys, blocks)]
+        self.lo = [max(1, lo) for lo in self.lo]
+
+        self.chain_after: List[List[int]] = [[] for _ in range(n)]
+        self.predecessor: List[Optional[int]] = [None] * n
+        by_project: Dict[int, List[int]] = {}
+        for index, block in enumerate(blocks):
+            by_project.setdefault(block.project, []).append(index)
+        for members in by_project.values():
+            members.sort(key=lambda b: blocks[b].start)
+            for position, b in enumerate(members):
+                self.chain_after[b] = members[position:]
+                self.predecessor[b] = members[position - 1] if position else None
+
+        key_index = {key: index for index, key in enumerate(keys)}
+        self.dependencies: List[Tuple[int, int]] = []
+        for (pred_project, pred_phase), (succ_project, succ_phase) in self.constraints.dependencies:
+            pred = key_index.get((pred_project, pred_phase.lower()))
+            succ = key_index.get((succ_project, succ_phase.lower()))
+            if pred is None or succ is None:
+                logger.warning(f"Ignoring dependency on unknown phase: {pred_project}/{pred_phase} -> "
+                               f"{succ_project}/{succ_phase}")
+                continue
+            self.dependencies.append((pred, succ))
+        self.dependents: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for pred, succ in self.dependencies:
+            self.dependents[pred].append((pred, succ))
+            self.dependents[succ].append((pred, succ))
+
+        # Extending the plan beyond its planned end is opt-in
+        self.max_end_week = self.constraints.max_end_week or max((block.end for block in blocks), default=0)
+        self.horizon = max([hi + length for hi, length in zip(self.hi, self.length)] +
+                           [block.end + 1 for block in blocks] + [self.max_end_week]) + 1
+
+    # -- incremental bookkeeping -------------------------------------------------
+
+    def _reset(self, starts: List[int]) -> None:
+        self.starts = list(starts)
+        self.total = array('d', [0.0]) * self.horizon
+        self.persona_load = [array('d', [0.0]) * self.horizon for _ in self.personas]
+        self.sumsq = 0.0
+        self.over = 0.0
+        for b in range(len(self.blocks)):
+            self._place(b, self.starts[b], 1)
+
+    def _place(self, b: int, start: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a block's load at the given start week."""
+        total = self.total
+        load = self.load[b] * sign
+        for week in range(start, start + self.length[b]):
+            old = total[week]
+            new = old + load
+            total[week] = new
+            self.sumsq += new * new - old * old
+        for persona, days in self.persona_days[b]:
+            series = self.persona_load[persona]
+            capacity = self.capacity[persona]
+            days *= sign
+            for week in range(start, start + self.length[b]):
+                old = series[week]
+                new = old + days
+                series[week] = new
+                self.over += max(0.0, new - capacity) - max(0.0, old - capacity)
+
+    def _move_chain(self, b: int, delta: int) -> None:
+        for m in self.chain_after[b]:
+            self._place(m, self.starts[m], -1)
+            self.starts[m] += delta
+            self._place(m, self.starts[m], 1)
+
+    def objective(self) -> Tuple[float, ...]:
+        peak = max(self.total)
+        shift = sum(abs(s - block.start) for s, block in zip(self.starts, self.blocks))
+        if self._objective == 'overallocation':
+            return (round(self.over, 6), peak, round(self.sumsq, 6), shift)
+        return (peak, round(self.over, 6), round(self.sumsq, 6), shift)
+
+    # -- feasibility -------------------------------------------------------------
+
+    def _feasible(self, b: int, delta: int) -> bool:
+        starts = self.starts
+        pred = self.predecessor[b]
+        if pred is not None and starts[b] + delta <= starts[pred] + self.length[pred] - 1:
+            return False
+        moved = self.chain_after[b]
+        for m in moved:
+            new_start = starts[m] + delta
+            if not self.lo[m] <= new_start <= self.hi[m]:
+                return False
+            if new_start + self.length[m] - 1 > self.max_end_week:
+                return False
+        moved_set = set(moved)
+        for m in moved:
+            for pred_block, succ_block in self.dependents[m]:
+                pred_start = starts[pred_block] + (delta if pred_block in moved_set else 0)
+                succ_start = starts[succ_block] + (delta if succ_block in moved_set else 0)
+                if succ_start <= pred_start + self.length[pred_block] - 1:
+                    return False
+        return True
+
+    # -- search ------------------------------------------------------------------
+
+    def level(self, objective: str = 'peak', time_limit: float = 30.0) -> LevelingResult:
+        """Improve the plan until no chain move helps (or the time limit is hit)."""
+        self._objective = objective
+        started = time.monotonic()
+        planned = [block.start for block in self.blocks]
+        self._reset(planned)
+        planned_peak, planned_over = max(self.total), self.over
+
+        best = self.objective()
+        passes = 0
+        improved = True
+        while improved and passes < MAX_PASSES and time.monotonic() - started < time_limit:
+            improved = False
+            passes += 1
+            for b in range(len(self.blocks)):
+                best_delta = 0
+                for new_start in range(self.lo[b], self.hi[b] + 1):
+                    delta = new_start - self.starts[b]
+                    if delta == 0 or not self._feasible(b, delta):
+                        continue
+                    self._move_chain(b, delta)
+                    score = self.objective()
+                    self._move_chain(b, -delta)
+                    if score < best:
+                        best, best_delta = score, delta
+                if best_delta:
+                    self._move_chain(b, best_delta)
+                    improved = True
+
+        return LevelingResult(planned, list(self.starts), planned_peak, max(self.total),
+                              planned_over, self.over, passes, time.monotonic() - started)
+
+    # -- output ------------------------------------------------------------------
+
+    def end_week(self, starts: List[int]) -> int:
+        """Last week with a phase of the plan."""
+        return max(start + length - 1 for start, length in zip(starts, self.length))
+
+    def weekly_loads(self, starts: List[int]) -> Tuple[array, List[array]]:
+        self._reset(starts)
+        return array('d', self.total), [array('d', series) for series in self.persona_load]
+
+    def sheets(self, result: LevelingResult) -> Dict[str, List[List]]:
+        """Leveled plan, weekly load and summary sheets for the workload workbook."""
+        plan_rows = [['Sub-Project', 'Phase', 'Planned Weeks', 'Leveled Weeks', 'Shift (Weeks)']]
+        for b, block in enumerate(self.blocks):
+            start = result.starts[b]
+            plan_rows.append([self.projects[block.project], block.phase, f"{block.start}-{block.end}",
+                              f"{start}-{start + self.length[b] - 1}", start - block.start])
+
+        planned_total, _ = self.weekly_loads(result.planned_starts)
+        leveled_total, leveled_personas = self.weekly_loads(result.starts)
+        last_week = max(week for week in range(self.horizon) if planned_total[week] or leveled_total[week])
+        load_rows = [['Week', 'Planned Load (Days)', 'Leveled Load (Days)'] + self.personas]
+        for week in range(1, last_week + 1):
+            load_rows.append([week, planned_total[week], leveled_total[week]] +
+                             [series[week] for series in leveled_personas])
+
+        summary_rows = [
+            ['Metric', 'Planned', 'Leveled'],
+            ['Peak Weekly Load (Days)', result.planned_peak, result.peak],
+            ['Peak Week', max(range(self.horizon), key=planned_total.__getitem__),
+             max(range(self.horizon), key=leveled_total.__getitem__)],
+            ['Over-allocated Persona-Days', round(result.planned_overallocation, 2), round(result.overallocation, 2)],
+            ['End Week', self.end_week(result.planned_starts), self.end_week(result.starts)],
+        ]
+        return {'Leveled Plan': plan_rows, 'Leveled Weekly Load': load_rows, 'Leveling Summary': summary_rows}
+
+
+def load_constraints(path: Path) -> LevelingConstraints:
+    """Load leveling constraints from YAML.
+
+    max_delay: 8
+    max_end_week: 64
+    windows: {"Migration from VMware/Implementation": [37, 45]}
+    dependencies:
+      - ["RH OVE Infrastructure/Testing", "Migration from VMware/Implementation"]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+
+    def phase_key(value: str) -> PhaseKey:
+        project, _, phase = value.partition('/')
+        return project.strip(), phase.strip()
+
+    return LevelingConstraints(
+        max_delay=int(config.get('max_delay', 8)),
+        max_advance=int(config.get('max_advance', 0)),
+        windows={phase_key(key): (int(lo), int(hi)) for key, (lo, hi) in (config.get('windows') or {}).items()},
+        dependencies=[(phase_key(pred), phase_key(succ)) for pred, succ in config.get('dependencies') or []],
+        max_end_week=config.get('max_end_week'),
+    )
+
+
+def level_plan(sheets: Dict[str, List[List]], constraints: Optional[LevelingConstraints] = None,
+               objective: str = 'peak') -> Tuple[Leveler, LevelingResult]:
+    """Level the plan of the weekly allocation sheets."""
+    projects, personas, blocks = plan_blocks(sheets)
+    leveler = Leveler(projects, personas, blocks, constraints)
+    return leveler, leveler.level(objective)
+
+
+def synthetic_plan(phase_count: int, seed: int = 1) -> Tuple[List[str], List[str], List[PhaseBlock]]:
+    """Random plan of five-phase projects, for benchmarking."""
+    rng = random.Random(seed)
+    personas = [f"Persona {i}" for i in range(20)]
+    projects, blocks = [], []
+    while len(blocks) < phase_count:
+        projects.append(f"Project {len(projects) + 1}")
+        week = rng.randint(1, 100)
+        for phase in ('Study', 'Design', 'Implementation', 'Testing', 'Day-2 Ops')[:phase_count - len(blocks)]:
+            length = rng.randint(2, 12)
+            staff = rng.sample(range(len(personas)), 4)
+            blocks.append(PhaseBlock(len(projects) - 1, phase, week, week + length - 1,
+                                     {p: float(rng.choice((2.5, 5, 10))) for p in staff},
+                                     {p: 2 for p in staff}))
+            week += length
+    return projects, personas, blocks
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Level the workload plan by shifting phase start weeks")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='peak',
+                        help="Minimise the peak weekly load or the persona over-allocation (default: peak)")
+    parser.add_argument('--max-delay', type=int, default=None, help="Latest start = planned start + N weeks")
+    parser.add_argument('--max-end-week', type=int, default=None,
+                        help="Latest week a phase may end in (default: the planned end week; "
+                             "a later week lets leveling extend the plan)")
+    parser.add_argument('--constraints', type=Path, help="YAML file with windows and dependencies")
+    parser.add_argument('--benchmark', type=int, metavar='PHASES', help="Level a random plan with N phases")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    constraints = load_constraints(args.constraints) if args.constraints else LevelingConstraints()
+    if args.max_delay is not None:
+        constraints.max_delay = args.max_delay
+    if args.max_end_week is not None:
+        constraints.max_end_week = args.max_end_week
+
+    if args.benchmark:
+        leveler = Leveler(*synthetic_plan(args.benchmark), constraints)
+    else:
+        from export_workload_to_xlsx import parse_markdown_tables
+        project_root = Path(__file__).resolve().parent.parent
+        sheets = parse_markdown_tables(project_root / 'docs' / 'project-plan' / 'weekly-charge-breakdown.md')
+        leveler = Leveler(*plan_blocks(sheets), constraints)
+    result = leveler.level(args.objective)
+
+    if not args.benchmark:
+        for row in leveler.sheets(result)['Leveled Plan'][1:]:
+            if row[4]:
+                print(f"  {row[0]} / {row[1]}: weeks {row[2]} -> {row[3]} (+{row[4]})")
+    logger.info(f"✓ Peak weekly load {result.planned_peak:g} -> {result.peak:g} days, "
+                f"over-allocation {result.planned_overallocation:g} -> {result.overallocation:g} persona-days, "
+                f"end week {leveler.end_week(result.planned_starts)} -> {leveler.end_week(result.starts)} "
+                f"({len(leveler.blocks)} phases, {result.passes} passes, {result.duration:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Heading anchor and page index for cross-document link rewriting.
+
+When several pages are combined into one DOCX, links such as
+``../architecture/network.md#cilium`` no longer point anywhere. The index is
+built in one pass over the exported pages and records, per page, a bookmark id
+for the page itself and for every heading (using the MkDocs ``toc`` slugs, so
+existing ``#fragment`` links resolve). The rewrite pass then:
+
+- gives every heading an explicit ``{#id}`` pandoc attribute
+- rewrites links to exported pages/headings into ``#id`` internal links
+- reports dangling links (missing page, missing anchor, page not exported)
+  and turns them into plain text
+
+Both passes are fence-aware and linear in the size of the documents. Ids use
+only ``[a-z0-9_]`` and at most 40 characters, so they are valid Word bookmark
+names.
+
+    python link_index.py                  # check every nav page, exit 1 on dangling links
+    python link_index.py --select glob:architecture
+"""
+
+import argparse
+import logging
+import posixpath
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+MAX_BOOKMARK_LENGTH = 40
+
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*(?:\{:?\s*#([\w-]+)[^}]*\})?\s*$')
+_LINK_PATTERN = re.compile(r'(?<!!)\[((?:[^\[\]]|\[[^\]]*\])*)\]\(\s*([^)\s]+)((?:\s+"[^"]*")?)\s*\)')
+_REFERENCE_PATTERN = re.compile(r'^(\s{0,3}\[[^\]^][^\]]*\]:\s*)(\S+)(.*)$')
+_INLINE_CODE_PATTERN = re.compile(r'(`+)(.+?)\1')
+_SCHEME_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+
+
+def slugify(text: str) -> str:
+    """MkDocs/Python-Markdown toc slug of a heading text."""
+    text = re.sub(r'\[([^\]]*)\]\([^)]*\)', r'\1', text)  # links -> their text
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace('`', '').replace('*', '')
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r'[^\w\s-]', '', text).strip().lower()
+    return re.sub(r'[-\s]+', '-', text)
+
+
+@dataclass
+class DanglingLink:
+    """A link that does not resolve inside the exported document."""
+    source: str
+    line: int
+    target: str
+    reason: str
+
+
+class LinkIndex:
+    """Bookmark ids of the pages and headings of one exported document."""
+
+    def __init__(self, known_pages: Optional[Iterable[str]] = None):
+        # Pages of the site (exported or not), to tell 'not exported' from 'missing'
+        self.known_pages: Set[str] = set(known_pages or [])
+        self.pages: Dict[str, str] = {}
+        self.anchors: Dict[Tuple[str, str], str] = {}
+        self.headings: Dict[str, List[str]] = {}
+        self.dangling: List[DanglingLink] = []
+        self._used_ids: Set[str] = set()
+        self._links: List[Tuple[str, int, str]] = []
+
+    def _bookmark(self, *parts: str) -> str:
+        """Unique Word-compatible bookmark id."""
+        base = re.sub(r'[^a-z0-9]+', '_', '_'.join(parts).lower()).strip('_') or 'section'
+        if not base[0].isalpha():
+            base = 'p_' + base
+        candidate = base[:MAX_BOOKMARK_LENGTH]
+        counter = 1
+        while candidate in self._used_ids:
+            suffix = f"_{counter}"
+            candidate = base[:MAX_BOOKMARK_LENGTH - len(suffix)] + suffix
+            counter += 1
+        self._used_ids.add(candidate)
+        return candidate
+
+    def add_page(self, rel_path: str, content: str) -> str:
+        """Index the page and its headings; returns the page bookmark id."""
+        page_id = self._bookmark(str(Path(rel_path).with_suffix('')))
+        self.pages[rel_path] = page_id
+        self.known_pages.add(rel_path)
+        seen: Dict[str, int] = {}
+        ids = []
+        for number, line, heading, in_fence in _iter_lines(content):
+            if in_fence:
+                continue
+            for target in _line_targets(heading[1] if heading else line):
+                self._links.append((rel_path, number, target))
+            if heading:
+                _, text, explicit = heading
+                slug = explicit or slugify(text)
+                # Repeated headings get '_1', '_2', ... like the MkDocs toc extension
+                if slug in seen:
+                    seen[slug] += 1
+                    slug = f"{slug}_{seen[slug]}"
+                else:
+                    seen[slug] = 0
+                bookmark = self._bookmark(page_id, slug)
+                self.anchors[(rel_path, slug)] = bookmark
+                ids.append(bookmark)
+        self.headings[rel_path] = ids
+        return page_id
+
+    def page_id(self, rel_path: str) -> Optional[str]:
+        return self.pages.get(rel_path)
+
+    def resolve(self, source: str, target: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (bookmark, None) for an internal target, (None, reason) if dangling,
+        or (None, None) for links that are not rewritten (external, non-markdown)."""
+        if _SCHEME_PATTERN.match(target) or target.startswith('//'):
+            return None, None
+        path, _, fragment = target.partition('#')
+        if path:
+            if not path.endswith('.md') and not path.endswith('/'):
+                return None, None
+            rel_path = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+            if rel_path.endswith('/') or not rel_path.endswith('.md'):
+                rel_path = posixpath.join(rel_path, 'index.md')
+        else:
+            rel_path = source
+
+        if rel_path not in self.pages:
+            return None, 'page not exported' if rel_path in self.known_pages else 'missing page'
+        if not fragment:
+            return self.pages[rel_path], None
+        bookmark = self.anchors.get((rel_path, fragment))
+        if bookmark is None:
+            return None, 'missing anchor'
+        return bookmark, None
+
+    def check(self) -> List[DanglingLink]:
+        """Validate every link recorded while indexing (original line numbers)."""
+        self.dangling = []
+        for source, line, target in self._links:
+            _, reason = self.resolve(source, target)
+            if reason:
+                self.dangling.append(DanglingLink(source, line, target, reason))
+        return self.dangling
+
+    def rewrite(self, rel_path: str, content: str) -> str:
+        """Add heading ids and turn links into internal bookmarks (or plain text)."""
+        ids = iter(self.headings.get(rel_path, []))
+        lines = []
+        for _, line, heading, in_fence in _iter_lines(content):
+            if in_fence:
+                lines.append(line)
+            elif heading:
+                hashes, text, _ = heading
+                bookmark = next(ids, None)
+                text = self._rewrite_line(rel_path, text)
+                lines.append(f"{hashes} {text} {{#{bookmark}}}" if bookmark else line)
+            else:
+                lines.append(self._rewrite_line(rel_path, line))
+        return '\n'.join(lines)
+
+    def _rewrite_line(self, rel_path: str, line: str) -> str:
+        if '](' not in line and ']:' not in line:
+            return line
+
+        def replace_link(match):
+            text, target, title = match.group(1), match.group(2), match.group(3)
+            bookmark, reason = self.resolve(rel_path, target)
+            if bookmark:
+                return f"[{text}](#{bookmark}{title})"
+            return text if reason else match.group(0)
+
+        reference = _REFERENCE_PATTERN.match(line)
+        if reference:
+            bookmark, _ = self.resolve(rel_path, reference.group(2))
+            return f"{reference.group(1)}#{bookmark}{reference.group(3)}" if bookmark else line
+
+        # Leave inline code untouched
+        parts = []
+        position = 0
+        for code in _INLINE_CODE_PATTERN.finditer(line):
+            parts.append(_LINK_PATTERN.sub(replace_link, line[position:code.start()]))
+            parts.append(code.group(0))
+            position = code.end()
+        parts.append(_LINK_PATTERN.sub(replace_link, line[position:]))
+        return ''.join(parts)
+
+
+def _iter_lines(content: str):
+    """Yield (line number, line, heading match groups or None, inside a code fence)."""
+    in_fence = False
+    for number, line in enumerate(content.split('\n'), 1):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            yield number, line, None, True
+            continue
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        yield number, line, (match.group(1), match.group(2), match.group(3)) if match else None, in_fence
+
+
+def _line_targets(line: str) -> List[str]:
+    """Link targets of a line outside inline code."""
+    if '](' not in line and ']:' not in line:
+        return []
+    reference = _REFERENCE_PATTERN.match(line)
+    if reference:
+        return [reference.group(2)]
+    text = _INLINE_CODE_PATTERN.sub('', line)
+    return [match.group(2) for match in _LINK_PATTERN.finditer(text)]
+
+
+def build_link_index(pages: Iterable[Tuple[str, str]], known_pages: Optional[Iterable[str]] = None) -> LinkIndex:
+    """Index (rel_path, content) pages in document order."""
+    index = LinkIndex(known_pages)
+    for rel_path, content in pages:
+        index.add_page(rel_path, content)
+    return index
+
+
+def docs_pages(docs_dir: Path) -> List[str]:
+    """Every markdown page below docs/, relative to it."""
+    return [path.relative_to(docs_dir).as_posix() for path in docs_dir.rglob('*.md')]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    from nav_select import parse_selectors
+
+    parser = argparse.ArgumentParser(description="Check the links between the documentation pages")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Only check matching pages (nav:, glob: or tag: selectors)")
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main() -> int:
+    """Main entry point."""
+    import os
+    from convert_docs_to_docx import load_mkdocs_config
+    from nav_select import filter_nav, select_nav_paths, walk_nav
+
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    docs_dir = project_root / 'docs'
+    os.chdir(project_root)
+
+    nav = load_mkdocs_config().get('nav', [])
+    if args.selectors:
+        nav = filter_nav(nav, select_nav_paths(nav, args.selectors, docs_dir))
+    rel_paths = [rel_path for _, rel_path in walk_nav(nav) if (docs_dir / rel_path).exists()]
+
+    index = build_link_index(((rel_path, (docs_dir / rel_path).read_text(encoding='utf-8')) for rel_path in rel_paths),
+                             docs_pages(docs_dir))
+    dangling = index.check()
+    for link in dangling:
+        print(f"{link.source}:{link.line}: {link.reason}: {link.target}")
+    logger.info(f"✓ {len(rel_paths)} pages, {len(index.anchors)} anchors, {len(index._links)} links checked, "
+                f"{len(dangling)} dangling")
+    return 1 if dangling else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Long-lived mermaid-cli container for the Docker render path.
+
+``docker run --rm minlag/mermaid-cli`` per diagram pays container create,
+start and teardown and a fresh bind mount every time. This backend starts one
+named container per export session with a shared work directory mounted at
+``/data``, renders each diagram with ``docker exec ... mmdc`` and removes the
+container at exit. Containers left behind by a killed session are recognised
+by their label and removed by the next session on the same host.
+
+If the container cannot be started, the exporters fall back to one
+``docker run`` per diagram.
+
+    python mermaid_container.py --check      # start a container, render a test diagram
+"""
+
+import argparse
+import asyncio
+import atexit
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import uuid
+import weakref
+from pathlib import Path
+from typing import Optional
+
+from async_exec import ToolExecutor
+from diagram_report import DEFAULT_SCALE
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+IMAGE = 'minlag/mermaid-cli'
+# Entry point of the image, called directly since the container runs an idle loop
+MMDC = ['/home/mermaidcli/node_modules/.bin/mmdc', '-p', '/puppeteer-config.json']
+LABEL = 'rh-ove-export.mermaid'
+START_TIMEOUT = 120  # includes pulling the image on a fresh agent
+RENDER_TIMEOUT = 60
+
+
+class MermaidContainerError(Exception):
+    """The render container could not be started."""
+
+
+class MermaidContainer:
+    """A running mermaid-cli container and its shared work directory."""
+
+    def __init__(self, image: str = IMAGE):
+        self.image = image
+        self.name = f"mermaid-render-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.work_dir: Optional[Path] = None
+        self.running = False
+
+    async def start(self, executor: ToolExecutor) -> None:
+        """Start the container; renders are then ``docker exec`` calls."""
+        await self._remove_stale(executor)
+        self.work_dir = Path(tempfile.mkdtemp(prefix='mermaid_work_'))
+        cmd = [
+            'docker', 'run', '-d', '--rm', '--name', self.name,
+            '--label', f"{LABEL}={socket.gethostname()}:{os.getpid()}",
+            '-u', f"{os.getuid()}:{os.getgid()}",
+            '-v', f"{self.work_dir}:/data",
+            '--entrypoint', 'tail',
+            self.image, '-f', '/dev/null',
+        ]
+        result = await executor.run(cmd, timeout=START_TIMEOUT, capture_stdout=True)
+        if not result.ok:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+            reason = 'timed out' if result.timed_out else result.stderr.strip() or f"exit code {result.returncode}"
+            raise MermaidContainerError(f"could not start {self.image}: {reason}")
+        self.running = True
+        atexit.register(self.stop)
+        logger.info(f"✓ mermaid-cli container {self.name} started")
+
+    async def _remove_stale(self, executor: ToolExecutor) -> None:
+        """Remove containers of earlier sessions on this host whose process is gone."""
+        result = await executor.run(
+            ['docker', 'ps', '--filter', f"label={LABEL}",
+             '--format', f'{{{{.ID}}}} {{{{.Label "{LABEL}"}}}}'],
+            timeout=10, capture_stdout=True)
+        if not result.ok:
+            return
+        host = socket.gethostname()
+        for line in result.stdout.splitlines():
+            container_id, _, owner = line.partition(' ')
+            owner_host, _, pid = owner.rpartition(':')
+            if owner_host != host or not pid.isdigit() or _process_alive(int(pid)):
+                continue
+            logger.info(f"Removing stale mermaid-cli container {container_id}")
+            await executor.run(['docker', 'rm', '-f', container_id], timeout=30)
+
+    async def render(self, mermaid_code: str, output_path: str, executor: ToolExecutor,
+                     scale: float = DEFAULT_SCALE) -> bool:
+        """Render one diagram through ``docker exec``; True if the PNG was written."""
+        job = uuid.uuid4().hex
+        source = self.work_dir / f"{job}.mmd"
+        target = self.work_dir / f"{job}.png"
+        source.write_text(mermaid_code, encoding='utf-8')
+        try:
+            cmd = ['docker', 'exec', self.name, *MMDC,
+                   '-i', f"/data/{source.name}", '-o', f"/data/{target.name}",
+                   '-b', 'white', '--scale', f"{scale:g}"]
+            result = await executor.run(cmd, timeout=RENDER_TIMEOUT, tool='docker-exec')
+            if result.ok and target.exists():
+                shutil.move(str(target), output_path)
+                return True
+            if result.ok:
+                print("    ⚠️ Docker succeeded but no output file created (likely syntax error)")
+            else:
+                stderr_msg = result.stderr.strip() or "Unknown error"
+                print(f"    ⚠️ docker exec failed (code {result.returncode}): {stderr_msg}")
+            return False
+        finally:
+            source.unlink(missing_ok=True)
+            target.unlink(missing_ok=True)
+
+    def stop(self) -> None:
+        if self.running:
+            subprocess.run(['docker', 'rm', '-f', self.name], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=30)
+            self.running = False
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_container: Optional[MermaidContainer] = None
+_container_failed = False
+_container_locks = weakref.WeakKeyDictionary()  # per event loop: exporters may call asyncio.run more than once
+
+
+async def get_mermaid_container(executor: ToolExecutor) -> Optional[MermaidContainer]:
+    """The session's container (started on first use), or None to use ``docker run``."""
+    global _container, _container_failed
+    lock = _container_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+    async with lock:
+        if _container is None and not _container_failed:
+            container = MermaidContainer()
+            try:
+                await container.start(executor)
+            except MermaidContainerError as e:
+                _container_failed = True
+                logger.info(f"mermaid-cli container unavailable ({e}), using docker run per diagram")
+            else:
+                _container = container
+        return _container
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check the long-lived mermaid-cli container backend")
+    parser.add_argument('--check', action='store_true', help="Start a container and render a test diagram")
+    parser.parse_args()
+
+    async def check() -> bool:
+        executor = ToolExecutor()
+        container = MermaidContainer()
+        try:
+            await container.start(executor)
+        except MermaidContainerError as e:
+            logger.error(f"✗ {e}")
+            return False
+        try:
+            output = Path(tempfile.mkdtemp(prefix='mermaid_check_')) / 'check.png'
+            ok = await container.render('graph LR\n  A --> B', str(output), executor)
+            if ok:
+                logger.info(f"✓ Rendered {output} ({output.stat().st_size} bytes)")
+            return ok
+        finally:
+            container.stop()
+
+    return 0 if asyncio.run(check()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
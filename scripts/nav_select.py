@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Selectors for partial exports of the MkDocs navigation.
+
+A selector picks nav pages by one of:
+
+- ``nav:<Section>/<Page>``  path of titles in the mkdocs.yml nav; matches the
+  page itself or every page below a section (segments may use ``*`` and ``?``)
+- ``glob:<pattern>``        glob on the path relative to ``docs/``
+  (e.g. ``architecture/adr/*``); a plain directory selects everything below it
+- ``tag:<name>``            tag listed in the page front matter (``tags: [...]``)
+
+A selector without a prefix is treated as a glob when it looks like a path
+(contains ``/`` or ``*`` or ends with ``.md``) and as a nav path otherwise.
+Several selectors are combined as a union.
+"""
+
+import fnmatch
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+import yaml
+
+SELECTOR_KINDS = ('nav', 'glob', 'tag')
+
+
+@dataclass(frozen=True)
+class Selector:
+    """A single nav, glob or tag selector."""
+    kind: str
+    pattern: str
+
+    def matches(self, title_path: Tuple[str, ...], rel_path: str, docs_dir: Path) -> bool:
+        if self.kind == 'nav':
+            segments = [segment.strip() for segment in self.pattern.strip('/').split('/')]
+            if len(segments) > len(title_path):
+                return False
+            return all(fnmatch.fnmatch(title.lower(), segment.lower())
+                       for title, segment in zip(title_path, segments))
+        if self.kind == 'glob':
+            pattern = self.pattern.strip('/')
+            return fnmatch.fnmatch(rel_path, pattern) or rel_path.startswith(pattern + '/')
+        if self.kind == 'tag':
+            return self.pattern.lower() in (tag.lower() for tag in read_front_matter_tags(docs_dir / rel_path))
+        return False
+
+
+def parse_selector(value: str) -> Selector:
+    """Parse a single selector such as 'glob:architecture/adr/*'."""
+    value = value.strip()
+    kind, sep, pattern = value.partition(':')
+    if sep and kind in SELECTOR_KINDS:
+        if not pattern:
+            raise ValueError(f"Empty {kind} selector: {value!r}")
+        return Selector(kind, pattern)
+    if '/' in value or '*' in value or value.endswith('.md'):
+        return Selector('glob', value)
+    return Selector('nav', value)
+
+
+def parse_selectors(values: Iterable[str]) -> List[Selector]:
+    """Parse repeated and/or comma-separated selector arguments."""
+    selectors = []
+    for value in values or []:
+        for item in value.split(','):
+            if item.strip():
+                selectors.append(parse_selector(item))
+    return selectors
+
+
+def walk_nav(nav: Any, parents: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """Yield (title_path, path relative to docs/) for every page in the nav."""
+    if isinstance(nav, list):
+        for item in nav:
+            yield from walk_nav(item, parents)
+    elif isinstance(nav, dict):
+        for title, value in nav.items():
+            if isinstance(value, str):
+                yield parents + (str(title),), value
+            else:
+                yield from walk_nav(value, parents + (str(title),))
+    elif isinstance(nav, str):
+        yield parents + (Path(nav).stem,), nav
+
+
+_front_matter_cache: Dict[Path, List[str]] = {}
+
+
+def read_front_matter_tags(file_path: Path) -> List[str]:
+    """Read the 'tags' of a page's YAML front matter without reading the whole file."""
+    if file_path in _front_matter_cache:
+        return _front_matter_cache[file_path]
+
+    tags: List[str] = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.readline().strip() == '---':
+                lines = []
+                for line in f:
+                    if line.strip() in ('---', '...'):
+                        meta = yaml.safe_load(''.join(lines)) or {}
+                        raw_tags = meta.get('tags', []) if isinstance(meta, dict) else []
+                        tags = [raw_tags] if isinstance(raw_tags, str) else [str(tag) for tag in raw_tags or []]
+                        break
+                    lines.append(line)
+    except (OSError, yaml.YAMLError):
+        pass
+
+    _front_matter_cache[file_path] = tags
+    return tags
+
+
+def select_nav_paths(nav: Any, selectors: List[Selector], docs_dir: Path) -> Set[str]:
+    """Return the docs-relative paths of all nav pages matched by any selector."""
+    selected = set()
+    for title_path, rel_path in walk_nav(nav):
+        if any(selector.matches(title_path, rel_path, docs_dir) for selector in selectors):
+            selected.add(rel_path)
+    return selected
+
+
+def filter_nav(nav: Any, selected: Set[str]) -> Any:
+    """Prune the nav tree to the selected pages, keeping its section structure."""
+    if isinstance(nav, list):
+        items = [filter_nav(item, selected) for item in nav]
+        return [item for item in items if item]
+    if isinstance(nav, dict):
+        pruned = {}
+        for title, value in nav.items():
+            if isinstance(value, str):
+                if value in selected:
+                    pruned[title] = value
+            else:
+                sub_nav = filter_nav(value, selected)
+                if sub_nav:
+                    pruned[title] = sub_nav
+        return pruned
+    if isinstance(nav, str):
+        return nav if nav in selected else None
+    return None
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate paragraph detection across docs/ and inputs/.
+
+Every prose paragraph (outside code fences, tables and headings) is turned
+into a set of word shingles and a MinHash signature. Locality sensitive
+hashing over signature bands yields candidate pairs in near-linear time; each
+candidate is then scored with the exact Jaccard similarity of its shingles.
+
+    python near_duplicates.py                  # report pairs >= 0.7 similarity
+    python near_duplicates.py --threshold 0.9 --json
+
+The single-document DOCX exporter can use ``dedupe_pages`` (``--dedupe``) to
+replace repeated paragraphs by a cross-reference to their first occurrence.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+MIN_TOKENS = 20
+NUM_PERMUTATIONS = 64
+BANDS = 16  # 16 bands of 4 rows: candidates from ~0.5 similarity on
+DEFAULT_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r'\w+')
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Deterministic (a, b) parameters of the universal hash functions."""
+    params = []
+    for i in range(count):
+        seed = hashlib.sha256(f"minhash-{i}".encode('utf-8')).digest()
+        params.append((int.from_bytes(seed[:8], 'big') % (_MERSENNE_PRIME - 1) + 1,
+                       int.from_bytes(seed[8:16], 'big') % _MERSENNE_PRIME))
+    return params
+
+
+PERMUTATIONS = _permutations(NUM_PERMUTATIONS)
+
+
+@dataclass
+class Paragraph:
+    """A prose paragraph of a markdown file."""
+    source: str
+    line: int
+    text: str
+    shingles: FrozenSet[int] = field(default_factory=frozenset, repr=False)
+
+    @property
+    def preview(self) -> str:
+        text = ' '.join(self.text.split())
+        return text if len(text) <= 80 else text[:77] + '...'
+
+
+@dataclass
+class DuplicatePair:
+    """Two near-duplicate paragraphs and their Jaccard similarity."""
+    first: Paragraph
+    second: Paragraph
+    similarity: float
+
+
+def iter_paragraphs(content: str) -> Iterable[Tuple[int, str]]:
+    """Yield (line, text) for the prose paragraphs of markdown content (fence-aware)."""
+    lines: List[str] = []
+    start = 0
+    in_fence = False
+    for number, line in enumerate(content.split('\n'), 1):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+            if lines:
+                yield start, '\n'.join(lines)
+                lines = []
+            continue
+        stripped = line.strip()
+        # Headings, tables, images and footnote definitions are not prose
+        if in_fence or not stripped or stripped.startswith(('#', '|', '![', '[^')):
+            if lines:
+                yield start, '\n'.join(lines)
+                lines = []
+            continue
+        if not lines:
+            start = number
+        lines.append(line)
+    if lines and not in_fence:
+        yield start, '\n'.join(lines)
+
+
+def shingle(text: str) -> FrozenSet[int]:
+    """Hashed word shingles of a paragraph (empty for short paragraphs)."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < MIN_TOKENS:
+        return frozenset()
+    return frozenset(
+        int.from_bytes(hashlib.blake2b(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'),
+                                       digest_size=4).digest(), 'big')
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+
+
+def minhash(shingles: FrozenSet[int]) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set."""
+    return tuple(min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in shingles)
+                 for a, b in PERMUTATIONS)
+
+
+def jaccard(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    return len(first & second) / len(first | second) if first or second else 0.0
+
+
+def extract_paragraphs(source: str, content: str) -> List[Paragraph]:
+    """Shingled paragraphs of a page that are long enough to compare."""
+    paragraphs = []
+    for line, text in iter_paragraphs(content):
+        shingles = shingle(text)
+        if shingles:
+            paragraphs.append(Paragraph(source, line, text, shingles))
+    return paragraphs
+
+
+def find_near_duplicates(paragraphs: List[Paragraph], threshold: float = DEFAULT_THRESHOLD,
+                         same_source: bool = False) -> List[DuplicatePair]:
+    """LSH candidate search followed by exact Jaccard verification."""
+    rows = NUM_PERMUTATIONS // BANDS
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for index, paragraph in enumerate(paragraphs):
+        signature = minhash(paragraph.shingles)
+        for band in range(BANDS):
+            buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+
+    candidates: Set[Tuple[int, int]] = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                candidates.add((first, second))
+
+    pairs = []
+    for first, second in candidates:
+        a, b = paragraphs[first], paragraphs[second]
+        if a.source == b.source and not same_source:
+            continue
+        similarity = jaccard(a.shingles, b.shingles)
+        if similarity >= threshold:
+            pairs.append(DuplicatePair(a, b, similarity))
+    pairs.sort(key=lambda pair: (-pair.similarity, pair.first.source, pair.first.line))
+    return pairs
+
+
+def dedupe_pages(pages: List[Tuple[str, str, str]], threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[str], int]:
+    """Replace paragraphs repeating an earlier page's paragraph by a cross-reference.
+
+    ``pages`` holds (title, anchor, content) in document order. Returns the new
+    contents and the number of paragraphs replaced.
+    """
+    paragraphs = []
+    for index, (_, _, content) in enumerate(pages):
+        paragraphs.extend(extract_paragraphs(str(index), content))
+
+    # For every later paragraph, the earliest page it duplicates
+    replace: Dict[Tuple[int, int], int] = {}
+    for pair in find_near_duplicates(paragraphs, threshold):
+        first, second = sorted((pair.first, pair.second), key=lambda p: (int(p.source), p.line))
+        key = (int(second.source), second.line)
+        replace[key] = min(replace.get(key, int(first.source)), int(first.source))
+
+    contents = []
+    for index, (_, _, content) in enumerate(pages):
+        by_line = {line: target for (page, line), target in replace.items() if page == index}
+        if not by_line:
+            contents.append(content)
+            continue
+        lines = content.split('\n')
+        for line, text in sorted(iter_paragraphs(content), reverse=True):
+            if line in by_line:
+                title, anchor, _ = pages[by_line[line]]
+                count = text.count('\n') + 1
+                lines[line - 1:line - 1 + count] = [f"*Near-duplicate content omitted, see [{title}](#{anchor}).*"]
+        contents.append('\n'.join(lines))
+    return contents, len(replace)
+
+
+def collect_sources(project_root: Path) -> List[Path]:
+    """Markdown files of docs/ and inputs/."""
+    return sorted((project_root / 'docs').rglob('*.md')) + sorted((project_root / 'inputs').glob('*.md'))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Report near-duplicate paragraphs across docs/ and inputs/")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum Jaccard similarity (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--same-file', action='store_true', help="Also report duplicates within one file")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+
+    paragraphs = []
+    for file_path in collect_sources(project_root):
+        content = file_path.read_text(encoding='utf-8', errors='replace')
+        paragraphs.extend(extract_paragraphs(file_path.relative_to(project_root).as_posix(), content))
+
+    pairs = find_near_duplicates(paragraphs, args.threshold, same_source=args.same_file)
+    if args.json:
+        print(json.dumps([{'similarity': round(pair.similarity, 3),
+                           'first': {'source': pair.first.source, 'line': pair.first.line},
+                           'second': {'source': pair.second.source, 'line': pair.second.line},
+                           'preview': pair.first.preview} for pair in pairs], indent=2))
+        return 0
+
+    for pair in pairs:
+        print(f"{pair.similarity:.2f}  {pair.first.source}:{pair.first.line}  ↔  {pair.second.source}:{pair.second.line}")
+        print(f"      {pair.first.preview}")
+    logger.info(f"✓ {len(paragraphs)} paragraphs compared, {len(pairs)} near-duplicate pair(s) >= {args.threshold}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
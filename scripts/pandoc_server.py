@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Persistent pandoc-server backend for the DOCX exporters.
+
+Spawning ``pandoc`` per document pays the Haskell runtime start-up and the
+``reference.docx`` load every time. This backend starts ``pandoc-server`` (or
+``pandoc server``) once per process and posts documents to it over a pooled
+HTTP session: the markdown travels in the request body, and the reference doc
+and referenced images are sent base64-encoded in ``files`` (the server has no
+file system access). The response body is the DOCX itself.
+
+The server cannot run filters, so documents that still need
+``mermaid-filter`` and hosts without pandoc-server use the pandoc CLI.
+
+    python pandoc_server.py --check      # start the server and print its version
+"""
+
+import argparse
+import asyncio
+import atexit
+import base64
+import logging
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from async_exec import TOOL_CLOCK, ToolResult
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'server', 'cli')
+STARTUP_TIMEOUT = 15
+REQUEST_TIMEOUT = 300
+
+_IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?')
+
+
+class PandocServerError(Exception):
+    """The server could not be started or rejected a document."""
+
+
+def server_command(port: int) -> Optional[List[str]]:
+    """Command starting the server, or None if pandoc-server is not available."""
+    if shutil.which('pandoc-server'):
+        return ['pandoc-server', '--port', str(port), '--timeout', str(REQUEST_TIMEOUT)]
+    if shutil.which('pandoc'):
+        # pandoc >= 3 ships the server as a subcommand
+        return ['pandoc', 'server', '--port', str(port), '--timeout', str(REQUEST_TIMEOUT)]
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _encode(path: Path) -> str:
+    return base64.b64encode(path.read_bytes()).decode('ascii')
+
+
+def referenced_files(markdown: str, base_dir: Optional[Path] = None) -> Dict[str, str]:
+    """Base64 contents of the local images a document references, keyed as written."""
+    files = {}
+    for target in _IMAGE_PATTERN.findall(markdown):
+        if target in files or re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', target):
+            continue
+        path = Path(target) if base_dir is None or os.path.isabs(target) else base_dir / target
+        if path.is_file():
+            files[target] = _encode(path)
+    return files
+
+
+class PandocServer:
+    """A pandoc-server child process and an HTTP session to it."""
+
+    def __init__(self, port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process: Optional[subprocess.Popen] = None
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8)
+        self.session.mount('http://', adapter)
+        self.version: Optional[str] = None
+        self._stderr = None
+
+    def start(self) -> None:
+        """Start the server and wait until it answers."""
+        cmd = server_command(self.port)
+        if cmd is None:
+            raise PandocServerError("pandoc-server is not installed")
+        # stderr goes to a file: a pipe nobody reads would eventually block the server
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=self._stderr,
+                                        start_new_session=True)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self._stderr.seek(0)
+                stderr = self._stderr.read().decode('utf-8', errors='replace').strip()
+                raise PandocServerError(f"{' '.join(cmd)} exited with {self.process.returncode}: {stderr}")
+            try:
+                response = self.session.get(f"{self.url}/version", timeout=1)
+                if response.ok:
+                    self.version = response.text.strip()
+                    logger.info(f"✓ pandoc-server {self.version} listening on port {self.port}")
+                    return
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.1)
+        self.stop()
+        raise PandocServerError(f"pandoc-server did not answer within {STARTUP_TIMEOUT}s")
+
+    def convert(self, markdown: str, options: Dict[str, Any], files: Optional[Dict[str, str]] = None) -> bytes:
+        """Convert a document; ``options`` use pandoc-server (defaults file) names."""
+        request = {**options, 'text': markdown}
+        if files:
+            request['files'] = files
+        response = self.session.post(self.url, json=request, timeout=REQUEST_TIMEOUT,
+                                     headers={'Accept': 'application/octet-stream'})
+        if not response.ok:
+            raise PandocServerError(f"HTTP {response.status_code}: {response.text.strip()[:500]}")
+        return response.content
+
+    def stop(self) -> None:
+        self.session.close()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self._stderr:
+            self._stderr.close()
+            self._stderr = None
+
+
+_server: Optional[PandocServer] = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def get_pandoc_server(backend: str = 'auto') -> Optional[PandocServer]:
+    """The process-wide server (started on first use), or None to use the CLI.
+
+    With ``auto`` a server that cannot start means the CLI; with ``server`` it
+    is an error.
+    """
+    global _server, _server_failed
+    if backend == 'cli':
+        return None
+    with _server_lock:
+        if _server is None and not _server_failed:
+            server = PandocServer()
+            try:
+                server.start()
+            except PandocServerError as e:
+                _server_failed = True
+                if backend == 'server':
+                    raise
+                logger.info(f"pandoc-server unavailable ({e}), using the pandoc CLI")
+            else:
+                _server = server
+                atexit.register(server.stop)
+        if _server is None and backend == 'server':
+            raise PandocServerError("pandoc-server could not be started")
+        return _server
+
+
+async def convert_with_server(server: PandocServer, executor, markdown: str, output_path: Path,
+                              options: Dict[str, Any], reference_doc: Optional[Path] = None,
+                              base_dir: Optional[Path] = None) -> ToolResult:
+    """Convert through the server; reported like a pandoc run (``ToolResult``)."""
+    cmd = ['pandoc-server', server.url, '--output', str(output_path)]
+    started = time.monotonic()
+    async with executor.slot('pandoc-server'):
+        TOOL_CLOCK.started()
+        try:
+            files = await asyncio.to_thread(referenced_files, markdown, base_dir)
+            if reference_doc is not None and reference_doc.exists():
+                files[reference_doc.name] = _encode(reference_doc)
+                options = {**options, 'reference-doc': reference_doc.name}
+            output = await asyncio.to_thread(server.convert, markdown, options, files)
+            Path(output_path).write_bytes(output)
+        except (PandocServerError, requests.RequestException, OSError) as e:
+            return ToolResult(cmd=cmd, returncode=1, stderr=str(e), duration=time.monotonic() - started)
+        finally:
+            TOOL_CLOCK.finished('pandoc-server', time.monotonic() - started)
+    return ToolResult(cmd=cmd, returncode=0, duration=time.monotonic() - started)
+
+
+def add_backend_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--pandoc-backend', choices=BACKENDS, default='auto',
+                        help="Convert through a long-lived pandoc-server (auto: when available) "
+                             "or one pandoc process per document")
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check the pandoc-server backend")
+    parser.add_argument('--check', action='store_true', help="Start the server and print its version")
+    parser.parse_args()
+    try:
+        server = get_pandoc_server('server')
+    except PandocServerError as e:
+        logger.error(f"✗ {e}")
+        return 1
+    print(server.version)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Built-in profiling for the exporters.
+
+With ``--profile`` every exporter runs its stages (combine, render, convert,
+workbook, ...) under a profiler. Per stage it writes to
+``docs/export/_profile/``:
+
+- ``<exporter>-<stage>.pstats``         cProfile data (``python -m pstats``, snakeviz)
+- ``<exporter>-<stage>.collapsed.txt``  sampled stacks in collapsed format
+                                        (``flamegraph.pl``, speedscope)
+
+It then prints the top hotspots. Wall time is split into Python CPU time, CPU
+time of child processes and the time spent waiting on external tools
+(pandoc, docker, npx, mmdc, pandoc-server), per tool. In the collapsed stacks,
+samples blocked in the event loop's selector, a lock or a subprocess wait sit
+under a ``wait`` root and all others under ``cpu``.
+
+``--profile sample`` skips cProfile and only samples stacks every few
+milliseconds. Its overhead is low enough for full exports.
+
+    python convert_docs_to_docx_by_chapter.py --profile --only Architecture
+    python -m pstats ../docs/export/_profile/convert_docs_to_docx-combine.pstats
+    flamegraph.pl ../docs/export/_profile/convert_docs_to_docx-combine.collapsed.txt > combine.svg
+"""
+
+import argparse
+import cProfile
+import logging
+import os
+import pstats
+import re
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from async_exec import TOOL_CLOCK
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+DEFAULT_PROFILE_DIR = Path('docs') / 'export' / '_profile'
+SAMPLE_INTERVAL = 0.005
+TOP_HOTSPOTS = 10
+
+# Leaf frames that mean "blocked", not "computing"
+_WAIT_FRAMES = {
+    ('selectors.py', 'select'), ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+    ('subprocess.py', '_wait'), ('subprocess.py', '_try_wait'), ('queue.py', 'get'),
+    ('socket.py', 'readinto'), ('ssl.py', 'read'), ('ssl.py', 'recv_into'),
+    ('unix_events.py', '_do_waitpid'),  # asyncio child watcher thread
+    ('thread.py', '_worker'),  # idle to_thread pool worker, blocked on its queue
+}
+
+# Builtins that block (reported as tool wait, not as hotspots)
+_BLOCKING_CALL = re.compile(r"'select\.|'_thread\.lock'|time\.sleep|posix\.waitpid")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of all other threads into collapsed-stack counts."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                leaf = frame
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                code = leaf.f_code
+                kind = 'wait' if (os.path.basename(code.co_filename), code.co_name) in _WAIT_FRAMES else 'cpu'
+                labels.extend([names.get(thread_id, str(thread_id)), kind])
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def hotspots(self, limit: int) -> List[Tuple[str, float]]:
+        """Leaf frames with their share of the CPU samples."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            if stack.startswith('cpu;'):
+                leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(leaf, count / total) for leaf, count in leaves.most_common(limit)]
+
+
+class Profiler:
+    """Profiles named stages of one exporter run; a no-op when disabled."""
+
+    def __init__(self, exporter: Optional[str] = None, mode: Optional[str] = None,
+                 output_dir: Optional[Path] = None):
+        self.exporter = exporter
+        self.mode = mode
+        self.output_dir = Path(output_dir or DEFAULT_PROFILE_DIR)
+        self._active: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    @contextmanager
+    def stage(self, name: str):
+        # Stages do not nest: an inner stage is accounted to the outer one
+        if not self.enabled or self._active:
+            yield
+            return
+        self._active = name
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile = cProfile.Profile() if self.mode == 'cprofile' else None
+        sampler = StackSampler()
+        tool_totals = dict(TOOL_CLOCK.totals)
+        tool_calls = dict(TOOL_CLOCK.calls)
+        busy = TOOL_CLOCK.busy()
+        cpu = time.process_time()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        wall = time.monotonic()
+        sampler.start()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            sampler.stop()
+            children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            report = {
+                'wall': time.monotonic() - wall,
+                'cpu': time.process_time() - cpu,
+                'children_cpu': max(0.0, children_after.ru_utime + children_after.ru_stime
+                                           - children.ru_utime - children.ru_stime),
+                'tool_wait': TOOL_CLOCK.busy() - busy,
+                'tools': {tool: (TOOL_CLOCK.calls[tool] - tool_calls.get(tool, 0),
+                                 total - tool_totals.get(tool, 0.0))
+                          for tool, total in TOOL_CLOCK.totals.items()
+                          if TOOL_CLOCK.calls[tool] != tool_calls.get(tool, 0)},
+            }
+            self._active = None
+            self._write(name, profile, sampler, report)
+
+    def _write(self, name: str, profile: Optional[cProfile.Profile], sampler: StackSampler,
+               report: Dict) -> None:
+        base = self.output_dir / f"{self.exporter}-{name}"
+        sampler.write_collapsed(base.with_name(base.name + '.collapsed.txt'))
+        tools = ', '.join(f"{tool} {calls}× {seconds:.1f}s" for tool, (calls, seconds) in sorted(report['tools'].items()))
+        print(f"⏱️ Profile {self.exporter}/{name}: wall {report['wall']:.2f}s, Python CPU {report['cpu']:.2f}s, "
+              f"child CPU {report['children_cpu']:.2f}s, waiting on tools {report['tool_wait']:.2f}s"
+              + (f" ({tools})" if tools else ''))
+
+        if profile:
+            pstats_path = base.with_name(base.name + '.pstats')
+            profile.dump_stats(str(pstats_path))
+            stats = pstats.Stats(profile)
+            print(f"   Top {TOP_HOTSPOTS} by own time (cProfile, main thread, blocking waits excluded):")
+            ranked = sorted(((key, value) for key, value in stats.stats.items()
+                             if not _BLOCKING_CALL.search(key[2])), key=lambda item: -item[1][2])[:TOP_HOTSPOTS]
+            for (filename, line, function), (_, calls, own, cumulative, _) in ranked:
+                print(f"   {own:8.3f}s own {cumulative:8.3f}s cum {calls:8}×  "
+                      f"{os.path.basename(filename)}:{line}({function})")
+            print(f"   → {pstats_path}")
+        else:
+            print(f"   Top {TOP_HOTSPOTS} CPU leaf frames ({sampler.samples} samples):")
+            for leaf, share in sampler.hotspots(TOP_HOTSPOTS):
+                print(f"   {share:6.1%}  {leaf}")
+        print(f"   → {base.with_name(base.name + '.collapsed.txt')}")
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+
+def profile_stage(name: str):
+    """Context manager profiling a stage of the configured exporter run."""
+    return _profiler.stage(name)
+
+
+def configure_profiling(mode: Optional[str], exporter: str, project_root: Optional[Path] = None) -> Profiler:
+    """Enable profiling for this process (``mode`` None disables it)."""
+    global _profiler
+    output_dir = (project_root / DEFAULT_PROFILE_DIR) if project_root else None
+    _profiler = Profiler(exporter, mode, output_dir)
+    return _profiler
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES,
+                        help="Profile each stage into docs/export/_profile/ (cprofile: pstats + sampled stacks; "
+                             "sample: sampled stacks only, lower overhead)")
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Longest-expected-first scheduling of mermaid renders.
+
+Large flowcharts render many times slower than small pie charts. Started in
+source order, a big diagram that comes last keeps one worker busy while the
+others sit idle. Renders therefore wait for a slot of a ``RenderScheduler``,
+which admits the pending render with the longest expected duration first.
+Submissions are collected for a short window before the first slot is handed
+out, so the whole batch is ordered and not just whatever arrived first.
+
+Expected durations come from the render history in the asset index: measured
+durations and node/edge counts for each diagram digest. Unseen diagrams are
+estimated from their size. The size model is fitted on that history once
+enough renders are recorded, and uses fixed defaults before that.
+
+    python render_scheduler.py                 # print the planned render order of the docs
+    python render_scheduler.py --fit           # show the fitted size model
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import sys
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_SECONDS = 2.0  # Chromium start and page load
+DEFAULT_SECONDS_PER_ELEMENT = 0.05
+MIN_SAMPLES_FOR_FIT = 5
+GATHER_WINDOW = 0.05  # seconds spent collecting submissions before the first dispatch
+# Executor tool whose limit bounds concurrent renders, per mermaid-cli method
+RENDER_TOOLS = {'docker': 'docker-exec', 'npx': 'npx', 'mmdc': 'mmdc'}
+
+_ARROW_PATTERN = re.compile(r'<?[-=.]{2,}[>x)o]?|[<*o}|]{1,2}[-.]{2,}|-[>x)]{1,2}')
+_LABEL_PATTERN = re.compile(r'\|[^|]*\||"[^"]*"|:.*$')
+_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][\w]*')
+_IGNORED_LINE = re.compile(r'^\s*(%%|style\b|classDef\b|linkStyle\b|click\b|class\s+\S+\s+\S+$|end\b|'
+                           r'direction\b|title\b|dateFormat\b|axisFormat\b|autonumber\b|section\b)')
+
+
+def diagram_size(code: str) -> Tuple[int, int]:
+    """Approximate (nodes, edges) of a mermaid diagram.
+
+    Edges are the arrows of the diagram; nodes are the distinct identifiers at
+    their ends plus one per other declaration line (participants, pie slices,
+    gantt tasks, ...).
+    """
+    nodes = set()
+    edges = 0
+    for line in code.strip().split('\n')[1:]:  # the first line is the diagram type
+        line = line.strip()
+        if not line or _IGNORED_LINE.match(line):
+            continue
+        arrows = _ARROW_PATTERN.findall(line)
+        if not arrows:
+            nodes.add(line)
+            continue
+        edges += len(arrows)
+        for segment in _ARROW_PATTERN.split(_LABEL_PATTERN.sub(' ', line)):
+            identifier = _IDENTIFIER_PATTERN.search(segment)
+            if identifier:
+                nodes.add(identifier.group(0))
+    return len(nodes), edges
+
+
+@dataclass
+class SizeModel:
+    """Expected render seconds as ``base + per_element * (nodes + edges)``."""
+    base: float = DEFAULT_BASE_SECONDS
+    per_element: float = DEFAULT_SECONDS_PER_ELEMENT
+    samples: int = 0
+
+    def estimate(self, nodes: int, edges: int) -> float:
+        return self.base + self.per_element * (nodes + edges)
+
+
+def fit_size_model(history: Dict[str, Dict[str, Any]]) -> SizeModel:
+    """Least-squares fit of the size model on recorded renders (defaults if too few)."""
+    samples = [(entry['nodes'] + entry['edges'], entry['duration']) for entry in history.values()
+               if {'nodes', 'edges', 'duration'} <= entry.keys()]
+    if len(samples) < MIN_SAMPLES_FOR_FIT:
+        return SizeModel(samples=len(samples))
+    mean_x = sum(x for x, _ in samples) / len(samples)
+    mean_y = sum(y for _, y in samples) / len(samples)
+    variance = sum((x - mean_x) ** 2 for x, _ in samples)
+    if variance == 0:
+        return SizeModel(base=mean_y, per_element=0.0, samples=len(samples))
+    slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance)
+    return SizeModel(base=max(0.0, mean_y - slope * mean_x), per_element=slope, samples=len(samples))
+
+
+class RenderHistory:
+    """Expected render durations from the recorded history of each digest."""
+
+    def __init__(self, history: Dict[str, Dict[str, Any]]):
+        self.history = history
+        self.model = fit_size_model(history)
+
+    @classmethod
+    def from_asset_index(cls, index=None) -> 'RenderHistory':
+        if index is None:
+            from asset_index import get_asset_index
+            index = get_asset_index()
+        return cls(index.render_history())
+
+    def expected_duration(self, digest: str, code: str) -> float:
+        recorded = self.history.get(digest, {}).get('duration')
+        if recorded is not None:
+            return recorded
+        return self.model.estimate(*diagram_size(code))
+
+
+class RenderScheduler:
+    """Concurrency slots handed out longest-expected-first."""
+
+    def __init__(self, slots: int, history: Optional[RenderHistory] = None, window: float = GATHER_WINDOW):
+        self.slots = max(1, slots)
+        self.history = history or RenderHistory({})
+        self.window = window
+        self._running = 0
+        self._waiting: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._dispatch_handle: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def turn(self, expected: float):
+        """Wait for a slot; renders with a larger ``expected`` go first."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiting, (-expected, next(self._order), future))
+        if self._dispatch_handle is None:
+            # An idle scheduler waits for the rest of the batch to be submitted
+            delay = self.window if self._running == 0 else 0
+            self._dispatch_handle = loop.call_later(delay, self._dispatch)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # granted, but cancelled before it could run
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _dispatch(self) -> None:
+        self._dispatch_handle = None
+        while self._waiting and self._running < self.slots:
+            _, _, future = heapq.heappop(self._waiting)
+            if future.cancelled():
+                continue
+            self._running += 1
+            future.set_result(None)
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+
+_schedulers = weakref.WeakKeyDictionary()  # per executor
+
+
+async def get_render_scheduler(executor) -> RenderScheduler:
+    """The executor's render scheduler, sized by the render tool's limit."""
+    scheduler = _schedulers.get(executor)
+    if scheduler is None:
+        from convert_docs_to_docx import detect_mermaid_methods
+        from mermaid_container import get_mermaid_container
+
+        methods = await detect_mermaid_methods(executor)
+        tool = RENDER_TOOLS.get(methods[0]) if methods else None
+        if tool == 'docker-exec' and not await get_mermaid_container(executor):
+            tool = 'docker'
+        slots = executor.limits.get(tool, 1) if tool else 1
+        scheduler = _schedulers.setdefault(executor, RenderScheduler(slots, RenderHistory.from_asset_index()))
+    return scheduler
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Show the longest-first render plan of the documentation")
+    parser.add_argument('--fit', action='store_true', help="Only print the size model fitted on the history")
+    parser.add_argument('--limit', type=int, default=20, help="Number of diagrams to list (default: 20)")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    from asset_index import AssetIndex, DEFAULT_INDEX_PATH
+    from convert_docs_to_docx import extract_mermaid_blocks
+
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    history = RenderHistory.from_asset_index(AssetIndex(project_root / DEFAULT_INDEX_PATH, project_root))
+    model = history.model
+    print(f"Size model: {model.base:.2f}s + {model.per_element:.3f}s per node/edge "
+          f"({model.samples} recorded render(s){'' if model.samples >= MIN_SAMPLES_FOR_FIT else ', defaults'})")
+    if args.fit:
+        return 0
+
+    planned = {}
+    for page in sorted((project_root / 'docs').rglob('*.md')):
+        for block in extract_mermaid_blocks(page.read_text(encoding='utf-8')):
+            nodes, edges = diagram_size(block.code)
+            source = 'recorded' if 'duration' in history.history.get(block.digest, {}) else 'estimated'
+            planned.setdefault(block.digest, (history.expected_duration(block.digest, block.code), nodes, edges,
+                                              source, f"{page.relative_to(project_root / 'docs')}:{block.line}"))
+    order = sorted(planned.items(), key=lambda item: -item[1][0])
+    for digest, (expected, nodes, edges, source, location) in order[:args.limit]:
+        print(f"{expected:7.2f}s  {source:9}  {nodes:3} nodes {edges:3} edges  {digest}  {location}")
+    total = sum(expected for expected, *_ in planned.values())
+    print(f"{len(planned)} diagram(s), {total:.1f}s of expected render time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
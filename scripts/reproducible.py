@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Byte-stable DOCX/XLSX outputs.
+
+Exports normally differ on every run (build date, zip entry timestamps and
+order, core properties), so artifact stores cannot deduplicate them. In
+reproducible mode the exporters take their timestamp from
+``SOURCE_DATE_EPOCH`` (or the date of the last git commit), pass it on to
+pandoc, and rewrite the resulting OOXML zip with a fixed entry order, fixed
+timestamps and normalized ``docProps/core.xml`` dates. Unchanged inputs then
+produce identical bytes, and uploads can be skipped by hash.
+
+    python convert_docs_to_docx.py --reproducible
+    SOURCE_DATE_EPOCH=1700000000 python convert_docs_to_docx_by_chapter.py
+    python reproducible.py ../docs/export/*.docx   # normalize existing files, print hashes
+"""
+
+import argparse
+import datetime
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+ZIP_EPOCH_MIN = 315532800  # 1980-01-01, the earliest timestamp a zip entry can hold
+CONTENT_TYPES = '[Content_Types].xml'
+
+_CORE_DATE_PATTERN = re.compile(r'(<dcterms:(?:created|modified)\b[^>]*>)[^<]*(</dcterms:(?:created|modified)>)')
+
+
+def source_date_epoch(project_root: Optional[Path] = None) -> int:
+    """``SOURCE_DATE_EPOCH``, else the last commit date, else the zip epoch."""
+    value = os.environ.get('SOURCE_DATE_EPOCH')
+    if value:
+        return int(value)
+    try:
+        result = subprocess.run(['git', 'log', '-1', '--format=%ct'], cwd=project_root,
+                                capture_output=True, text=True, timeout=10)
+        if result.returncode == 0 and result.stdout.strip():
+            return int(result.stdout.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+    logger.warning("No SOURCE_DATE_EPOCH and no git history, using 1980-01-01")
+    return ZIP_EPOCH_MIN
+
+
+def reproducible_requested(flag: bool) -> bool:
+    """Reproducible mode is on with the flag or when SOURCE_DATE_EPOCH is set."""
+    return flag or bool(os.environ.get('SOURCE_DATE_EPOCH'))
+
+
+def _utc(epoch: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+
+
+def build_date(epoch: Optional[int] = None) -> str:
+    """Document date: the epoch's UTC day, or today outside reproducible mode."""
+    if epoch is None:
+        return datetime.date.today().strftime('%Y-%m-%d')
+    return _utc(epoch).strftime('%Y-%m-%d')
+
+
+def pandoc_env(epoch: Optional[int]) -> Optional[Dict[str, str]]:
+    """Environment making pandoc's own timestamps deterministic (None: inherit)."""
+    if epoch is None:
+        return None
+    return {**os.environ, 'SOURCE_DATE_EPOCH': str(epoch)}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_ooxml(path: Path, epoch: int) -> str:
+    """Rewrite a DOCX/XLSX zip deterministically; returns the sha256 of the result.
+
+    The file is only replaced when its bytes change, so its mtime stays put for
+    unchanged outputs.
+    """
+    path = Path(path)
+    timestamp = _utc(max(epoch, ZIP_EPOCH_MIN)).timetuple()[:6]
+    iso_date = _utc(epoch).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    with zipfile.ZipFile(path) as source:
+        names = sorted(source.namelist(), key=lambda name: (name != CONTENT_TYPES, name))
+        entries = [(name, source.read(name)) for name in names]
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as tmp, zipfile.ZipFile(tmp, 'w') as target:
+            for name, data in entries:
+                if name == 'docProps/core.xml':
+                    data = _CORE_DATE_PATTERN.sub(rf'\g<1>{iso_date}\g<2>', data.decode('utf-8')).encode('utf-8')
+                info = zipfile.ZipInfo(name, date_time=timestamp)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 0
+                info.external_attr = 0o644 << 16
+                target.writestr(info, data, compresslevel=9)
+        digest = file_sha256(Path(tmp_name))
+        if digest == file_sha256(path):
+            os.unlink(tmp_name)
+        else:
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+            os.replace(tmp_name, path)
+        return digest
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Normalize DOCX/XLSX files to byte-stable form")
+    parser.add_argument('files', nargs='+', type=Path, help="Office Open XML files to normalize")
+    parser.add_argument('--epoch', type=int,
+                        help="Timestamp to use (default: SOURCE_DATE_EPOCH or the last commit date)")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    epoch = args.epoch if args.epoch is not None else source_date_epoch(Path(__file__).resolve().parent.parent)
+    failed = 0
+    for path in args.files:
+        try:
+            print(f"{normalize_ooxml(path, epoch)}  {path}")
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.error(f"✗ {path}: {e}")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
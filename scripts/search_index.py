@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Offline full-text search index over docs/ and the inputs/ research notes.
+
+Every ``docs/**/*.md`` and ``inputs/*.md`` file is streamed line by line into
+an inverted index with positional postings. The index is stored as JSON
+shards keyed by term prefix (``shards/<prefix>.json``) next to a
+``manifest.json`` holding document metadata and the BM25 statistics, so a
+client (the site or the CLI) only loads the shards of the terms it queries.
+
+Builds are incremental: a document is only re-tokenized when its content hash
+changed, and only the shards of changed or removed documents are rewritten.
+
+    python search_index.py build
+    python search_index.py query "cilium network policy"
+    python search_index.py query '"backup policy" rubrik'   # quoted phrase
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+SHARD_PREFIX_LENGTH = 2
+DEFAULT_INDEX_DIR = Path('.export-work') / 'search-index'
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[._-][a-z0-9]+)*')
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+# Postings: term -> {doc_id: [positions]}
+Postings = Dict[str, Dict[str, List[int]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of a text, without stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def shard_name(term: str) -> str:
+    """Shard holding the postings of a term (its prefix)."""
+    prefix = term[:SHARD_PREFIX_LENGTH]
+    return prefix if prefix.isalnum() else '_'
+
+
+def file_hash(file_path: Path) -> str:
+    """Streamed content hash of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stream_document(file_path: Path) -> Iterator[Tuple[str, Optional[str]]]:
+    """Yield (line, heading) for the lines of a markdown file, skipping front matter."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        in_front_matter = False
+        for number, line in enumerate(f):
+            stripped = line.strip()
+            if number == 0 and stripped == '---':
+                in_front_matter = True
+                continue
+            if in_front_matter:
+                in_front_matter = stripped not in ('---', '...')
+                continue
+            heading = stripped.lstrip('#').strip() if stripped.startswith('#') else None
+            yield line, heading
+
+
+def index_document(file_path: Path) -> Tuple[Dict[str, List[int]], int, str]:
+    """Tokenize one document into term positions; returns (positions, length, title)."""
+    postings: Dict[str, List[int]] = defaultdict(list)
+    position = 0
+    title = None
+    for line, heading in stream_document(file_path):
+        if heading and title is None:
+            title = heading
+        for term in tokenize(line):
+            postings[term].append(position)
+            position += 1
+    return postings, position, title or file_path.stem
+
+
+def encode_positions(positions: List[int]) -> List[int]:
+    """Delta-encode sorted positions to keep shards compact."""
+    return [position - previous for previous, position in zip([0] + positions, positions)]
+
+
+def decode_positions(deltas: List[int]) -> List[int]:
+    positions = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        positions.append(total)
+    return positions
+
+
+class SearchIndex:
+    """Sharded positional inverted index with BM25 scoring."""
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = index_dir
+        self.shards_dir = index_dir / 'shards'
+        self.manifest_path = index_dir / 'manifest.json'
+        self.manifest = {'version': INDEX_VERSION, 'shard_prefix_length': SHARD_PREFIX_LENGTH,
+                         'next_id': 0, 'total_length': 0, 'docs': {}}
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            if manifest.get('version') == INDEX_VERSION:
+                self.manifest = manifest
+        self._shards: Dict[str, Postings] = {}
+        self._dirty: Set[str] = set()
+
+    @property
+    def docs(self) -> Dict[str, Dict]:
+        return self.manifest['docs']
+
+    def shard(self, name: str) -> Postings:
+        """Load a shard (lazily, once)."""
+        if name not in self._shards:
+            path = self.shards_dir / f"{name}.json"
+            self._shards[name] = json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+        return self._shards[name]
+
+    def postings(self, term: str) -> Dict[str, List[int]]:
+        """Delta-encoded positions of a term per document id."""
+        return self.shard(shard_name(term)).get(term, {})
+
+    def remove_document(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id)
+        self.manifest['total_length'] -= doc['length']
+        for name in doc['shards']:
+            shard = self.shard(name)
+            for term in [term for term, docs in shard.items() if doc_id in docs]:
+                del shard[term][doc_id]
+                if not shard[term]:
+                    del shard[term]
+            self._dirty.add(name)
+
+    def add_document(self, rel_path: str, file_path: Path, content_hash: str) -> None:
+        postings, length, title = index_document(file_path)
+        doc_id = str(self.manifest['next_id'])
+        self.manifest['next_id'] += 1
+
+        shards = set()
+        for term, positions in postings.items():
+            name = shard_name(term)
+            self.shard(name).setdefault(term, {})[doc_id] = encode_positions(positions)
+            shards.add(name)
+        self._dirty.update(shards)
+
+        self.docs[doc_id] = {'path': rel_path, 'title': title, 'hash': content_hash,
+                             'length': length, 'shards': sorted(shards)}
+        self.manifest['total_length'] += length
+
+    def update(self, files: Iterable[Tuple[str, Path]]) -> Dict[str, int]:
+        """Incrementally (re-)index the given files; documents not listed are removed."""
+        by_path = {doc['path']: doc_id for doc_id, doc in self.docs.items()}
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        seen = set()
+
+        for rel_path, file_path in files:
+            seen.add(rel_path)
+            content_hash = file_hash(file_path)
+            doc_id = by_path.get(rel_path)
+            if doc_id is not None and self.docs[doc_id]['hash'] == content_hash:
+                counts['unchanged'] += 1
+                continue
+            if doc_id is not None:
+                self.remove_document(doc_id)
+            self.add_document(rel_path, file_path, content_hash)
+            counts['updated' if doc_id is not None else 'added'] += 1
+
+        for rel_path, doc_id in by_path.items():
+            if rel_path not in seen:
+                self.remove_document(doc_id)
+                counts['removed'] += 1
+        return counts
+
+    def save(self) -> None:
+        """Write the dirty shards and the manifest."""
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        for name in sorted(self._dirty):
+            path = self.shards_dir / f"{name}.json"
+            shard = self._shards.get(name) or {}
+            if shard:
+                tmp_path = path.with_suffix('.tmp')
+                tmp_path.write_text(json.dumps(shard, separators=(',', ':'), sort_keys=True), encoding='utf-8')
+                tmp_path.replace(path)
+            else:
+                path.unlink(missing_ok=True)
+        self._dirty.clear()
+
+        doc_count = len(self.docs)
+        self.manifest['doc_count'] = doc_count
+        self.manifest['average_length'] = self.manifest['total_length'] / doc_count if doc_count else 0
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.manifest, separators=(',', ':'), sort_keys=True), encoding='utf-8')
+        tmp_path.replace(self.manifest_path)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, Dict]]:
+        """BM25-ranked documents; quoted phrases must appear verbatim (by position)."""
+        phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]+)"', query)]
+        terms = tokenize(re.sub(r'"[^"]+"', ' ', query)) + [term for phrase in phrases for term in phrase]
+        if not terms:
+            return []
+
+        doc_count = len(self.docs)
+        average_length = self.manifest.get('average_length') or 1
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, deltas in postings.items():
+                tf = len(deltas)
+                norm = 1 - BM25_B + BM25_B * self.docs[doc_id]['length'] / average_length
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+        for phrase in phrases:
+            scores = {doc_id: score for doc_id, score in scores.items() if self.contains_phrase(doc_id, phrase)}
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.docs[doc_id]) for doc_id, score in ranked]
+
+    def contains_phrase(self, doc_id: str, phrase: List[str]) -> bool:
+        """True if the phrase terms appear at consecutive positions."""
+        if not phrase:
+            return True
+        candidates = None
+        for offset, term in enumerate(phrase):
+            deltas = self.postings(term).get(doc_id)
+            if not deltas:
+                return False
+            starts = {position - offset for position in decode_positions(deltas)}
+            candidates = starts if candidates is None else candidates & starts
+            if not candidates:
+                return False
+        return True
+
+
+def collect_sources(project_root: Path) -> List[Tuple[str, Path]]:
+    """The markdown files to index, as (path relative to the project, path)."""
+    files = sorted((project_root / 'docs').rglob('*.md')) + sorted((project_root / 'inputs').glob('*.md'))
+    return [(file_path.relative_to(project_root).as_posix(), file_path) for file_path in files]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Offline full-text search over docs/ and inputs/")
+    parser.add_argument('--index-dir', type=Path, default=None,
+                        help=f"Index directory (default: <project>/{DEFAULT_INDEX_DIR})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Build or incrementally update the index")
+    build.add_argument('--rebuild', action='store_true', help="Discard the existing index first")
+    query = subparsers.add_parser('query', help="Search the index")
+    query.add_argument('query', help='Search terms; use "double quotes" for phrases')
+    query.add_argument('-n', '--limit', type=int, default=10, help="Number of results (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    index_dir = args.index_dir or project_root / DEFAULT_INDEX_DIR
+
+    if args.command == 'build':
+        if args.rebuild and index_dir.exists():
+            for path in list(index_dir.rglob('*.json')):
+                path.unlink()
+        index = SearchIndex(index_dir)
+        counts = index.update(collect_sources(project_root))
+        index.save()
+        summary = ', '.join(f"{count} {status}" for status, count in counts.items())
+        shard_count = len(list(index.shards_dir.glob('*.json')))
+        logger.info(f"✓ Search index: {len(index.docs)} documents, {shard_count} shards ({summary})")
+        logger.info(f"Index directory: {index_dir}")
+        return 0
+
+    index = SearchIndex(index_dir)
+    if not index.docs:
+        logger.error(f"No search index in {index_dir}; run 'search_index.py build' first")
+        return 1
+    results = index.search(args.query, args.limit)
+    if not results:
+        print("No results")
+        return 1
+    for score, doc in results:
+        print(f"{score:7.3f}  {doc['path']}  —  {doc['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
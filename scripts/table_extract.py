@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Extract the markdown tables of the documentation as typed rows.
+
+Pages are streamed line by line; tables inside code fences are ignored. Cells
+are typed:
+
+- numbers (``5``, ``2.5``, ``2,011.5``, ``2.5 (PT)``) -> int / float
+- percentages (``9.9%``)                              -> Percentage
+- ranges (``13-20``)                                  -> NumberRange
+- anything else                                       -> str (emphasis removed)
+
+Extracted tables are cached per file content hash, so repeated exports only
+re-parse changed pages. The CLI exports every table of the site to one
+multi-sheet workbook or to one CSV file per table:
+
+    python table_extract.py                      # ../docs/export/RH_OVE_Documentation_Tables.xlsx
+    python table_extract.py --csv ../docs/export/tables
+    python table_extract.py --select glob:project-plan --list
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path('.export-work') / 'tables'
+DEFAULT_XLSX = Path('docs') / 'export' / 'RH_OVE_Documentation_Tables.xlsx'
+
+_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+_SEPARATOR_PATTERN = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_NUMBER = r'[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+_NUMBER_PATTERN = re.compile(rf'^({_NUMBER})(?:\s*\([^)]*\))?$')
+_PERCENT_PATTERN = re.compile(rf'^({_NUMBER})\s*%$')
+_RANGE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*[-–]\s*(\d+(?:\.\d+)?)$')
+_EMPHASIS_PATTERN = re.compile(r'^(\*\*|__|\*|_)(.+)\1$')
+
+Number = Union[int, float]
+
+
+@dataclass(frozen=True)
+class Percentage:
+    """A percentage cell; value is in percent (9.9 for '9.9%')."""
+    value: float
+
+    def __str__(self) -> str:
+        return f"{self.value:g}%"
+
+
+@dataclass(frozen=True)
+class NumberRange:
+    """A range cell such as a week range '13-20'."""
+    start: Number
+    end: Number
+
+    def __str__(self) -> str:
+        return f"{self.start}-{self.end}"
+
+
+CellValue = Union[None, str, int, float, Percentage, NumberRange]
+
+
+@dataclass
+class Table:
+    """A markdown table with its location and typed rows."""
+    source: str
+    line: int
+    section: Tuple[str, ...]
+    header: List[str]
+    rows: List[List[CellValue]] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return self.section[-1] if self.section else Path(self.source).stem
+
+
+def _number(text: str) -> Number:
+    value = float(text.replace(',', ''))
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+def parse_cell(text: str) -> CellValue:
+    """Type a single cell."""
+    text = text.strip()
+    while True:
+        match = _EMPHASIS_PATTERN.match(text)
+        if not match:
+            break
+        text = match.group(2).strip()
+    if not text:
+        return None
+
+    match = _PERCENT_PATTERN.match(text)
+    if match:
+        return Percentage(float(match.group(1).replace(',', '')))
+    match = _RANGE_PATTERN.match(text)
+    if match:
+        return NumberRange(_number(match.group(1)), _number(match.group(2)))
+    match = _NUMBER_PATTERN.match(text)
+    if match:
+        return _number(match.group(1))
+    return text
+
+
+def split_row(line: str) -> List[str]:
+    """Split a table row on unescaped pipes outside inline code."""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+
+    cells, current, in_code = [], [], False
+    previous = ''
+    for char in line:
+        if char == '`':
+            in_code = not in_code
+        if char == '|' and not in_code and previous != '\\':
+            cells.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+        previous = char
+    cells.append(''.join(current))
+    return [cell.replace('\\|', '|').strip() for cell in cells]
+
+
+def iter_tables(lines: Iterable[str], source: str = '') -> Iterator[Table]:
+    """Stream the tables of markdown lines (fence-aware)."""
+    section: List[Tuple[int, str]] = []
+    in_fence = False
+    previous: Optional[Tuple[int, str]] = None
+    table: Optional[Table] = None
+
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\n')
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        if in_fence or _FENCE_PATTERN.match(line):
+            if table:
+                yield table
+                table = None
+            previous = None
+            continue
+
+        if table is not None:
+            if line.strip().startswith('|'):
+                table.rows.append([parse_cell(cell) for cell in split_row(line)])
+                continue
+            yield table
+            table = None
+
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            level = len(stripped) - len(stripped.lstrip('#'))
+            section = [(lvl, title) for lvl, title in section if lvl < level]
+            section.append((level, stripped.lstrip('#').strip()))
+        elif previous and _SEPARATOR_PATTERN.match(line) and '-' in line:
+            table = Table(source, previous[0], tuple(title for _, title in section),
+                          [str(parse_cell(cell) or '') for cell in split_row(previous[1])])
+            previous = None
+            continue
+
+        previous = (number, line) if stripped.startswith('|') else None
+
+    if table:
+        yield table
+
+
+def extract_tables(file_path: Path, source: Optional[str] = None) -> List[Table]:
+    """All tables of a markdown file, streamed from disk."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return list(iter_tables(f, source or str(file_path)))
+
+
+def _encode(value: CellValue) -> Any:
+    if isinstance(value, Percentage):
+        return {'%': value.value}
+    if isinstance(value, NumberRange):
+        return {'range': [value.start, value.end]}
+    return value
+
+
+def _decode(value: Any) -> CellValue:
+    if isinstance(value, dict):
+        if '%' in value:
+            return Percentage(value['%'])
+        if 'range' in value:
+            return NumberRange(*value['range'])
+    return value
+
+
+class TableCache:
+    """Caches the extracted tables of a file by content hash."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir
+
+    def tables(self, file_path: Path, source: Optional[str] = None) -> List[Table]:
+        source = source or str(file_path)
+        if self.cache_dir is None:
+            return extract_tables(file_path, source)
+
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        cache_file = self.cache_dir / f"{digest}.json"
+        if cache_file.exists():
+            try:
+                cached = json.loads(cache_file.read_text(encoding='utf-8'))
+                if cached.get('version') == CACHE_VERSION:
+                    return [Table(source, entry['line'], tuple(entry['section']), entry['header'],
+                                  [[_decode(value) for value in row] for row in entry['rows']])
+                            for entry in cached['tables']]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable table cache {cache_file}: {e}")
+
+        tables = extract_tables(file_path, source)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps({'version': CACHE_VERSION, 'tables': [
+            {'line': table.line, 'section': table.section, 'header': table.header,
+             'rows': [[_encode(value) for value in row] for row in table.rows]}
+            for table in tables]}), encoding='utf-8')
+        tmp_file.replace(cache_file)
+        return tables
+
+
+def to_cell_value(value: CellValue) -> Tuple[Any, Optional[str]]:
+    """Spreadsheet value and number format of a typed cell."""
+    if isinstance(value, Percentage):
+        return value.value / 100, '0.0%'
+    if isinstance(value, NumberRange):
+        return str(value), None
+    return value, None
+
+
+def sheet_names(tables: List[Table]) -> List[str]:
+    """Unique Excel sheet names (max 31 chars) derived from the table titles."""
+    names, used = [], set()
+    for table in tables:
+        base = re.sub(r'[\[\]:*?/\\]', ' ', table.title).strip()[:28] or 'Table'
+        name, counter = base, 2
+        while name.lower() in used:
+            name = f"{base[:31 - len(str(counter)) - 1]} {counter}"
+            counter += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def write_workbook(tables: List[Table], output_file: Path) -> None:
+    """Write every table to its own sheet, with an index sheet first."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+
+    wb = Workbook()
+    index = wb.active
+    index.title = 'Tables'
+    index.append(['Sheet', 'Source', 'Line', 'Section', 'Rows'])
+    names = sheet_names(tables)
+    for name, table in zip(names, tables):
+        index.append([name, table.source, table.line, ' / '.join(table.section), len(table.rows)])
+
+        ws = wb.create_sheet(title=name)
+        ws.append(table.header)
+        for row in table.rows:
+            ws.append([to_cell_value(value)[0] for value in row])
+            for cell, value in zip(ws[ws.max_row], row):
+                number_format = to_cell_value(value)[1]
+                if number_format:
+                    cell.number_format = number_format
+
+    for ws in wb.worksheets:
+        for cell in ws[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+        for column in ws.columns:
+            width = max(len(str(cell.value)) if cell.value is not None else 0 for cell in column)
+            ws.column_dimensions[column[0].column_letter].width = min(width + 2, 50)
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(output_file)
+
+
+def write_csv_files(tables: List[Table], output_dir: Path) -> List[Path]:
+    """Write one CSV file per table, named after its page and position."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    counters: Dict[str, int] = {}
+    for table in tables:
+        stem = str(Path(table.source).with_suffix('')).replace('/', '_')
+        counters[stem] = counters.get(stem, 0) + 1
+        path = output_dir / f"{stem}_{counters[stem]:02d}.csv"
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(table.header)
+            for row in table.rows:
+                writer.writerow(['' if value is None else str(value) for value in row])
+        written.append(path)
+    return written
+
+
+def collect_pages(docs_dir: Path, selectors=None) -> List[str]:
+    """Pages to extract, relative to docs/ (all pages, or the selected nav pages)."""
+    if not selectors:
+        return [path.relative_to(docs_dir).as_posix() for path in sorted(docs_dir.rglob('*.md'))]
+
+    from convert_docs_to_docx import load_mkdocs_config
+    from nav_select import select_nav_paths, walk_nav
+    nav = load_mkdocs_config().get('nav', [])
+    selected = select_nav_paths(nav, selectors, docs_dir)
+    return [rel_path for _, rel_path in walk_nav(nav) if rel_path in selected and (docs_dir / rel_path).exists()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    from nav_select import parse_selectors
+
+    parser = argparse.ArgumentParser(description="Export the markdown tables of the documentation")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--xlsx', type=Path, help=f"Workbook to write (default: {DEFAULT_XLSX})")
+    output.add_argument('--csv', type=Path, metavar='DIR', help="Write one CSV file per table to DIR")
+    output.add_argument('--list', action='store_true', help="Only list the tables found")
+    parser.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                        help="Only extract matching pages (nav:, glob: or tag: selectors)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the per-file table cache")
+    args = parser.parse_args(argv)
+    try:
+        args.selectors = parse_selectors(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    docs_dir = project_root / 'docs'
+    # Output paths are relative to the caller's directory; load_mkdocs_config reads mkdocs.yml from the root
+    args.csv = args.csv.resolve() if args.csv else None
+    args.xlsx = args.xlsx.resolve() if args.xlsx else None
+    os.chdir(project_root)
+    cache = TableCache(None if args.no_cache else project_root / DEFAULT_CACHE_DIR)
+
+    tables = []
+    for rel_path in collect_pages(docs_dir, args.selectors):
+        tables.extend(cache.tables(docs_dir / rel_path, rel_path))
+    if not tables:
+        logger.error("No tables found")
+        return 1
+
+    if args.list:
+        for table in tables:
+            print(f"{table.source}:{table.line}  {table.title}  ({len(table.header)} columns, {len(table.rows)} rows)")
+    elif args.csv:
+        written = write_csv_files(tables, args.csv)
+        logger.info(f"✓ Wrote {len(written)} CSV files to {args.csv}")
+    else:
+        output_file = args.xlsx or project_root / DEFAULT_XLSX
+        write_workbook(tables, output_file)
+        logger.info(f"✓ Wrote {len(tables)} tables to {output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
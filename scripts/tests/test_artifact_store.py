@@ -0,0 +1,37 @@
+"""Tests for the fallback of the shared artifact store."""
+
+import asyncio
+
+from artifact_store import open_artifact_store
+
+
+def test_unusable_store_is_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv('EXPORT_CACHE', raising=False)
+    blocker = tmp_path / 'file'
+    blocker.write_text('not a directory')
+
+    store = open_artifact_store(blocker / 'store')
+
+    assert not store.enabled
+    assert store.put('docx', 'key', blocker) is None
+
+
+def test_store_failing_mid_export_falls_back(tmp_path, monkeypatch):
+    monkeypatch.delenv('EXPORT_CACHE', raising=False)
+    root = tmp_path / 'store'
+    store = open_artifact_store(root)
+    assert store.enabled
+    source = tmp_path / 'chapter.docx'
+    source.write_bytes(b'docx')
+    for path in sorted(root.rglob('*'), reverse=True):
+        path.rmdir() if path.is_dir() else path.unlink()
+    root.rmdir()
+    root.write_text('the cache directory was replaced by a file')
+
+    async def produce():
+        async with store.producing_async('docx', 'key'):
+            assert not store.fetch('docx', 'key', tmp_path / 'out.docx')
+            return store.put('docx', 'key', source)
+
+    assert asyncio.run(produce()) is None
+    assert not store.enabled
@@ -0,0 +1,103 @@
+"""Tests for the DOCX merge of bounded-memory exports."""
+
+import re
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from bounded_export import CONTENT_TYPES, merge_docx
+
+PNG = (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+       b'\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00\x00\x00\x00IEND\xaeB`\x82')
+
+MAIN_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
+RELS_TYPE = 'application/vnd.openxmlformats-package.relationships+xml'
+IMAGE_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+NAMESPACES = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+              'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+              'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+              'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+              'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture"')
+
+
+def image_paragraph(rel_id: str, drawing_id: int) -> str:
+    return ('<w:p><w:r><w:drawing><wp:inline><wp:extent cx="9525" cy="9525"/>'
+            f'<wp:docPr id="{drawing_id}" name="Picture"/><a:graphic>'
+            '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture"><pic:pic>'
+            f'<pic:nvPicPr><pic:cNvPr id="{drawing_id}" name="image.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+            f'<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+            '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="9525" cy="9525"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+            '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>')
+
+
+def write_docx(path: Path, text: str) -> Path:
+    """A minimal DOCX laid out like pandoc's: one image, typed by an <Override> only."""
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr(CONTENT_TYPES, (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            f'<Default Extension="rels" ContentType="{RELS_TYPE}"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/word/document.xml" ContentType="{MAIN_TYPE}"/>'
+            '<Override PartName="/word/media/rId20.png" ContentType="image/png"/>'
+            '</Types>'))
+        docx.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{DOCUMENT_REL}" Target="word/document.xml"/>'
+            '</Relationships>'))
+        docx.writestr('word/_rels/document.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId20" Type="{IMAGE_REL}" Target="media/rId20.png"/>'
+            '</Relationships>'))
+        docx.writestr('word/document.xml', (
+            f'<?xml version="1.0" encoding="UTF-8"?><w:document {NAMESPACES}><w:body>'
+            f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>{image_paragraph("rId20", 1)}'
+            '<w:sectPr/></w:body></w:document>'))
+        docx.writestr('word/media/rId20.png', PNG)
+    return path
+
+
+def content_type_of(types: str, part_name: str) -> str:
+    override = re.search(rf'<Override PartName="{re.escape(part_name)}" ContentType="([^"]+)"', types)
+    if override:
+        return override.group(1)
+    extension = part_name.rsplit('.', 1)[-1]
+    default = re.search(rf'<Default Extension="{re.escape(extension)}" ContentType="([^"]+)"', types)
+    return default.group(1) if default else ''
+
+
+def test_merged_images_have_content_types(tmp_path):
+    parts = [write_docx(tmp_path / f"part{number}.docx", f"Part {number}") for number in range(3)]
+    merged = tmp_path / 'merged.docx'
+    merge_docx(parts, merged)
+
+    with zipfile.ZipFile(merged) as docx:
+        names = docx.namelist()
+        types = docx.read(CONTENT_TYPES).decode('utf-8')
+        document = docx.read('word/document.xml').decode('utf-8')
+    media = sorted(name for name in names if name.startswith('word/media/'))
+    assert media == ['word/media/p1_rId20.png', 'word/media/p2_rId20.png', 'word/media/rId20.png']
+    for name in names:
+        if not name.endswith('/'):
+            assert content_type_of(types, f"/{name}"), f"no content type for /{name}"
+    assert [int(i) for i in re.findall(r'<wp:docPr id="(\d+)"', document)] == [1, 2, 3]
+    assert 'Part 2' in document
+    body = document[document.index('<w:body>'):document.index('</w:body>')]
+    assert body.count('<w:sectPr') == 1
+    assert body.endswith('<w:sectPr/>')
+
+
+def test_merged_docx_opens_with_python_docx(tmp_path):
+    docx = pytest.importorskip('docx')
+    parts = [write_docx(tmp_path / f"part{number}.docx", f"Part {number}") for number in range(2)]
+    merged = tmp_path / 'merged.docx'
+    merge_docx(parts, merged)
+
+    document = docx.Document(str(merged))
+    assert len(document.inline_shapes) == 2
+    assert [p.text for p in document.paragraphs if p.text] == ['Part 0', 'Part 1']
@@ -0,0 +1,36 @@
+"""Tests for the resource leveling of the workload plan."""
+
+from cost_model import PhaseBlock
+from leveling import Leveler, LevelingConstraints
+
+PROJECTS = ['Platform', 'Migration', 'Monitoring']
+PERSONAS = ['Architect', 'Engineer']
+
+
+def fixture_plan():
+    """Three projects ending in week 8, with two phases peaking together in weeks 7-8."""
+    return PROJECTS, PERSONAS, [
+        PhaseBlock(0, 'Implementation', 1, 8, {0: 5.0}, {0: 1}),
+        PhaseBlock(1, 'Testing', 7, 8, {1: 10.0}, {1: 2}),
+        PhaseBlock(2, 'Testing', 7, 8, {1: 10.0}, {1: 2}),
+    ]
+
+
+def test_default_leveling_keeps_the_planned_end_week():
+    leveler = Leveler(*fixture_plan())
+    result = leveler.level()
+
+    assert leveler.end_week(result.planned_starts) == 8
+    assert leveler.end_week(result.starts) == 8
+    assert result.starts == result.planned_starts
+    assert result.peak == result.planned_peak == 25.0
+
+
+def test_later_max_end_week_lets_leveling_extend_the_plan():
+    leveler = Leveler(*fixture_plan(), LevelingConstraints(max_end_week=10))
+    result = leveler.level()
+
+    assert result.peak == 15.0
+    assert leveler.end_week(result.starts) == 10
+    summary = dict((row[0], row[1:]) for row in leveler.sheets(result)['Leveling Summary'])
+    assert summary['End Week'] == [8, 10]
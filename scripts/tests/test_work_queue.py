@@ -0,0 +1,46 @@
+"""Tests for the file-based work queue."""
+
+import os
+import time
+
+from work_queue import Job, WorkQueue
+
+
+def expire(queue: WorkQueue, job: Job) -> None:
+    leased = queue.root / 'leased' / f"{job.id}.json"
+    old = time.time() - queue.lease_seconds - 1
+    os.utime(leased, (old, old))
+
+
+def test_completion_after_requeue_drops_the_pending_copy(tmp_path):
+    queue = WorkQueue(tmp_path, lease_seconds=60)
+    queue.submit(Job('diagram-1', 'diagram', {}))
+    queue.submit(Job('chapter-1', 'chapter', {}, requires=['diagram-1']))
+
+    job = queue.claim('worker-1')
+    expire(queue, job)
+    assert queue.reap() == 1
+    assert queue.state_of('diagram-1') == 'pending'
+
+    queue.complete(job, {'image': 'diagram-1.png'})
+
+    assert queue.state_of('diagram-1') == 'done'
+    assert queue.counts() == {'pending': 1, 'leased': 0, 'done': 1, 'failed': 0}
+    assert queue.claim('worker-2').id == 'chapter-1'
+
+
+def test_completion_while_requeued_job_runs_elsewhere(tmp_path):
+    queue = WorkQueue(tmp_path, lease_seconds=60)
+    queue.submit(Job('diagram-1', 'diagram', {}))
+
+    first = queue.claim('worker-1')
+    expire(queue, first)
+    queue.reap()
+    second = queue.claim('worker-2')
+    queue.complete(first, {'image': 'diagram-1.png'})
+
+    # The second lease is kept until its worker finishes; the job counts as done
+    assert queue.state_of('diagram-1') == 'done'
+    assert queue.heartbeat(second)
+    queue.complete(second, {'image': 'diagram-1.png'})
+    assert queue.counts() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 0}
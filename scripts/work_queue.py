@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+File-based work queue for distributed chapter exports.
+
+A coordinator turns the chapter job model of
+``MkDocsToDocxByChapterConverter`` into jobs in a shared directory: one
+``diagram`` job per unique mermaid block and one ``chapter`` job per chapter,
+which waits until the diagrams it contains are finished. Any number of
+workers (processes or agents sharing the directory) pull jobs concurrently.
+
+    <queue>/pending/<job>.json    waiting to be claimed
+    <queue>/leased/<job>.json     claimed; the file mtime is the lease heartbeat
+    <queue>/done/<job>.json       finished, with the result
+    <queue>/failed/<job>.json     out of attempts, with the last error
+    <queue>/images/               rendered diagrams (content-hash names)
+    <queue>/work/                 chapter checkpoints (retries resume from them)
+    <queue>/artifacts/            chapter DOCX files
+
+Claims are atomic renames from pending/ to leased/. A worker touches its lease
+while the job runs; leases that are not renewed within the lease time are
+requeued by any worker, and failed jobs are retried until ``max_attempts``.
+
+    python work_queue.py submit --queue /mnt/shared/export-queue
+    python work_queue.py work --queue /mnt/shared/export-queue     # on each agent
+    python work_queue.py run --workers 4                           # local: submit + 4 worker processes
+    python work_queue.py status
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+STATES = ('pending', 'leased', 'done', 'failed')
+DEFAULT_QUEUE_DIR = Path('.export-work') / 'queue'
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class Job:
+    """A unit of work; ``requires`` lists jobs that must be finished first.
+
+    Among ready jobs, the one with the highest ``priority`` (expected seconds
+    for diagrams) is claimed first.
+    """
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    requires: List[str] = field(default_factory=list)
+    priority: float = 0.0
+    attempts: int = 0
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    worker: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+class WorkQueue:
+    """Directory queue with atomic claims, mtime leases and retries."""
+
+    def __init__(self, root: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.root = Path(root)
+        self.lease_seconds = lease_seconds
+        for state in STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> Path:
+        return self.root / state / f"{job_id}.json"
+
+    def _write(self, state: str, job: Job) -> None:
+        path = self._path(state, job.id)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(asdict(job), indent=2), encoding='utf-8')
+        tmp_path.replace(path)
+
+    @staticmethod
+    def _read(path: Path) -> Job:
+        return Job(**json.loads(path.read_text(encoding='utf-8')))
+
+    def state_of(self, job_id: str) -> Optional[str]:
+        # A finished job may still have a requeued copy until that is dropped
+        for state in ('done',) + tuple(state for state in STATES if state != 'done'):
+            if self._path(state, job_id).exists():
+                return state
+        return None
+
+    def jobs(self, state: str) -> List[Job]:
+        jobs = []
+        for path in sorted((self.root / state).glob('*.json')):
+            try:
+                jobs.append(self._read(path))
+            except (OSError, ValueError):
+                continue  # moved or being written by another process
+        return jobs
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(list((self.root / state).glob('*.json'))) for state in STATES}
+
+    def idle(self) -> bool:
+        """Nothing left to claim or waiting for a lease."""
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def submit(self, job: Job) -> bool:
+        """Enqueue a job unless a job with the same id is already known."""
+        if self.state_of(job.id):
+            return False
+        self._write('pending', job)
+        return True
+
+    def reset(self) -> None:
+        """Drop all jobs (rendered images and checkpoints are kept)."""
+        for state in STATES:
+            shutil.rmtree(self.root / state, ignore_errors=True)
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _ready(self, job: Job) -> bool:
+        return all(self.state_of(required) in ('done', 'failed') for required in job.requires)
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Lease the highest-priority pending job whose requirements are finished."""
+        candidates = []
+        for path in sorted((self.root / 'pending').glob('*.json')):
+            try:
+                job = self._read(path)
+            except (OSError, ValueError):
+                continue
+            if self._path('done', job.id).exists():
+                path.unlink(missing_ok=True)  # requeued after an expired lease, but finished since
+                continue
+            if self._ready(job):
+                candidates.append((path, job))
+        candidates.sort(key=lambda candidate: -candidate[1].priority)  # stable: ties keep name order
+        for path, job in candidates:
+            try:
+                os.rename(path, self._path('leased', job.id))  # atomic: one worker wins
+            except FileNotFoundError:
+                continue
+            job.worker = worker
+            job.attempts += 1
+            self._write('leased', job)
+            return job
+        return None
+
+    def heartbeat(self, job: Job) -> bool:
+        """Renew the lease; False if it was lost (requeued by another worker)."""
+        try:
+            os.utime(self._path('leased', job.id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _release(self, job: Job, state: str, worker: Optional[str]) -> None:
+        """Move a leased job to its next state."""
+        leased = self._path('leased', job.id)
+        try:
+            holder = self._read(leased).worker
+        except (OSError, ValueError):
+            holder = None
+        self._write(state, job)
+        # A requeued job may have been claimed again meanwhile: keep that lease
+        if holder == worker:
+            leased.unlink(missing_ok=True)
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> None:
+        job.result, job.error = result, None
+        self._release(job, 'done', job.worker)
+        # The lease may have expired and the job been requeued while it ran
+        self._path('pending', job.id).unlink(missing_ok=True)
+
+    def fail(self, job: Job, error: str) -> None:
+        """Retry the job, or park it in failed/ once out of attempts."""
+        worker = job.worker
+        job.error, job.worker = error, None
+        self._release(job, 'failed' if job.attempts >= job.max_attempts else 'pending', worker)
+
+    def reap(self) -> int:
+        """Requeue jobs whose lease expired (worker crashed or lost)."""
+        requeued = 0
+        deadline = time.time() - self.lease_seconds
+        for path in (self.root / 'leased').glob('*.json'):
+            try:
+                if path.stat().st_mtime > deadline:
+                    continue
+                # Take the expired lease over atomically before rewriting it
+                reaping = path.with_name(f".{path.name}.{os.getpid()}.reap")
+                os.rename(path, reaping)
+            except FileNotFoundError:
+                continue
+            job = self._read(reaping)
+            logger.warning(f"⏱ Lease of {job.id} held by {job.worker} expired")
+            job.error, job.worker = f"lease expired after {self.lease_seconds}s", None
+            self._write('failed' if job.attempts >= job.max_attempts else 'pending', job)
+            reaping.unlink(missing_ok=True)
+            requeued += 1
+        return requeued
+
+
+class Heartbeat:
+    """Renew a job lease in the background while it runs."""
+
+    def __init__(self, queue: WorkQueue, job: Job):
+        self.queue = queue
+        self.job = job
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(self.job):
+                logger.warning(f"Lost the lease of {self.job.id}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class JobRunner:
+    """Executes diagram and chapter jobs against a project checkout."""
+
+    def __init__(self, project_root: Path, queue: WorkQueue):
+        self.project_root = project_root
+        self.queue = queue
+        self.images_dir = queue.root / 'images'
+        self.artifacts_dir = queue.root / 'artifacts'
+
+    def run(self, job: Job) -> Dict[str, Any]:
+        if job.kind == 'diagram':
+            return self.run_diagram(job.payload)
+        if job.kind == 'chapter':
+            return self.run_chapter(job.payload)
+        raise ValueError(f"Unknown job kind: {job.kind}")
+
+    def run_diagram(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from artifact_store import get_artifact_store
+        from async_exec import ToolExecutor
+        from convert_docs_to_docx import diagram_store_key, render_mermaid_to_png
+        from diagram_report import DEFAULT_SCALE, image_filename
+        from render_scheduler import diagram_size
+
+        # Same scale (and image name) as the chapter job will look for
+        scale = payload.get('scale', DEFAULT_SCALE)
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        image_path = self.images_dir / image_filename(payload['digest'], scale)
+        if image_path.exists():
+            return {'image': str(image_path), 'cached': True}
+        store = get_artifact_store()
+        store_key = diagram_store_key(payload['code'], scale)
+        with store.producing('diagram', store_key):
+            if store.fetch('diagram', store_key, image_path):
+                return {'image': str(image_path), 'cached': True}
+            started = time.monotonic()
+            backend = asyncio.run(render_mermaid_to_png(payload['code'], str(image_path), ToolExecutor(), scale))
+            if not backend:
+                raise RuntimeError(f"rendering diagram {payload['digest'][:12]} failed")
+            store.put('diagram', store_key, image_path, backend=backend)
+        nodes, edges = diagram_size(payload['code'])
+        return {'image': str(image_path), 'backend': backend, 'duration': round(time.monotonic() - started, 3),
+                'nodes': nodes, 'edges': edges}
+
+    def run_chapter(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from async_exec import ToolExecutor
+        from convert_docs_to_docx_by_chapter import MkDocsToDocxByChapterConverter
+
+        # Retries resume from the checkpoints of the previous attempt
+        converter = MkDocsToDocxByChapterConverter(self.project_root, work_dir=self.queue.root / 'work',
+                                                   resume=True, epoch=payload.get('epoch'),
+                                                   images_dir=self.images_dir)
+        chapter = payload['chapter']
+        files = [self.project_root / path for path in payload['files']]
+        ok = asyncio.run(converter.process_chapter(chapter, files, ToolExecutor()))
+        if ok is None:
+            return {'output': None}
+        if not ok:
+            raise RuntimeError(f"chapter {chapter} failed")
+        output_file = converter.output_file(chapter)
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(output_file, self.artifacts_dir / output_file.name)
+        return {'output': str(output_file), 'artifact': str(self.artifacts_dir / output_file.name),
+                'size_bytes': output_file.stat().st_size}
+
+
+def submit_export(queue: WorkQueue, converter, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """Enqueue the diagram and chapter jobs of an export; returns the number of new jobs."""
+    from asset_index import AssetIndex, DEFAULT_INDEX_PATH
+    from convert_docs_to_docx import extract_mermaid_blocks
+    from diagram_report import get_diagram_report
+    from render_scheduler import RenderHistory
+
+    # Longest expected renders are claimed first
+    history = RenderHistory.from_asset_index(AssetIndex(converter.project_root / DEFAULT_INDEX_PATH,
+                                                        converter.project_root))
+    submitted = 0
+    for chapter, files in converter.plan_chapters().items():
+        content = converter.combine_chapter_files(chapter, files)
+        diagram_ids = []
+        for block in extract_mermaid_blocks(content):
+            job_id = f"diagram-{block.digest[:16]}"
+            diagram_payload = {'code': block.code, 'digest': block.digest,
+                               'scale': get_diagram_report().scale_for(block.code)}
+            submitted += queue.submit(Job(job_id, 'diagram', diagram_payload,
+                                          max_attempts=max_attempts,
+                                          priority=round(history.expected_duration(block.digest, block.code), 3)))
+            diagram_ids.append(job_id)
+        payload = {'chapter': chapter, 'epoch': converter.epoch,
+                   'files': [file_path.relative_to(converter.project_root).as_posix() for file_path in files]}
+        submitted += queue.submit(Job(f"chapter-{chapter}", 'chapter', payload,
+                                      requires=sorted(set(diagram_ids)), max_attempts=max_attempts))
+    return submitted
+
+
+def run_worker(queue: WorkQueue, project_root: Path, worker_id: str, poll: float = 1.0,
+               wait: bool = False) -> int:
+    """Process jobs until the queue is idle (or forever with ``wait``); returns jobs run."""
+    from artifact_store import open_artifact_store
+
+    runner = JobRunner(project_root, queue)
+    open_artifact_store()
+    processed = 0
+    while True:
+        queue.reap()
+        job = queue.claim(worker_id)
+        if job is None:
+            if queue.idle() and not wait:
+                return processed
+            time.sleep(poll)
+            continue
+
+        logger.info(f"▶ {worker_id}: {job.id} (attempt {job.attempts}/{job.max_attempts})")
+        started = time.monotonic()
+        with Heartbeat(queue, job):
+            try:
+                result = runner.run(job)
+            except Exception as e:
+                logger.error(f"✗ {worker_id}: {job.id}: {e}")
+                queue.fail(job, str(e))
+            else:
+                result['duration'] = round(time.monotonic() - started, 3)
+                queue.complete(job, result)
+                logger.info(f"✓ {worker_id}: {job.id} in {result['duration']:.1f}s")
+        processed += 1
+
+
+def print_status(queue: WorkQueue, as_json: bool = False) -> None:
+    if as_json:
+        print(json.dumps({state: [asdict(job) for job in queue.jobs(state)] for state in STATES}, indent=2))
+        return
+    counts = queue.counts()
+    print(' '.join(f"{state}={counts[state]}" for state in STATES))
+    for job in queue.jobs('leased'):
+        print(f"  leased  {job.id} by {job.worker} (attempt {job.attempts})")
+    for job in queue.jobs('failed'):
+        print(f"  failed  {job.id}: {job.error}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    from nav_select import parse_selectors
+
+    parser = argparse.ArgumentParser(description="Distribute chapter exports over a file-based work queue")
+    parser.add_argument('--queue', type=Path, help=f"Queue directory (default: <project>/{DEFAULT_QUEUE_DIR})")
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help=f"Seconds before an unrenewed lease is requeued (default: {DEFAULT_LEASE_SECONDS})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('submit', "Enqueue the jobs of an export"),
+                            ('run', "Submit and process locally with several worker processes")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('--only', type=lambda value: [n.strip() for n in value.split(',') if n.strip()],
+                             help="Comma-separated list of chapters")
+        command.add_argument('--select', action='append', default=[], metavar='SELECTOR',
+                             help="Export only matching pages (nav:, glob: or tag: selectors)")
+        command.add_argument('--reproducible', action='store_true', help="Byte-stable DOCX output")
+        command.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+        command.add_argument('--keep', action='store_true', help="Keep jobs already in the queue")
+        if name == 'run':
+            command.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+
+    work = subparsers.add_parser('work', help="Process jobs from the queue")
+    work.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    work.add_argument('--poll', type=float, default=1.0, help="Seconds between polls when no job is ready")
+    work.add_argument('--wait', action='store_true', help="Keep polling when the queue is idle")
+
+    status = subparsers.add_parser('status', help="Show the queue state")
+    status.add_argument('--json', action='store_true')
+
+    args = parser.parse_args(argv)
+    if args.command in ('submit', 'run'):
+        try:
+            args.selectors = parse_selectors(args.select)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def submit(args: argparse.Namespace, queue: WorkQueue, project_root: Path) -> int:
+    from convert_docs_to_docx_by_chapter import MkDocsToDocxByChapterConverter
+    from reproducible import reproducible_requested, source_date_epoch
+
+    if not args.keep:
+        queue.reset()
+    epoch = source_date_epoch(project_root) if reproducible_requested(args.reproducible) else None
+    converter = MkDocsToDocxByChapterConverter(project_root, only=args.only, selectors=args.selectors,
+                                               epoch=epoch)
+    submitted = submit_export(queue, converter, args.max_attempts)
+    logger.info(f"✓ Submitted {submitted} job(s) to {queue.root}")
+    return submitted
+
+
+def main() -> int:
+    """Main entry point."""
+    args = parse_args()
+    project_root = Path(__file__).resolve().parent.parent
+    queue = WorkQueue(args.queue or project_root / DEFAULT_QUEUE_DIR, args.lease)
+
+    if args.command == 'status':
+        print_status(queue, args.json)
+        return 0
+
+    if args.command == 'submit':
+        submit(args, queue, project_root)
+        return 0
+
+    if args.command == 'work':
+        processed = run_worker(queue, project_root, args.worker_id, args.poll, args.wait)
+        logger.info(f"✓ {args.worker_id}: {processed} job(s) processed")
+        return 0
+
+    # run: coordinator and local worker processes
+    submit(args, queue, project_root)
+    started = time.monotonic()
+    workers = [subprocess.Popen([sys.executable, str(Path(__file__).resolve()), '--queue', str(queue.root),
+                                 '--lease', str(args.lease), 'work', '--worker-id', f"local-{i}"])
+               for i in range(max(1, args.workers))]
+    for worker in workers:
+        worker.wait()
+    counts = queue.counts()
+    logger.info(f"✓ {counts['done']} job(s) done, {counts['failed']} failed "
+                f"with {len(workers)} worker(s) in {time.monotonic() - started:.1f}s")
+    if counts['failed']:
+        print_status(queue)
+    return 1 if counts['failed'] or counts['pending'] or counts['leased'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())